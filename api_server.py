@@ -3,21 +3,88 @@ REST API Server for Trailer Move Tracker
 Provides endpoints for external applications (VB.NET, mobile apps, etc.)
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import sqlite3
 import hashlib
 from datetime import datetime, timedelta
 import secrets
 
+from src.services import data_cache
+from src.services.api_auth import Authenticator, install_revocation_triggers
+from src.services.api_paging import DEFAULT_PAGE_SIZE, fetch_page
+from src.services.async_db import AsyncDatabase
+from src.services.change_feed import (
+    DEFAULT_BATCH_SIZE, FEED_TABLES, compact_changes, current_cursor, ensure_change_log, read_changes
+)
+from src.services.connection_pool import DEFAULT_PRAGMAS
+from src.services.dashboard_stats import install_fleet_counters, read_fleet_stats
+from src.services.date_contract import iso_value
+from src.services.event_broker import broker, start_relay, stop_relay
+
+DB_PATH = 'trailer_tracker_streamlined.db'
+
+# Pooled readers + one serialized writer, opened by the lifespan below
+database = AsyncDatabase(DB_PATH, pragmas=DEFAULT_PRAGMAS)
+
+# Bearer tokens and cached Basic credentials
+auth = Authenticator()
+
+def install_version_tracking(conn):
+    data_cache.install_version_tracking(conn, DB_PATH)
+
+# Schema helpers run once on the writer at startup (all idempotent)
+STARTUP_INSTALLERS = [
+    ("fleet_counters", install_fleet_counters),
+    ("auth revocation triggers", install_revocation_triggers),
+    ("table version tracking", install_version_tracking),
+    ("change feed", ensure_change_log),
+]
+
+# How often superseded change feed rows are compacted
+COMPACTION_INTERVAL = 3600
+
+async def compact_change_feed():
+    while True:
+        await asyncio.sleep(COMPACTION_INTERVAL)
+        try:
+            removed = await database.run_write(compact_changes)
+            if removed:
+                print(f"Change feed compaction removed {removed} rows")
+        except sqlite3.Error as e:
+            print(f"Change feed compaction failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await database.open()
+    for label, installer in STARTUP_INSTALLERS:
+        try:
+            await database.run_write(installer)
+        except sqlite3.Error as e:
+            print(f"{label} not installed: {e}")
+    
+    compaction = asyncio.create_task(compact_change_feed())
+    # Publishes writes from every process (Streamlit, scripts) to event subscribers
+    start_relay(lambda: sqlite3.connect(DB_PATH))
+    yield
+    stop_relay()
+    compaction.cancel()
+    await database.close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Smith & Williams Trucking API",
     description="REST API for Trailer Move Management System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware for cross-origin requests
@@ -29,40 +96,106 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Security
-security = HTTPBasic()
+# Compress list responses (clients send Accept-Encoding: gzip)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
-# Database connection
-def get_db():
-    conn = sqlite3.connect('trailer_tracker_streamlined.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+# Security - Bearer token from /api/login, or HTTP Basic
+security = HTTPBasic(auto_error=False)
+bearer = HTTPBearer(auto_error=False)
 
 # Helper functions
 def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
 
-def verify_user(credentials: HTTPBasicCredentials = Depends(security)):
-    """Verify user credentials"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    hashed_pw = hash_password(credentials.password)
-    cursor.execute(
-        "SELECT username, role FROM users WHERE user = ? AND password = ? AND active = 1",
-        (credentials.username, hashed_pw)
+async def lookup_user(username: str, password: str):
+    """Check a username/password against the users table"""
+    return await database.fetch_one(
+        "SELECT * FROM users WHERE username = ? AND password = ? AND active = 1",
+        (username, hash_password(password))
     )
-    user = cursor.fetchone()
-    conn.close()
+
+async def refresh_revocations():
+    """Apply password changes / deactivations, at most once per poll interval"""
+    if not auth.revocation_poll_due():
+        return
+    try:
+        rows = await database.fetch_all(
+            "SELECT username, revoked_at FROM auth_revocations WHERE revoked_at > ?",
+            (auth.revocations_since,)
+        )
+    except sqlite3.OperationalError:
+        return
+    auth.apply_revocations((row["username"], row["revoked_at"]) for row in rows)
+
+async def verify_user(
+    token: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+    credentials: Optional[HTTPBasicCredentials] = Depends(security)
+):
+    """Verify a bearer token or Basic credentials"""
+    await refresh_revocations()
     
-    if not user:
+    if token:
+        user = auth.check_token(token.credentials)
+        if user:
+            return user
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid credentials",
-            headers={"WWW-Authenticate": "Basic"},
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return {"user": user["user"], "role": user["role"]}
+    if credentials:
+        hashed_pw = hash_password(credentials.password)
+        user = auth.cached_credentials(credentials.username, hashed_pw)
+        if user:
+            return user
+        
+        row = await lookup_user(credentials.username, credentials.password)
+        if row:
+            user = {"user": row["username"], "role": row["role"]}
+            auth.remember_credentials(credentials.username, hashed_pw, user)
+            return user
+    
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid credentials",
+        headers={"WWW-Authenticate": "Basic"},
+    )
+
+async def check_etag(request: Request, response: Response, *tables):
+    """Set an ETag from the tables' versions; True if the client's copy is current
+
+    The tag covers the path and query string, so each page/filter/projection
+    has its own. Unchanged polls get a 304 with no body and no row reads.
+    """
+    try:
+        versions = await database.run_read(lambda conn: data_cache.cache.tracked_versions(conn, tables))
+    except sqlite3.OperationalError:
+        return False
+    if versions is None:
+        # Untracked table: a version can't prove the client's copy is current
+        return False
+    
+    digest = hashlib.sha1(f"{tables}:{versions}:{request.url.path}?{request.url.query}".encode()).hexdigest()
+    etag = f'W/"{digest[:20]}"'
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+def not_modified(response: Response):
+    return Response(status_code=304, headers={"ETag": response.headers["ETag"],
+                                              "Cache-Control": response.headers["Cache-Control"]})
+
+async def read_page(table, sort_column, filters, limit, cursor, fields):
+    """fetch_page on a read connection; bad cursor/fields become 400s"""
+    try:
+        return await database.run_read(
+            lambda conn: fetch_page(conn, table, sort_column, filters, limit, cursor, fields)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # ===== MODELS =====
 class LoginRequest(BaseModel):
@@ -74,6 +207,9 @@ class LoginResponse(BaseModel):
     username: str
     role: str
     message: str
+    token: str
+    token_type: str = "bearer"
+    expires_at: float
 
 class TrailerRequest(BaseModel):
     trailer_number: str
@@ -103,31 +239,32 @@ class StatusUpdate(BaseModel):
 
 # ===== AUTHENTICATION ENDPOINTS =====
 @app.post("/api/login", response_model=LoginResponse)
-def login(request: LoginRequest):
-    """Login endpoint for authentication"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    hashed_pw = hash_password(request.password)
-    cursor.execute(
-        "SELECT username, role, name FROM users WHERE user = ? AND password = ? AND active = 1",
-        (request.username, hashed_pw)
-    )
-    user = cursor.fetchone()
-    conn.close()
+async def login(request: LoginRequest):
+    """Login endpoint - returns a bearer token for later requests"""
+    user = await lookup_user(request.username, request.password)
     
     if user:
+        token, expires_at = auth.issue_token({"user": user["username"], "role": user["role"]})
         return LoginResponse(
             success=True,
-            username=user["user"],
+            username=user["username"],
             role=user["role"],
-            message=f"Welcome {user['name'] if user['name'] else user['user']}!"
+            message=f"Welcome {user.get('name') or user['username']}!",
+            token=token,
+            expires_at=expires_at
         )
     else:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
+@app.post("/api/logout")
+async def logout(current_user: dict = Depends(verify_user)):
+    """End the bearer token used for this request"""
+    if "token_id" in current_user:
+        auth.logout(current_user["token_id"], current_user["expires_at"])
+    return {"success": True}
+
 @app.get("/api/verify")
-def verify_token(current_user: dict = Depends(verify_user)):
+async def verify_token(current_user: dict = Depends(verify_user)):
     """Verify authentication token"""
     return {
         "authenticated": True,
@@ -136,51 +273,47 @@ def verify_token(current_user: dict = Depends(verify_user)):
 
 # ===== TRAILER ENDPOINTS =====
 @app.get("/api/trailers")
-def get_trailers(
+async def get_trailers(
+    request: Request,
+    response: Response,
     status: Optional[str] = None,
-    limit: int = 100,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: dict = Depends(verify_user)
 ):
-    """Get all trailers or filter by status"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    if status:
-        cursor.execute(
-            "SELECT * FROM trailer_inventory WHERE status = ? LIMIT ?",
-            (status, limit)
-        )
-    else:
-        cursor.execute("SELECT * FROM trailer_inventory LIMIT ?", (limit,))
+    """Get trailers, newest first, optionally filtered by status
+    
+    Pass next_cursor back as cursor= for the next page; fields= limits columns.
+    """
+    if await check_etag(request, response, "trailer_inventory"):
+        return not_modified(response)
     
-    trailers = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    trailers, next_cursor = await read_page(
+        "trailer_inventory", "created_at", {"status": status}, limit, cursor, fields
+    )
     
     return {
         "count": len(trailers),
-        "trailers": trailers
+        "trailers": trailers,
+        "next_cursor": next_cursor
     }
 
 @app.get("/api/trailers/{trailer_number}")
-def get_trailer(trailer_number: str, current_user: dict = Depends(verify_user)):
+async def get_trailer(trailer_number: str, current_user: dict = Depends(verify_user)):
     """Get specific trailer by number"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
+    trailer = await database.fetch_one(
         "SELECT * FROM trailer_inventory WHERE trailer_number = ?",
         (trailer_number,)
     )
-    trailer = cursor.fetchone()
-    conn.close()
     
     if trailer:
-        return dict(trailer)
+        return trailer
     else:
         raise HTTPException(status_code=404, detail="Trailer not found")
 
 @app.post("/api/trailers")
-def create_trailer(
+async def create_trailer(
     trailer: TrailerRequest,
     current_user: dict = Depends(verify_user)
 ):
@@ -188,11 +321,8 @@ def create_trailer(
     if current_user["role"] not in ["business_administrator", "admin", "data_entry"]:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("""
+        await database.execute("""
             INSERT INTO trailer_inventory 
             (trailer_number, trailer_type, status, condition, current_location, 
              customer_owner, notes, updated_by, last_updated)
@@ -202,39 +332,29 @@ def create_trailer(
             trailer.condition, trailer.current_location, trailer.customer_owner,
             trailer.notes, current_user["user"], datetime.now()
         ))
-        conn.commit()
-        conn.close()
         
         return {
             "success": True,
             "message": f"Trailer {trailer.trailer_number} created successfully"
         }
     except sqlite3.IntegrityError:
-        conn.close()
         raise HTTPException(status_code=400, detail="Trailer already exists")
 
 @app.put("/api/trailers/{trailer_number}/status")
-def update_trailer_status(
+async def update_trailer_status(
     trailer_number: str,
     update: StatusUpdate,
     current_user: dict = Depends(verify_user)
 ):
     """Update trailer status"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
+    updated = await database.execute(
         "UPDATE trailer_inventory SET status = ?, notes = ?, updated_by = ?, last_updated = ? WHERE trailer_number = ?",
         (update.status, update.notes, current_user["user"], datetime.now(), trailer_number)
     )
     
-    if cursor.rowcount == 0:
-        conn.close()
+    if updated == 0:
         raise HTTPException(status_code=404, detail="Trailer not found")
     
-    conn.commit()
-    conn.close()
-    
     return {
         "success": True,
         "message": f"Trailer {trailer_number} status updated to {update.status}"
@@ -242,59 +362,48 @@ def update_trailer_status(
 
 # ===== MOVE ENDPOINTS =====
 @app.get("/api/moves")
-def get_moves(
+async def get_moves(
+    request: Request,
+    response: Response,
     status: Optional[str] = None,
     driver: Optional[str] = None,
-    limit: int = 100,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: dict = Depends(verify_user)
 ):
-    """Get all moves or filter by status/driver"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    query = "SELECT * FROM moves WHERE 1=1"
-    params = []
-    
-    if status:
-        query += " AND status = ?"
-        params.append(status)
+    """Get moves, newest first, optionally filtered by status/driver
     
-    if driver:
-        query += " AND driver_name = ?"
-        params.append(driver)
+    Pass next_cursor back as cursor= for the next page; fields= limits columns.
+    """
+    if await check_etag(request, response, "moves"):
+        return not_modified(response)
     
-    query += " ORDER BY created_at DESC LIMIT ?"
-    params.append(limit)
-    
-    cursor.execute(query, params)
-    moves = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    moves, next_cursor = await read_page(
+        "moves", "created_at", {"status": status, "driver_name": driver}, limit, cursor, fields
+    )
     
     return {
         "count": len(moves),
-        "moves": moves
+        "moves": moves,
+        "next_cursor": next_cursor
     }
 
 @app.get("/api/moves/{order_number}")
-def get_move(order_number: str, current_user: dict = Depends(verify_user)):
+async def get_move(order_number: str, current_user: dict = Depends(verify_user)):
     """Get specific move by order number"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
+    move = await database.fetch_one(
         "SELECT * FROM moves WHERE order_number = ?",
         (order_number,)
     )
-    move = cursor.fetchone()
-    conn.close()
     
     if move:
-        return dict(move)
+        return move
     else:
         raise HTTPException(status_code=404, detail="Move not found")
 
 @app.post("/api/moves")
-def create_move(
+async def create_move(
     move: MoveRequest,
     current_user: dict = Depends(verify_user)
 ):
@@ -302,11 +411,16 @@ def create_move(
     if current_user["role"] not in ["business_administrator", "admin", "operations_coordinator"]:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    conn = get_db()
-    cursor = conn.cursor()
+    # moves only accepts ISO dates (see date_contract); normalize client input
+    dates = {}
+    for field in ('pickup_date', 'delivery_date'):
+        try:
+            dates[field] = iso_value(getattr(move, field))
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid {field}: {getattr(move, field)!r}")
     
     try:
-        cursor.execute("""
+        await database.execute("""
             INSERT INTO moves 
             (order_number, customer_name, origin_city, origin_state,
              destination_city, destination_state, pickup_date, delivery_date,
@@ -314,50 +428,42 @@ def create_move(
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             move.order_number, move.customer_name, move.origin_city, move.origin_state,
-            move.destination_city, move.destination_state, move.pickup_date, 
-            move.delivery_date, move.amount, move.driver_name, move.status,
+            move.destination_city, move.destination_state, dates['pickup_date'], 
+            dates['delivery_date'], move.amount, move.driver_name, move.status,
             datetime.now(), current_user["user"]
         ))
-        conn.commit()
-        conn.close()
         
         return {
             "success": True,
             "message": f"Move {move.order_number} created successfully"
         }
-    except sqlite3.IntegrityError:
-        conn.close()
-        raise HTTPException(status_code=400, detail="Move order number already exists")
+    except sqlite3.IntegrityError as e:
+        if 'UNIQUE' in str(e):
+            raise HTTPException(status_code=400, detail="Move order number already exists")
+        raise HTTPException(status_code=400, detail=f"Move rejected: {e}")
 
 @app.put("/api/moves/{order_number}/status")
-def update_move_status(
+async def update_move_status(
     order_number: str,
     update: StatusUpdate,
     current_user: dict = Depends(verify_user)
 ):
     """Update move status"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
+    updated = await database.execute(
         "UPDATE moves SET status = ?, notes = ? WHERE order_number = ?",
         (update.status, update.notes, order_number)
     )
     
-    if cursor.rowcount == 0:
-        conn.close()
+    if updated == 0:
         raise HTTPException(status_code=404, detail="Move not found")
     
-    conn.commit()
-    conn.close()
-    
     return {
         "success": True,
         "message": f"Move {order_number} status updated to {update.status}"
     }
 
 @app.put("/api/moves/{order_number}/assign")
-def assign_driver(
+async def assign_driver(
     order_number: str,
     driver_name: str,
     current_user: dict = Depends(verify_user)
@@ -366,55 +472,135 @@ def assign_driver(
     if current_user["role"] not in ["business_administrator", "admin", "operations_coordinator"]:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute(
+    updated = await database.execute(
         "UPDATE moves SET driver_name = ?, status = 'assigned' WHERE order_number = ?",
         (driver_name, order_number)
     )
     
-    if cursor.rowcount == 0:
-        conn.close()
+    if updated == 0:
         raise HTTPException(status_code=404, detail="Move not found")
     
-    conn.commit()
-    conn.close()
-    
     return {
         "success": True,
         "message": f"Driver {driver_name} assigned to move {order_number}"
     }
 
-# ===== DASHBOARD ENDPOINTS =====
-@app.get("/api/dashboard/stats")
-def get_dashboard_stats(current_user: dict = Depends(verify_user)):
-    """Get dashboard statistics"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Get move stats
-    cursor.execute("SELECT COUNT(*) FROM moves WHERE status = 'pending'")
-    pending_moves = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM moves WHERE status = 'in_progress'")
-    active_moves = cursor.fetchone()[0]
+# ===== SYNC ENDPOINTS =====
+@app.get("/api/changes")
+async def get_changes(
+    since: Optional[int] = None,
+    limit: int = DEFAULT_BATCH_SIZE,
+    entity: Optional[str] = None,
+    current_user: dict = Depends(verify_user)
+):
+    """Inserts, updates and deletes after a cursor, for incremental sync
+    
+    Without since= only the current cursor is returned (use it after a full
+    load). Keep requesting with the returned cursor while has_more is true.
+    reset=true means the cursor is too old - reload the lists, then resume.
+    """
+    entity_types = None
+    if entity:
+        entity_types = [e.strip() for e in entity.split(",") if e.strip()]
+        unknown = [e for e in entity_types if e not in FEED_TABLES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown entity: {', '.join(unknown)}")
     
-    cursor.execute("SELECT COUNT(*) FROM moves WHERE status = 'completed'")
-    completed_moves = cursor.fetchone()[0]
+    try:
+        if since is None:
+            cursor = await database.run_read(current_cursor)
+            return {"changes": [], "cursor": cursor, "has_more": False, "reset": False}
+        
+        return await database.run_read(lambda conn: read_changes(conn, since, limit, entity_types))
+    except sqlite3.OperationalError:
+        raise HTTPException(status_code=503, detail="Change feed not available")
+
+# ===== PUSH ENDPOINTS =====
+# Seconds between keep-alives on idle event streams
+EVENT_KEEPALIVE = 15
+
+def parse_kinds(kinds: Optional[str]):
+    return [k.strip() for k in kinds.split(",") if k.strip()] if kinds else None
+
+def event_json(event: dict) -> str:
+    return json.dumps({k: v for k, v in event.items() if k != "key"}, default=str)
+
+@app.get("/api/events")
+async def stream_events(
+    request: Request,
+    kinds: Optional[str] = None,
+    current_user: dict = Depends(verify_user)
+):
+    """Server-Sent Events stream of changes and notifications for this user/role
     
-    # Get trailer stats
-    cursor.execute("SELECT COUNT(*) FROM trailer_inventory WHERE status = 'available'")
-    available_trailers = cursor.fetchone()[0]
+    kinds= limits the stream to "change" and/or "notification" events.
+    """
+    subscription = broker.subscribe(
+        role=current_user["role"], user=current_user["user"],
+        kinds=parse_kinds(kinds), loop=asyncio.get_running_loop()
+    )
     
-    cursor.execute("SELECT COUNT(*) FROM trailer_inventory WHERE status = 'in_use'")
-    in_use_trailers = cursor.fetchone()[0]
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.next(timeout=EVENT_KEEPALIVE)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: {event['kind']}\ndata: {event_json(event)}\n\n"
+        finally:
+            subscription.close()
+    
+    # Content-Encoding keeps the gzip middleware from buffering the stream
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "Content-Encoding": "identity",
+        "X-Accel-Buffering": "no",
+    })
+
+@app.websocket("/ws/events")
+async def websocket_events(websocket: WebSocket, token: str, kinds: Optional[str] = None):
+    """WebSocket stream of the same events; authenticate with ?token= from /api/login"""
+    await refresh_revocations()
+    current_user = auth.check_token(token)
+    if not current_user:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    subscription = broker.subscribe(
+        role=current_user["role"], user=current_user["user"],
+        kinds=parse_kinds(kinds), loop=asyncio.get_running_loop()
+    )
+    try:
+        while True:
+            event = await subscription.next(timeout=EVENT_KEEPALIVE)
+            if event is None:
+                await websocket.send_text('{"kind": "keep-alive"}')
+                continue
+            await websocket.send_text(event_json(event))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
+
+# ===== DASHBOARD ENDPOINTS =====
+@app.get("/api/dashboard/stats")
+async def get_dashboard_stats(current_user: dict = Depends(verify_user)):
+    """Get dashboard statistics"""
+    # Move and trailer stats from the trigger-maintained counters
+    stats = await database.run_read(read_fleet_stats)
+    pending_moves = stats.count('moves', status='pending')
+    active_moves = stats.count('moves', status='in_progress')
+    completed_moves = stats.count('moves', status='completed')
+    available_trailers = stats.count('trailer_inventory', status='available')
+    in_use_trailers = stats.count('trailer_inventory', status='in_use')
     
     # Get driver stats
-    cursor.execute("SELECT COUNT(DISTINCT driver_name) FROM moves WHERE driver_name IS NOT NULL")
-    active_drivers = cursor.fetchone()[0]
-    
-    conn.close()
+    active_drivers = await database.fetch_value(
+        "SELECT COUNT(DISTINCT driver_name) FROM moves WHERE driver_name IS NOT NULL"
+    )
     
     return {
         "moves": {
@@ -432,24 +618,18 @@ def get_dashboard_stats(current_user: dict = Depends(verify_user)):
     }
 
 @app.get("/api/dashboard/recent-activity")
-def get_recent_activity(
+async def get_recent_activity(
     limit: int = 10,
     current_user: dict = Depends(verify_user)
 ):
     """Get recent system activity"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+    activities = await database.fetch_all("""
         SELECT order_number, customer_name, status, created_at, driver_name
         FROM moves
         ORDER BY created_at DESC
         LIMIT ?
     """, (limit,))
     
-    activities = [dict(row) for row in cursor.fetchall()]
-    conn.close()
-    
     return {
         "count": len(activities),
         "activities": activities
@@ -457,14 +637,9 @@ def get_recent_activity(
 
 # ===== DRIVER ENDPOINTS =====
 @app.get("/api/drivers")
-def get_drivers(current_user: dict = Depends(verify_user)):
+async def get_drivers(current_user: dict = Depends(verify_user)):
     """Get all drivers"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM drivers WHERE status = 'Active'")
-    drivers = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    drivers = await database.fetch_all("SELECT * FROM drivers WHERE status = 'Active'")
     
     return {
         "count": len(drivers),
@@ -472,30 +647,33 @@ def get_drivers(current_user: dict = Depends(verify_user)):
     }
 
 @app.get("/api/drivers/{driver_name}/moves")
-def get_driver_moves(
+async def get_driver_moves(
     driver_name: str,
+    request: Request,
+    response: Response,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: dict = Depends(verify_user)
 ):
-    """Get moves assigned to specific driver"""
-    conn = get_db()
-    cursor = conn.cursor()
+    """Get moves assigned to specific driver, latest pickup first (paged)"""
+    if await check_etag(request, response, "moves"):
+        return not_modified(response)
     
-    cursor.execute(
-        "SELECT * FROM moves WHERE driver_name = ? ORDER BY pickup_date DESC",
-        (driver_name,)
+    moves, next_cursor = await read_page(
+        "moves", "pickup_date", {"driver_name": driver_name}, limit, cursor, fields
     )
-    moves = [dict(row) for row in cursor.fetchall()]
-    conn.close()
     
     return {
         "driver": driver_name,
         "count": len(moves),
-        "moves": moves
+        "moves": moves,
+        "next_cursor": next_cursor
     }
 
 # ===== ROOT ENDPOINT =====
 @app.get("/")
-def root():
+async def root():
     """API root endpoint with basic info"""
     return {
         "name": "Smith & Williams Trucking API",
@@ -513,7 +691,7 @@ def root():
 
 # ===== HEALTH CHECK =====
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
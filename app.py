@@ -14,15 +14,16 @@ import base64
 
 # Import PDF generators - Try universal first, then fall back
 try:
-    from src.services.universal_pdf_generator import generate_driver_receipt, generate_client_invoice, generate_status_report
+    from src.services.universal_pdf_generator import generate_driver_receipt, generate_client_invoice, generate_status_report, generate_payroll_batch
     PDF_AVAILABLE = True
 except ImportError:
     try:
-        from src.services.pdf_generator import generate_driver_receipt, generate_client_invoice, generate_status_report
+        from src.services.pdf_generator import generate_driver_receipt, generate_client_invoice, generate_status_report, generate_payroll_batch
         PDF_AVAILABLE = True
     except ImportError:
         try:
             from src.services.professional_pdf_generator import generate_status_report_for_profile
+            generate_payroll_batch = None
             def generate_driver_receipt(driver_name, from_date, to_date):
                 return generate_status_report_for_profile(driver_name, "driver")
             def generate_client_invoice(*args, **kwargs):
@@ -32,6 +33,7 @@ except ImportError:
             PDF_AVAILABLE = True
         except ImportError:
             PDF_AVAILABLE = False
+            generate_payroll_batch = None
             # Ultimate fallback - generate text reports
             def generate_driver_receipt(driver_name, from_date, to_date):
                 filename = f"driver_report_{driver_name}_{datetime.now().strftime('%Y%m%d')}.txt"
@@ -55,6 +57,11 @@ try:
 except ImportError:
     HELP_AVAILABLE = False
 
+from src.services.dashboard_stats import install_fleet_counters, read_fleet_stats
+from src.services import data_cache
+from src.services.db_indexes import apply_indexes
+from src.services.date_contract import day_range, ensure_date_contract
+
 try:
     from src.services.inventory_pdf_generator import generate_inventory_pdf
     INVENTORY_PDF_AVAILABLE = True
@@ -73,16 +80,11 @@ st.set_page_config(
 APP_VERSION = "4.0.0 - GLOBAL Driver Info Integration"
 UPDATE_TIMESTAMP = "2025-08-16 07:30:00"  # Force Streamlit to recognize update
 
-# Force cache clear on version change
-if 'app_version' not in st.session_state or st.session_state.app_version != APP_VERSION:
-    st.cache_data.clear()
-    st.cache_resource.clear()
+# Track the deployed version per session. Query results live in the
+# table-versioned data cache (src/services/data_cache.py), which refreshes
+# itself when a table changes, so there is no process-wide cache clear here.
+if st.session_state.get('app_version') != APP_VERSION:
     st.session_state.app_version = APP_VERSION
-    st.session_state.last_cache_clear = datetime.now()
-elif (datetime.now() - st.session_state.last_cache_clear).seconds > 3600:  # Clear every hour
-    st.cache_data.clear()
-    st.cache_resource.clear()
-    st.session_state.last_cache_clear = datetime.now()
 
 # Custom CSS - Applied Globally
 st.markdown("""
@@ -311,6 +313,13 @@ def init_database():
         details TEXT
     )''')
     
+    # ISO dates enforced on write, indexes for the hot filters, then
+    # dashboard counters and cache version triggers
+    ensure_date_contract(conn)
+    apply_indexes(conn)
+    install_fleet_counters(conn)
+    data_cache.install_version_tracking(conn, DB_PATH)
+    
     conn.commit()
     conn.close()
 
@@ -710,12 +719,9 @@ def show_sidebar():
         st.write(f"**Role:** {st.session_state.get('role', 'Unknown')}")
         st.caption(f"Version: {APP_VERSION}")
         
-        # Cache clear button
-        if st.button(" Clear Cache", use_container_width=True):
-            st.cache_data.clear()
-            st.cache_resource.clear()
-            st.success("Cache cleared!")
-            time.sleep(1)
+        # Refresh button - cached data is already current, so just rerun
+        # this session rather than clearing every user's cache
+        if st.button(" Refresh Data", use_container_width=True):
             st.rerun()
         
         st.divider()
@@ -771,99 +777,43 @@ def show_overview_metrics():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
-    # Get metrics
-    cursor.execute('SELECT COUNT(*) FROM moves WHERE status IN ("active", "assigned")')
-    active_moves = cursor.fetchone()[0]
+    # All KPIs come from the trigger-maintained fleet_counters table
+    stats = read_fleet_stats(conn)
+    
+    active_moves = stats.count('moves', status=['active', 'assigned'])
     
     # Get trailer counts - split by old and new (ALL trailers, not just available)
     # NEW TRAILERS (10 total): 190033, 190046, 18V00298, 7728, 190011, 190030, 18V00327, 18V00406, 18V00409, 18V00414
     # OLD TRAILERS (12 at FedEx): 7155, 7146, 5955, 6024, 6061, 3170, 7153, 6015, 7160, 6783, 3083, 6231
     # OLD TRAILERS (9 at Fleet): 7162, 7131, 5906, 7144, 6014, 6981, 5950, 5876, 4427
+    # Without an is_new column, trailers are classified by number pattern
+    # (NEW: 190xxx, 18Vxxxxx, 7728 / OLD: 4-digit 3xxx-7xxx) - see dashboard_stats
     trailer_columns = get_table_columns(cursor, 'trailers') if table_exists(cursor, 'trailers') else []
     
     if 'is_new' in trailer_columns:
         # Count ALL old trailers (is_new = 0) but exclude delivered ones for active count
-        cursor.execute('SELECT COUNT(*) FROM trailers WHERE is_new = 0 AND status != "delivered"')
-        old_trailers_total = cursor.fetchone()[0]
-        
-        # Count delivered old trailers separately  
-        cursor.execute('SELECT COUNT(*) FROM trailers WHERE is_new = 0 AND status = "delivered"')
-        old_delivered = cursor.fetchone()[0]
+        old_trailers_total = stats.count('trailers', is_new=0, exclude_status='delivered')
         
-        # Count ALL new trailers (is_new = 1) - available, in_transit, delivered, etc.
-        cursor.execute('SELECT COUNT(*) FROM trailers WHERE is_new = 1')
-        new_trailers_total = cursor.fetchone()[0]
-        
-        # Count only AVAILABLE for operations
-        cursor.execute('SELECT COUNT(*) FROM trailers WHERE status = "available" AND is_new = 0')
-        old_available = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM trailers WHERE status = "available" AND is_new = 1')
-        new_available = cursor.fetchone()[0]
-        
-        total_trailers = old_trailers_total + new_trailers_total
+        # Count delivered old trailers separately
+        old_delivered = stats.count('trailers', is_new=0, status='delivered')
     else:
-        # If no is_new column, count ALL trailers by pattern
-        # Count ALL NEW trailers based on actual data patterns:
-        # NEW: 190xxx, 18Vxxxxx, or specific 7728
-        cursor.execute('''
-            SELECT COUNT(*) FROM trailers 
-            WHERE trailer_number LIKE '190%' 
-               OR trailer_number LIKE '18V%' 
-               OR trailer_number = '7728'
-        ''')
-        new_trailers_total = cursor.fetchone()[0]
-        
-        # Count ALL OLD trailers based on actual data patterns:
-        # OLD: 3xxx, 4xxx, 5xxx, 6xxx, 7xxx (except 7728)
-        cursor.execute('''
-            SELECT COUNT(*) FROM trailers 
-            WHERE (trailer_number LIKE '3%' AND LENGTH(trailer_number) = 4)
-               OR (trailer_number LIKE '4%' AND LENGTH(trailer_number) = 4)
-               OR (trailer_number LIKE '5%' AND LENGTH(trailer_number) = 4)
-               OR (trailer_number LIKE '6%' AND LENGTH(trailer_number) = 4)
-               OR (trailer_number LIKE '7%' AND LENGTH(trailer_number) = 4 AND trailer_number != '7728')
-        ''')
-        old_trailers_total = cursor.fetchone()[0]
-        
-        # Count available for operations
-        cursor.execute('''
-            SELECT COUNT(*) FROM trailers 
-            WHERE status = "available" 
-            AND (trailer_number LIKE '190%' 
-                 OR trailer_number LIKE '18V%' 
-                 OR trailer_number = '7728')
-        ''')
-        new_available = cursor.fetchone()[0]
-        
-        cursor.execute('''
-            SELECT COUNT(*) FROM trailers 
-            WHERE status = "available" 
-            AND ((trailer_number LIKE '3%' AND LENGTH(trailer_number) = 4)
-                 OR (trailer_number LIKE '4%' AND LENGTH(trailer_number) = 4)
-                 OR (trailer_number LIKE '5%' AND LENGTH(trailer_number) = 4)
-                 OR (trailer_number LIKE '6%' AND LENGTH(trailer_number) = 4)
-                 OR (trailer_number LIKE '7%' AND LENGTH(trailer_number) = 4 AND trailer_number != '7728'))
-        ''')
-        old_available = cursor.fetchone()[0]
-        
-        total_trailers = old_trailers_total + new_trailers_total
+        old_trailers_total = stats.count('trailers', is_new=0)
     
-    cursor.execute('SELECT COUNT(*) FROM drivers WHERE status = "active"')
-    active_drivers = cursor.fetchone()[0]
+    # Count ALL new trailers - available, in_transit, delivered, etc.
+    new_trailers_total = stats.count('trailers', is_new=1)
     
-    cursor.execute('''
-        SELECT COALESCE(SUM(estimated_earnings), 0) FROM moves 
-        WHERE date(move_date) >= date('now', 'start of month')
-    ''')
-    monthly_revenue = cursor.fetchone()[0]
+    # Count only AVAILABLE for operations
+    old_available = stats.count('trailers', is_new=0, status='available')
+    new_available = stats.count('trailers', is_new=1, status='available')
+    
+    total_trailers = old_trailers_total + new_trailers_total
+    
+    active_drivers = stats.count('drivers', status='active')
+    
+    monthly_revenue = stats.amount('moves', period_from=datetime.now().strftime('%Y-%m'))
     
     # Calculate total earnings and factoring
-    cursor.execute('''
-        SELECT COALESCE(SUM(estimated_earnings), 0) FROM moves 
-        WHERE status = 'completed'
-    ''')
-    total_earnings = cursor.fetchone()[0]
+    total_earnings = stats.amount('moves', status='completed')
     factoring_fee = total_earnings * 0.03
     after_factoring = total_earnings - factoring_fee
     
@@ -3006,6 +2956,7 @@ def admin_panel():
         
         with col3:
             if st.button("🧹 Clear All Cache"):
+                data_cache.cache.invalidate()
                 st.cache_data.clear()
                 st.cache_resource.clear()
                 st.success("Cache cleared!")
@@ -3252,6 +3203,36 @@ def show_dashboard():
                                 )
                         except Exception as e:
                             st.error(f"Error generating receipt: {str(e)}")
+                    
+                    if generate_payroll_batch:
+                        st.markdown("#### Payroll Batch - All Drivers")
+                        batch_format = st.radio("Output", ["ZIP (one PDF per driver)", "Single merged PDF"],
+                                                horizontal=True, key="payroll_batch_format")
+                        if st.button("Generate All Receipts for Period"):
+                            try:
+                                with st.spinner("Generating receipts..."):
+                                    batch = generate_payroll_batch(
+                                        receipt_from, receipt_to,
+                                        output='pdf' if batch_format.startswith("Single") else 'zip'
+                                    )
+                                st.success(f"{len(batch['drivers'])} receipts generated in {batch['seconds']:.1f}s: {os.path.basename(batch['filename'])}")
+                                st.dataframe(
+                                    pd.DataFrame([
+                                        {'Driver': d['driver'], 'Moves': d['moves'],
+                                         'Gross': f"${d['gross']:,.2f}", 'Render (s)': round(d['seconds'], 2)}
+                                        for d in batch['drivers']
+                                    ]),
+                                    use_container_width=True, hide_index=True
+                                )
+                                with open(batch['filename'], "rb") as batch_file:
+                                    st.download_button(
+                                        label="Download Payroll Batch",
+                                        data=batch_file.read(),
+                                        file_name=os.path.basename(batch['filename']),
+                                        mime="application/pdf" if batch['filename'].endswith('.pdf') else "application/zip"
+                                    )
+                            except Exception as e:
+                                st.error(f"Error generating payroll batch: {str(e)}")
                 
                 with report_tabs[1]:
                     st.markdown("### Generate Client Invoices")
@@ -4044,7 +4025,7 @@ def show_dashboard():
             cursor.execute("""
                 SELECT COUNT(*) FROM moves 
                 WHERE status = 'completed' 
-                AND date(move_date) >= date('now', 'start of month')
+                AND move_date >= date('now', 'start of month')
             """)
             monthly_completed = cursor.fetchone()[0]
             
@@ -4102,7 +4083,7 @@ def show_dashboard():
             cursor.execute("""
                 SELECT date(move_date) as date, COUNT(*) as moves
                 FROM moves
-                WHERE date(move_date) >= date('now', '-30 days')
+                WHERE move_date >= date('now', '-30 days')
                 GROUP BY date(move_date)
                 ORDER BY date
             """)
@@ -4205,9 +4186,9 @@ def show_dashboard():
                        destination_location, estimated_miles
                 FROM moves
                 WHERE status = 'completed'
-                AND date(move_date) BETWEEN date(?) AND date(?)
+                AND move_date >= ? AND move_date < ?
                 ORDER BY move_date DESC
-            """, (from_date, to_date))
+            """, day_range(from_date, to_date))
             
             completed_moves = cursor.fetchall()
             
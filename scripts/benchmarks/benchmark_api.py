@@ -0,0 +1,228 @@
+"""
+Benchmark: API data path, connect-per-request vs pooled async database
+Simulates polling clients (locust-style weighted tasks: mostly /api/moves,
+some /api/dashboard/stats) for a fixed duration and reports requests/sec.
+
+Usage:
+    python scripts/benchmarks/benchmark_api.py [--users 50] [--duration 10] [--rows 20000]
+    python scripts/benchmarks/benchmark_api.py --url http://old:8000 --url http://new:8001 \\
+        --username admin --password secret
+
+The default mode runs both data paths in-process against a synthetic
+database, so it needs no server. With --url it drives running API servers
+over HTTP (requires httpx), e.g. the previous build and this one side by side.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from src.services.async_db import AsyncDatabase
+from src.services.connection_pool import DEFAULT_PRAGMAS
+from src.services.dashboard_stats import install_fleet_counters, read_fleet_stats
+
+# (weight, task name) - the VB.NET client mostly polls the move list
+TASKS = [(6, 'moves'), (2, 'moves_by_status'), (2, 'dashboard')]
+
+# Starlette runs sync endpoints on a 40-thread pool
+LEGACY_THREADS = 40
+
+STATUSES = ['pending', 'assigned', 'in_progress', 'completed']
+
+
+def make_database(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("""
+        CREATE TABLE moves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_number TEXT UNIQUE,
+            customer_name TEXT,
+            driver_name TEXT,
+            status TEXT,
+            amount REAL,
+            pickup_date TEXT,
+            created_at TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE TABLE trailer_inventory (id INTEGER PRIMARY KEY, trailer_number TEXT, status TEXT)")
+    conn.executemany(
+        "INSERT INTO moves (order_number, customer_name, driver_name, status, amount, pickup_date, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (f"ORD{i:07d}", f"Customer {i % 30}", f"Driver {i % 40}", STATUSES[i % 4],
+             100 + i % 900, f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}", f"2024-01-01 00:00:{i:07d}")
+            for i in range(rows)
+        ]
+    )
+    conn.executemany(
+        "INSERT INTO trailer_inventory (trailer_number, status) VALUES (?, ?)",
+        [(f"T{i:05d}", 'available' if i % 3 else 'in_use') for i in range(rows // 10)]
+    )
+    conn.execute("CREATE INDEX idx_moves_created ON moves (created_at)")
+    conn.execute("CREATE INDEX idx_moves_status_created ON moves (status, created_at)")
+    install_fleet_counters(conn)
+    conn.commit()
+    conn.close()
+
+
+def pick_task():
+    return random.choices([name for _, name in TASKS], weights=[w for w, _ in TASKS])[0]
+
+
+# The previous /api/dashboard/stats: one COUNT query per metric
+LEGACY_DASHBOARD_QUERIES = [
+    "SELECT COUNT(*) FROM moves WHERE status = 'pending'",
+    "SELECT COUNT(*) FROM moves WHERE status = 'in_progress'",
+    "SELECT COUNT(*) FROM moves WHERE status = 'completed'",
+    "SELECT COUNT(*) FROM trailer_inventory WHERE status = 'available'",
+    "SELECT COUNT(*) FROM trailer_inventory WHERE status = 'in_use'",
+    "SELECT COUNT(DISTINCT driver_name) FROM moves WHERE driver_name IS NOT NULL",
+]
+
+
+# ----- previous implementation: new connection + sqlite3.Row per request -----
+
+def legacy_request(path, task):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    if task == 'moves':
+        cursor.execute("SELECT * FROM moves WHERE 1=1 ORDER BY created_at DESC LIMIT ?", (100,))
+        result = [dict(row) for row in cursor.fetchall()]
+    elif task == 'moves_by_status':
+        cursor.execute("SELECT * FROM moves WHERE 1=1 AND status = ? ORDER BY created_at DESC LIMIT ?",
+                       (random.choice(STATUSES), 100))
+        result = [dict(row) for row in cursor.fetchall()]
+    else:
+        result = []
+        for query in LEGACY_DASHBOARD_QUERIES:
+            cursor.execute(query)
+            result.append(cursor.fetchone()[0])
+    conn.close()
+    return result
+
+
+# ----- current implementation: AsyncDatabase -----
+
+async def async_request(database, task):
+    if task == 'moves':
+        return await database.fetch_all("SELECT * FROM moves WHERE 1=1 ORDER BY created_at DESC LIMIT ?", (100,))
+    if task == 'moves_by_status':
+        return await database.fetch_all(
+            "SELECT * FROM moves WHERE 1=1 AND status = ? ORDER BY created_at DESC LIMIT ?",
+            (random.choice(STATUSES), 100)
+        )
+    stats = await database.run_read(read_fleet_stats)
+    drivers = await database.fetch_value(
+        "SELECT COUNT(DISTINCT driver_name) FROM moves WHERE driver_name IS NOT NULL"
+    )
+    return [
+        stats.count('moves', status='pending'),
+        stats.count('moves', status='in_progress'),
+        stats.count('moves', status='completed'),
+        stats.count('trailer_inventory', status='available'),
+        stats.count('trailer_inventory', status='in_use'),
+        drivers,
+    ]
+
+
+async def drive(label, request, users, duration):
+    """Run `users` concurrent clients looping over weighted tasks"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def user():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await request(pick_task())
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[user() for _ in range(users)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    rate = len(latencies) / elapsed
+    print(f"{label:<14} {len(latencies):>8} req  {rate:9.0f} req/s  p50 {p50:7.1f}ms  p95 {p95:7.1f}ms")
+    return rate
+
+
+async def run_in_process(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'api_bench.db')
+        make_database(path, args.rows)
+
+        loop = asyncio.get_running_loop()
+        threads = ThreadPoolExecutor(LEGACY_THREADS)
+        before = await drive(
+            'connect/req',
+            lambda task: loop.run_in_executor(threads, legacy_request, path, task),
+            args.users, args.duration
+        )
+        threads.shutdown()
+
+        database = AsyncDatabase(path, pragmas=DEFAULT_PRAGMAS)
+        await database.open()
+        try:
+            if legacy_request(path, 'dashboard') != await async_request(database, 'dashboard'):
+                print("warning: dashboard stats differ between the two paths")
+            after = await drive(
+                'async pool',
+                lambda task: async_request(database, task),
+                args.users, args.duration
+            )
+        finally:
+            await database.close()
+
+    print(f"speedup: {after / before:.1f}x")
+
+
+async def run_http(args):
+    import httpx
+
+    paths = {
+        'moves': lambda: '/api/moves',
+        'moves_by_status': lambda: f"/api/moves?status={random.choice(STATUSES)}",
+        'dashboard': lambda: '/api/dashboard/stats',
+    }
+    for url in args.url:
+        limits = httpx.Limits(max_connections=args.users)
+        async with httpx.AsyncClient(base_url=url, auth=(args.username, args.password),
+                                     limits=limits, timeout=30) as client:
+            async def request(task):
+                response = await client.get(paths[task]())
+                response.raise_for_status()
+            await drive(url, request, args.users, args.duration)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--url', action='append')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='')
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run_http(args))
+    else:
+        asyncio.run(run_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
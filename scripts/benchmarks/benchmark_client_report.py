@@ -0,0 +1,180 @@
+"""
+Benchmark: per-section queries vs the consolidated client report loader
+The "before" column runs the queries the client update report used to issue
+(one connection and query per section, with a correlated COUNT(*) for the
+status percentages); "after" is load_client_report_data, which computes the
+summary, status and financial sections from one grouped pass and reads the
+three tables in one UNION ALL. Section results are compared.
+
+Usage: python scripts/benchmarks/benchmark_client_report.py [--rows 50000] [--repeat 5]
+"""
+
+import argparse
+import math
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [os.path.join(ROOT, 'src', 'services'), os.path.join(ROOT, 'src', 'utils')]
+
+from pdf_report_generator import PDFReportGenerator, load_client_report_data
+
+STATUSES = ['pending', 'in_progress', 'completed', 'cancelled']
+CITIES = [('Atlanta', 'GA'), ('Miami', 'FL'), ('Dallas', 'TX'), ('Houston', 'TX'),
+          ('Chicago', 'IL'), ('Detroit', 'MI'), ('Phoenix', 'AZ'), ('Denver', 'CO')]
+
+OLD_QUERIES = {
+    'summary': [
+        "SELECT COUNT(*) FROM moves WHERE status = 'completed'",
+        "SELECT COUNT(*) FROM moves WHERE status = 'in_progress'",
+        "SELECT COUNT(*) FROM moves WHERE status = 'pending'",
+        "SELECT AVG(JULIANDAY(actual_delivery) - JULIANDAY(pickup_date)) FROM moves "
+        "WHERE status = 'completed' AND actual_delivery IS NOT NULL",
+    ],
+    'status_overview': """
+        SELECT status, COUNT(*) as count,
+               ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM moves), 1) as percentage
+        FROM moves GROUP BY status
+    """,
+    'active': """
+        SELECT order_number, origin_city || ', ' || origin_state as origin,
+               destination_city || ', ' || destination_state as destination,
+               driver_name, pickup_date, delivery_date,
+               ROUND(JULIANDAY(delivery_date) - JULIANDAY('now')) as days_remaining
+        FROM moves WHERE status = 'in_progress' ORDER BY delivery_date LIMIT 10
+    """,
+    'pending': """
+        SELECT order_number, origin_city || ', ' || origin_state as origin,
+               destination_city || ', ' || destination_state as destination,
+               pickup_date, delivery_date, customer_name,
+               ROUND(JULIANDAY(pickup_date) - JULIANDAY('now')) as days_until_pickup
+        FROM moves WHERE status = 'pending' ORDER BY pickup_date LIMIT 10
+    """,
+    'completed': """
+        SELECT order_number, origin_city || ', ' || origin_state as origin,
+               destination_city || ', ' || destination_state as destination,
+               driver_name, actual_delivery, payment_status, amount
+        FROM moves WHERE status = 'completed' ORDER BY actual_delivery DESC LIMIT 10
+    """,
+    'financials': [
+        "SELECT SUM(amount) FROM moves WHERE status = 'completed' AND payment_status = 'paid'",
+        "SELECT SUM(amount) FROM moves WHERE status = 'completed' AND payment_status = 'pending'",
+        "SELECT SUM(amount) FROM moves WHERE status IN ('in_progress', 'pending')",
+    ],
+}
+
+
+def build_database(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE moves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_number TEXT, customer_name TEXT,
+            origin_city TEXT, origin_state TEXT, destination_city TEXT, destination_state TEXT,
+            driver_name TEXT, status TEXT, amount REAL, payment_status TEXT,
+            pickup_date TIMESTAMP, delivery_date TIMESTAMP, actual_delivery TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    rng = random.Random(7)
+    now = datetime.now()
+    batch = []
+    for i in range(rows):
+        status = rng.choice(STATUSES)
+        pickup = now + timedelta(minutes=rng.randrange(-90 * 24 * 60, 30 * 24 * 60))
+        delivery = pickup + timedelta(days=rng.randint(1, 5))
+        origin, destination = rng.sample(CITIES, 2)
+        batch.append((
+            f"ORD-{i:06d}", f"Customer {i % 25}", *origin, *destination,
+            f"Driver {i % 40}", status, round(rng.uniform(800, 2500), 2),
+            rng.choice(['paid', 'pending', None]),
+            pickup.strftime('%Y-%m-%d %H:%M:%S'), delivery.strftime('%Y-%m-%d %H:%M:%S'),
+            delivery.strftime('%Y-%m-%d %H:%M:%S') if status == 'completed' and rng.random() < 0.9 else None,
+        ))
+    conn.executemany("""
+        INSERT INTO moves (order_number, customer_name, origin_city, origin_state, destination_city,
+                           destination_state, driver_name, status, amount, payment_status,
+                           pickup_date, delivery_date, actual_delivery)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, batch)
+    conn.execute("CREATE INDEX idx_moves_status ON moves(status)")
+    conn.commit()
+    conn.close()
+
+
+def old_sections(db_path):
+    """The previous report's reads: a connection and query per section"""
+    sections = {}
+    for name, sql in OLD_QUERIES.items():
+        conn = sqlite3.connect(db_path)
+        if isinstance(sql, list):
+            sections[name] = [conn.execute(q).fetchone()[0] or 0 for q in sql]
+        else:
+            sections[name] = pd.read_sql_query(sql, conn)
+        conn.close()
+    return sections
+
+
+def compare(old, new):
+    """Descriptions of the sections whose contents differ"""
+    problems = []
+    counts = new['status_counts']
+    expected = [counts.get('completed', 0), counts.get('in_progress', 0), counts.get('pending', 0)]
+    if old['summary'][:3] != expected or not math.isclose(old['summary'][3], new['avg_delivery_days'], rel_tol=1e-6):
+        problems.append('summary')
+    before = old['status_overview'].set_index('status')
+    after = new['status_overview'].set_index('status')
+    if not before[['count', 'percentage']].equals(after.loc[before.index, ['count', 'percentage']].astype(before.dtypes)):
+        problems.append('status_overview')
+    for name in ('active', 'pending', 'completed'):
+        key = old[name].columns[0]
+        if list(old[name][key]) != list(new[name][key]):
+            problems.append(name)
+    financials = [new['financials'][k] for k in ('paid', 'pending', 'projected')]
+    if not all(math.isclose(a, b, rel_tol=1e-9) for a, b in zip(old['financials'], financials)):
+        problems.append('financials')
+    return problems
+
+
+def best_of(repeat, fn, *args):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'moves.db')
+        build_database(db_path, args.rows)
+
+        before, old = best_of(args.repeat, old_sections, db_path)
+        after, new = best_of(args.repeat, load_client_report_data, None, db_path)
+        problems = compare(old, new)
+
+        print(f"{args.rows} moves")
+        print(f"  per-section queries: {before * 1000:8.1f} ms")
+        print(f"  report loader:       {after * 1000:8.1f} ms  ({before / after:.1f}x)")
+        print(f"  sections differ: {', '.join(problems)}" if problems else "  all sections match")
+
+        started = time.perf_counter()
+        pdf = PDFReportGenerator().generate_client_update_report("Benchmark Client", db_path=db_path).getvalue()
+        print(f"  full report render:  {(time.perf_counter() - started) * 1000:8.1f} ms, {len(pdf) // 1024} KB")
+
+
+if __name__ == "__main__":
+    main()
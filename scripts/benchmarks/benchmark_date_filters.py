@@ -0,0 +1,150 @@
+"""
+Benchmark: date()/julianday() predicates vs ISO range predicates on moves
+Both query sets run against the same indexed database of synthetic moves;
+only the predicate differs. The old forms wrap the column in a function, so
+SQLite scans the table; the new forms compare the bare ISO text column and
+use an index range scan.
+
+Usage: python scripts/benchmarks/benchmark_date_filters.py [--rows 100000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from src.services.date_contract import day_range, ensure_date_contract
+from src.services.db_indexes import apply_indexes, explain
+
+STATUSES = ['pending', 'assigned', 'in_progress', 'completed', 'paid']
+DRIVERS = [f"Driver {i}" for i in range(40)]
+
+# Receipt / invoice period used by the range queries
+PERIOD_FROM = date(2025, 6, 1)
+PERIOD_TO = date(2025, 6, 15)
+
+
+def cases():
+    """(label, old SQL, old params, new SQL, new params)"""
+    first, after_last = day_range(PERIOD_FROM, PERIOD_TO)
+    return [
+        ('payroll receipts (2 weeks, all drivers)',
+         "SELECT * FROM moves WHERE date(move_date) >= date(?) AND date(move_date) <= date(?)",
+         (PERIOD_FROM, PERIOD_TO),
+         "SELECT * FROM moves WHERE move_date >= ? AND move_date < ?",
+         (first, after_last)),
+        ('one driver receipt',
+         "SELECT * FROM moves WHERE date(move_date) >= date(?) AND date(move_date) <= date(?) AND driver_name IN (?)",
+         (PERIOD_FROM, PERIOD_TO, 'Driver 7'),
+         "SELECT * FROM moves WHERE move_date >= ? AND move_date < ? AND driver_name IN (?)",
+         (first, after_last, 'Driver 7')),
+        ('driver invoice (completed_date)',
+         "SELECT * FROM moves WHERE driver_name = ? AND DATE(completed_date) BETWEEN ? AND ?",
+         ('Driver 7', PERIOD_FROM, PERIOD_TO),
+         "SELECT * FROM moves WHERE driver_name = ? AND completed_date >= ? AND completed_date < ?",
+         ('Driver 7', first, after_last)),
+        ('completed in month',
+         "SELECT COUNT(*) FROM moves WHERE status = 'completed' AND date(move_date) >= date(?)",
+         ('2025-12-01',),
+         "SELECT COUNT(*) FROM moves WHERE status = 'completed' AND move_date >= ?",
+         ('2025-12-01',)),
+        ('archive candidates (> 90 days)',
+         "SELECT id FROM moves WHERE julianday(?) - julianday(created_at) > ?",
+         ('2026-01-01 00:00:00', 90),
+         "SELECT id FROM moves WHERE created_at < datetime(?, ?)",
+         ('2026-01-01 00:00:00', '-90 days')),
+    ]
+
+
+def build_database(path, rows, contract=True):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE moves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            system_id TEXT,
+            driver_name TEXT,
+            status TEXT,
+            move_date DATE,
+            pickup_date DATE,
+            completed_date DATE,
+            new_trailer TEXT,
+            old_trailer TEXT,
+            estimated_miles REAL,
+            estimated_earnings REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    if contract:
+        ensure_date_contract(conn)
+
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    batch = []
+    for i in range(rows):
+        moved = start + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        status = rng.choice(STATUSES)
+        batch.append((
+            f"MOVE-{i:06d}", rng.choice(DRIVERS), status,
+            moved.date().isoformat(), moved.date().isoformat(),
+            (moved + timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S') if status in ('completed', 'paid') else None,
+            f"NT{i:06d}", f"OT{i:06d}", rng.uniform(20, 400), rng.uniform(100, 900),
+            (moved - timedelta(days=2)).strftime('%Y-%m-%d %H:%M:%S'),
+        ))
+
+    started = time.perf_counter()
+    conn.executemany("""
+        INSERT INTO moves (system_id, driver_name, status, move_date, pickup_date, completed_date,
+                           new_trailer, old_trailer, estimated_miles, estimated_earnings, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, batch)
+    conn.commit()
+    insert_seconds = time.perf_counter() - started
+
+    apply_indexes(conn)
+    return conn, insert_seconds
+
+
+def timed(conn, sql, params, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, plain_seconds = build_database(os.path.join(tmp, 'plain.db'), args.rows, contract=False)
+        plain.close()
+        conn, insert_seconds = build_database(os.path.join(tmp, 'moves.db'), args.rows)
+        print(f"{args.rows} moves inserted in {plain_seconds:.2f}s without / "
+              f"{insert_seconds:.2f}s with the ISO date triggers\n")
+        print(f"{'query':<42} {'rows':>6} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+
+        for label, old_sql, old_params, new_sql, new_params in cases():
+            before, old_rows = timed(conn, old_sql, old_params, args.repeat)
+            after, new_rows = timed(conn, new_sql, new_params, args.repeat)
+            if sorted(old_rows) != sorted(new_rows):
+                print(f"  MISMATCH for {label}: {len(old_rows)} vs {len(new_rows)} rows")
+            print(f"{label:<42} {len(new_rows):>6} {before * 1000:>10.2f} {after * 1000:>10.2f} {before / after:>7.1f}x")
+            print(f"    before: {' | '.join(explain(conn, old_sql))}")
+            print(f"    after:  {' | '.join(explain(conn, new_sql))}")
+
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark: per-row vs batched trailer move import
+Usage: python scripts/benchmarks/benchmark_move_import.py [rows]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [os.path.join(ROOT, 'src', 'services'), os.path.join(ROOT, 'src', 'utils')]
+
+import pandas as pd
+import database as db
+import data_import
+import utils
+
+# Spreadsheet columns that are not part of the base moves schema
+IMPORT_COLUMNS = {
+    'destination': 'TEXT', 'old_pickup': 'TEXT', 'old_destination': 'TEXT',
+    'assigned_driver': 'TEXT', 'date_assigned': 'TEXT', 'completion_date': 'TEXT',
+    'received_ppw': 'BOOLEAN', 'processed': 'BOOLEAN', 'paid': 'BOOLEAN',
+    'miles': 'REAL', 'rate': 'REAL', 'factor_fee': 'REAL', 'load_pay': 'REAL',
+    'comments': 'TEXT'
+}
+
+def make_sheet(rows):
+    """Build a synthetic 'Trailer Move Tracker' sheet"""
+    return pd.DataFrame({
+        'New Trailer': [f"NT{i:06d}" for i in range(rows)],
+        'Pickup Location': ['Fleet Memphis'] * rows,
+        'Destination': [f"FedEx Hub {i % 25}" for i in range(rows)],
+        'Old Trailer': [f"OT{i:06d}" for i in range(rows)],
+        'Assigned Driver': [f"Driver {i % 40}" for i in range(rows)],
+        'Date Assigned': pd.date_range('2024-01-01', periods=rows, freq='h'),
+        'Paid': [i % 3 == 0 for i in range(rows)],
+        'Miles': [50 + (i % 400) for i in range(rows)],
+        'Rate': [2.10] * rows,
+        'Comments': ['historical import'] * rows,
+    })
+
+def fresh_database(path):
+    """Point database.py at an empty database file"""
+    db.DB_FILE = path
+    db.init_database()
+    conn = db.get_connection()
+    for column, column_type in IMPORT_COLUMNS.items():
+        conn.execute(f"ALTER TABLE moves ADD COLUMN {column} {column_type}")
+    conn.commit()
+    conn.close()
+
+def legacy_add_trailer_move(move_data):
+    """The original database.add_trailer_move, before pooling and shared-transaction logging
+
+    A fresh connection and commit for the move, then log_activity's own
+    connection and commit. The original logged before committing the move,
+    which blocks the second connection for the full busy timeout on every
+    row; logging right after the commit keeps the baseline runnable and
+    makes it a lower bound on the old cost.
+    """
+    conn = sqlite3.connect(db.DB_FILE, check_same_thread=False, timeout=10.0)
+    cursor = conn.cursor()
+    columns = ', '.join(move_data.keys())
+    placeholders = ', '.join(['?' for _ in move_data])
+    cursor.execute(f"INSERT INTO moves ({columns}) VALUES ({placeholders})", list(move_data.values()))
+    move_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+
+    conn = sqlite3.connect(db.DB_FILE, check_same_thread=False, timeout=10.0)
+    conn.execute("""
+        INSERT INTO activity_log (action, entity_type, entity_id, user, details)
+        VALUES (?, ?, ?, ?, ?)
+    """, ('create_move', 'move', move_id, move_data.get('created_by', 'system'), None))
+    conn.commit()
+    conn.close()
+    return move_id
+
+def legacy_import(df):
+    """The previous implementation: coerce in Python, one insert+commit per row"""
+    df = df.rename(columns={k: v for k, v in data_import.MOVE_COLUMN_MAPPINGS.items() if k in df.columns})
+    df = utils.clean_excel_data(df)
+    count = 0
+    for _, row in df.iterrows():
+        move_data = {}
+        for field in data_import.MOVE_FIELDS:
+            if field in row:
+                value = row[field]
+                if field in data_import.MOVE_DATE_FIELDS:
+                    value = value.strftime('%Y-%m-%d') if pd.notna(value) else None
+                elif field in data_import.MOVE_BOOL_FIELDS:
+                    value = bool(value) if pd.notna(value) else False
+                elif field in data_import.MOVE_NUMERIC_FIELDS:
+                    value = float(value) if pd.notna(value) else None
+                else:
+                    value = str(value) if pd.notna(value) else ''
+                if value is not None and value != '':
+                    move_data[field] = value
+        if 'miles' in move_data and 'load_pay' not in move_data:
+            move_data['load_pay'] = utils.calculate_load_pay(
+                move_data['miles'], move_data.get('rate', 2.10), move_data.get('factor_fee', 0.03)
+            )
+        legacy_add_trailer_move(move_data)
+        count += 1
+    return count
+
+def run(label, import_func, df, path):
+    fresh_database(path)
+    start = time.perf_counter()
+    count = import_func(df)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {count:>7} rows  {elapsed:8.2f}s  {count / elapsed:10.0f} rows/s")
+    return elapsed
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    df = make_sheet(rows)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        before = run('per-row', legacy_import, df, os.path.join(tmp, 'before.db'))
+        after = run('batched', data_import.import_trailer_moves, df, os.path.join(tmp, 'after.db'))
+    
+    print(f"speedup: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Local stand-in for the Google Distance Matrix and Geocoding APIs
+Answers /maps/api/distancematrix/json with deterministic distances (enforcing
+the real per-request limits) and /maps/api/geocode/json with deterministic
+coordinates, so the mileage and geocoding code can be exercised without an
+API key or network access.
+
+Usage:
+    python scripts/dev/distance_matrix_stub.py [--port 8765]
+    SWT_DISTANCE_MATRIX_URL=http://127.0.0.1:8765 SWT_GEOCODE_URL=http://127.0.0.1:8765 \
+        GOOGLE_MAPS_API_KEY=stub streamlit run app.py
+
+"lat,lng" places are measured great-circle x 1.2; other addresses are hashed
+to a fixed point in the continental US. Places containing "nowhere" return
+NOT_FOUND (ZERO_RESULTS when geocoded).
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MAX_ORIGINS = 25
+MAX_DESTINATIONS = 25
+MAX_ELEMENTS = 100
+
+ROAD_FACTOR = 1.2
+AVERAGE_SPEED_MPS = 26.8  # ~60 mph
+
+
+def place_point(place):
+    try:
+        lat, lng = (float(part) for part in place.split(','))
+        return lat, lng
+    except ValueError:
+        digest = hashlib.sha256(place.lower().encode()).digest()
+        return 30 + digest[0] / 255 * 17, -120 + digest[1] / 255 * 45
+
+
+def road_meters(origin, destination):
+    (lat1, lng1), (lat2, lng2) = place_point(origin), place_point(destination)
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+    return int(6371000 * 2 * math.asin(math.sqrt(a)) * ROAD_FACTOR)
+
+
+def element(origin, destination):
+    if 'nowhere' in origin.lower() or 'nowhere' in destination.lower():
+        return {'status': 'NOT_FOUND'}
+    meters = road_meters(origin, destination)
+    seconds = int(meters / AVERAGE_SPEED_MPS)
+    return {
+        'status': 'OK',
+        'distance': {'value': meters, 'text': f"{meters * 0.000621371:,.0f} mi"},
+        'duration': {'value': seconds, 'text': f"{seconds // 3600} hours {seconds % 3600 // 60} mins"},
+    }
+
+
+def distance_matrix(query):
+    """Response body for a parsed query string"""
+    if not query.get('key'):
+        return {'status': 'REQUEST_DENIED', 'rows': []}
+    origins = query.get('origins', [''])[0].split('|')
+    destinations = query.get('destinations', [''])[0].split('|')
+    if not all(origins) or not all(destinations):
+        return {'status': 'INVALID_REQUEST', 'rows': []}
+    if len(origins) > MAX_ORIGINS or len(destinations) > MAX_DESTINATIONS:
+        return {'status': 'MAX_DIMENSIONS_EXCEEDED', 'rows': []}
+    if len(origins) * len(destinations) > MAX_ELEMENTS:
+        return {'status': 'MAX_ELEMENTS_EXCEEDED', 'rows': []}
+    return {
+        'status': 'OK',
+        'origin_addresses': origins,
+        'destination_addresses': destinations,
+        'rows': [{'elements': [element(o, d) for d in destinations]} for o in origins],
+    }
+
+
+def geocode(query):
+    """Geocoding response body for a parsed query string"""
+    if not query.get('key'):
+        return {'status': 'REQUEST_DENIED', 'results': []}
+    address = query.get('address', [''])[0]
+    if not address:
+        return {'status': 'INVALID_REQUEST', 'results': []}
+    if 'nowhere' in address.lower():
+        return {'status': 'ZERO_RESULTS', 'results': []}
+    lat, lng = place_point(address)
+    return {
+        'status': 'OK',
+        'results': [{
+            'formatted_address': f"{address}, USA",
+            'geometry': {'location': {'lat': round(lat, 6), 'lng': round(lng, 6)}},
+        }],
+    }
+
+
+ROUTES = {
+    '/maps/api/distancematrix/json': distance_matrix,
+    '/maps/api/geocode/json': geocode,
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests_served = 0
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path not in ROUTES:
+            self.send_error(404)
+            return
+        with StubHandler._lock:
+            StubHandler.requests_served += 1
+        body = json.dumps(ROUTES[url.path](parse_qs(url.query))).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(port=0):
+    """Serve in a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), StubHandler)
+    print(f"Maps API stub on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{StubHandler.requests_served} requests served")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Query plan audit for Smith & Williams Trucking databases
+Runs EXPLAIN QUERY PLAN over the registry of hot queries and exits non-zero
+if any of them falls back to a full table scan.
+
+Usage: python scripts/maintenance/check_query_plans.py [--apply] [db_file ...]
+"""
+
+import os
+import sqlite3
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from src.services.db_indexes import apply_indexes, audit_query_plans
+
+DEFAULT_DATABASES = ['smith_williams_trucking.db', 'trailer_tracker_streamlined.db']
+
+def check_database(db_file, apply=False):
+    """Audit one database file; returns True when no hot query scans a table"""
+    conn = sqlite3.connect(db_file)
+    try:
+        if apply:
+            created = apply_indexes(conn)
+            if created:
+                print(f"  created: {', '.join(created)}")
+        
+        failures, skipped = audit_query_plans(conn)
+        
+        for label, reason in skipped:
+            print(f"  skip  {label}: {reason}")
+        for label, plan in failures:
+            print(f"  SCAN  {label}")
+            for line in plan:
+                print(f"          {line}")
+        
+        return not failures
+    finally:
+        conn.close()
+
+def main(argv):
+    apply = '--apply' in argv
+    databases = [a for a in argv if not a.startswith('--')] or DEFAULT_DATABASES
+    
+    ok = True
+    for db_file in databases:
+        if not os.path.exists(db_file):
+            print(f"{db_file}: not found, skipped")
+            continue
+        print(f"{db_file}:")
+        if check_database(db_file, apply):
+            print("  all hot queries use an index")
+        else:
+            ok = False
+    
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
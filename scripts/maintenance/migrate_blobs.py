@@ -0,0 +1,75 @@
+"""
+Move document and photo BLOBs out of SQLite into the content-addressed blob store
+Rows keep a blob_sha256 reference; the inline BLOB column is cleared.
+Afterwards, old and superseded report job output is released and stored files
+that no blobs row refers to any more are swept.
+
+Usage: python scripts/maintenance/migrate_blobs.py [db_file] [--no-vacuum]
+"""
+
+import os
+import sqlite3
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'src', 'services')]
+
+from src.services.blob_store import migrate_table_blobs, sweep_orphan_blobs
+
+try:
+    from report_jobs import prune_report_jobs
+    REPORT_JOBS_AVAILABLE = True
+except ImportError:
+    # report_jobs needs streamlit; without it there are no report jobs to prune
+    REPORT_JOBS_AVAILABLE = False
+
+DEFAULT_DATABASE = 'trailer_tracker_streamlined.db'
+
+# (table, inline BLOB column)
+BLOB_TABLES = [
+    ('factoring_documents', 'file_data'),
+    ('move_documents', 'file_data'),
+    ('driver_photos', 'photo_data'),
+]
+
+def migrate(db_file, vacuum=True):
+    """Migrate every known BLOB table; returns {table: rows migrated}"""
+    conn = sqlite3.connect(db_file)
+    results = {}
+    
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = {row[0] for row in cursor.fetchall()}
+        
+        for table, data_column in BLOB_TABLES:
+            if table not in tables:
+                continue
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+            if data_column not in columns:
+                print(f"{table}: no {data_column} column, skipped")
+                continue
+            results[table] = migrate_table_blobs(conn, table, data_column)
+            print(f"{table}: {results[table]} rows moved to blob store")
+        
+        if REPORT_JOBS_AVAILABLE and 'report_jobs' in tables:
+            pruned = prune_report_jobs(conn)
+            print(f"report_jobs: {pruned} old or superseded jobs pruned")
+        
+        swept = sweep_orphan_blobs(conn)
+        conn.commit()
+        if swept:
+            print(f"Removed {swept} unreferenced files from the blob store")
+        
+        if vacuum and any(results.values()):
+            # Reclaim the pages the BLOBs occupied
+            print("Vacuuming database...")
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    
+    return results
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    migrate(args[0] if args else DEFAULT_DATABASE, vacuum='--no-vacuum' not in sys.argv)
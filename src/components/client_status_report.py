@@ -5,7 +5,6 @@ Smith & Williams Trucking
 """
 
 import io
-import os
 from datetime import datetime, timedelta, date
 import sqlite3
 import base64
@@ -19,10 +18,12 @@ def generate_client_status_report(client_name=None):
         from reportlab.lib import colors
         from reportlab.lib.pagesizes import letter
         from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
         from reportlab.lib.units import inch
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
-        from reportlab.pdfgen import canvas
+        from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_JUSTIFY
+        try:
+            from src.services.pdf_toolkit import STYLES, Letterhead, draw_logo
+        except ImportError:
+            from pdf_toolkit import STYLES, Letterhead, draw_logo
         
         # Import company config
         try:
@@ -44,17 +45,10 @@ def generate_client_status_report(client_name=None):
         
         buffer = io.BytesIO()
         
-        # Custom page with professional letterhead
-        def add_letterhead(canvas, doc):
-            canvas.saveState()
-            
+        # Professional letterhead: drawn once per document, page number per page
+        def draw_letterhead(canvas, doc):
             # Add logo if exists
-            logo_path = company_info.get('company_logo', 'swt_logo_white.png')
-            if os.path.exists(logo_path):
-                try:
-                    canvas.drawImage(logo_path, 50, 720, width=100, height=60, preserveAspectRatio=True)
-                except:
-                    pass
+            draw_logo(canvas, 50, 720, 100, 60, company_info.get('company_logo', 'swt_logo_white.png'))
             
             # Company header
             canvas.setFont("Helvetica-Bold", 16)
@@ -82,9 +76,13 @@ def generate_client_status_report(client_name=None):
             canvas.setFillColor(colors.grey)
             canvas.drawString(50, 30, f"Report Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}")
             canvas.drawCentredString(300, 30, f"© 2025 {company_info['company_name']} - Confidential Client Information")
+        
+        def draw_page_number(canvas, doc):
+            canvas.setFont("Helvetica", 8)
+            canvas.setFillColor(colors.grey)
             canvas.drawRightString(550, 30, f"Page {doc.page}")
-            
-            canvas.restoreState()
+        
+        add_letterhead = Letterhead('client_status_letterhead', draw_letterhead, draw_page_number)
         
         # Create document
         doc = SimpleDocTemplate(
@@ -97,38 +95,10 @@ def generate_client_status_report(client_name=None):
         )
         
         story = []
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Title'],
-            fontSize=22,
-            textColor=colors.HexColor('#1e3a8a'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#1e3a8a'),
-            spaceBefore=20,
-            spaceAfter=12,
-            fontName='Helvetica-Bold'
-        )
-        
-        subheading_style = ParagraphStyle(
-            'SubHeading',
-            parent=styles['Heading3'],
-            fontSize=12,
-            textColor=colors.HexColor('#2563eb'),
-            spaceBefore=15,
-            spaceAfter=10,
-            fontName='Helvetica-Bold'
-        )
+        styles = STYLES
+        title_style = styles['StatusTitle']
+        heading_style = styles['StatusHeading']
+        subheading_style = styles['StatusSubHeading']
         
         # Title
         story.append(Paragraph("CLIENT STATUS UPDATE REPORT", title_style))
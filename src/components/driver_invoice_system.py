@@ -13,6 +13,11 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+
+try:
+    from src.services.date_contract import day_range
+except ImportError:
+    from date_contract import day_range
 from io import BytesIO
 import os
 
@@ -161,10 +166,10 @@ def generate_driver_invoice(driver_name, start_date, end_date, invoice_type="sum
             driver_net_earnings
         FROM moves
         WHERE driver_name = ?
-        AND DATE(completed_date) BETWEEN ? AND ?
+        AND completed_date >= ? AND completed_date < ?
         AND status IN ('completed', 'paid')
         ORDER BY completed_date
-    """, (driver_name, start_date, end_date))
+    """, (driver_name, *day_range(start_date, end_date)))
     
     moves = cursor.fetchall()
     
@@ -346,9 +351,9 @@ def show_invoice_management():
                     SELECT COUNT(*), SUM(amount), SUM(driver_net_earnings)
                     FROM moves
                     WHERE driver_name = ?
-                    AND DATE(completed_date) BETWEEN ? AND ?
+                    AND completed_date >= ? AND completed_date < ?
                     AND status IN ('completed', 'paid')
-                """, (selected_driver, date_range[0], date_range[1]))
+                """, (selected_driver, *day_range(date_range[0], date_range[1])))
                 
                 stats = cursor.fetchone()
                 if stats and stats[0]:
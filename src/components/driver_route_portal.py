@@ -11,8 +11,10 @@ import database as db
 import json
 import base64
 import hashlib
-from PIL import Image
-import io
+import photo_ingest
+
+# How often the photo upload progress refreshes while jobs are running
+PHOTO_JOB_POLL_SECONDS = 1.5
 
 # Mobile-friendly CSS
 MOBILE_CSS = """
@@ -166,7 +168,11 @@ def get_move_details(move_id):
     return move_df.iloc[0].to_dict()
 
 def save_driver_photos(move_id, photo_type, photos):
-    """Save uploaded photos to database"""
+    """Queue uploaded photos for processing and saving in the background
+
+    Resizing, EXIF stripping and thumbnails run in photo_ingest's worker pool;
+    the job is tracked in session state so the page can show its progress.
+    """
     conn = db.get_connection()
     cursor = conn.cursor()
     
@@ -182,25 +188,72 @@ def save_driver_photos(move_id, photo_type, photos):
             FOREIGN KEY (move_id) REFERENCES trailer_moves (id)
         )
     """)
+    photo_ingest.ensure_photo_columns(conn)
+    conn.commit()
+    conn.close()
     
-    saved_count = 0
-    for photo in photos:
-        # Convert photo to bytes
-        img = Image.open(photo)
-        img_byte_arr = io.BytesIO()
-        img.save(img_byte_arr, format='JPEG', quality=85)
-        img_byte_arr = img_byte_arr.getvalue()
+    job = photo_ingest.start_photo_ingest(
+        move_id, photo_type, photos,
+        st.session_state.get('driver_name', ''),
+        db.transaction
+    )
+    st.session_state.setdefault('photo_jobs', []).append(job.job_id)
+    
+    return job.total
+
+def _render_photo_jobs(forget_finished):
+    """Status of this session's photo uploads; returns how many are still running"""
+    job_ids = st.session_state.get('photo_jobs', [])
+    running = 0
+    
+    for job_id in list(job_ids):
+        job = photo_ingest.get_job(job_id)
+        if job is None:
+            job_ids.remove(job_id)
+            continue
         
-        cursor.execute("""
-            INSERT INTO driver_photos (move_id, photo_type, photo_data, driver_name)
-            VALUES (?, ?, ?, ?)
-        """, (move_id, photo_type, img_byte_arr, st.session_state.get('driver_name', '')))
-        saved_count += 1
+        label = job.photo_type.replace('_', ' ').title()
+        if job.status == 'completed':
+            st.success(f"✅ Saved {job.saved} {label} photos")
+        elif job.status == 'failed':
+            st.error(f"❌ {label} upload failed")
+        else:
+            st.progress(job.progress, text=f"Processing {label} photos ({job.processed}/{job.total})...")
+        
+        for error in job.errors:
+            st.warning(error)
+        
+        if not job.done:
+            running += 1
+        elif forget_finished:
+            photo_ingest.forget_job(job_id)
+            job_ids.remove(job_id)
     
-    conn.commit()
-    conn.close()
+    return running
+
+def _poll_photo_jobs():
+    if _render_photo_jobs(forget_finished=False) == 0:
+        # All finished: a full rerun shows the results outside the fragment, ending the polling
+        st.rerun()
+
+def show_photo_jobs():
+    """Progress of background photo uploads started from this session"""
+    job_ids = st.session_state.get('photo_jobs', [])
+    if not job_ids:
+        return
     
-    return saved_count
+    if not hasattr(st, 'fragment'):
+        # Older Streamlit: refresh on demand
+        if _render_photo_jobs(forget_finished=True) and st.button("🔄 Check progress", key="check_photo_jobs"):
+            st.rerun()
+        return
+    
+    jobs = [photo_ingest.get_job(job_id) for job_id in job_ids]
+    if any(job is not None and not job.done for job in jobs):
+        st.fragment(run_every=PHOTO_JOB_POLL_SECONDS)(_poll_photo_jobs)()
+    else:
+        # Shown once, then forgotten
+        _render_photo_jobs(forget_finished=True)
 
 def get_photo_count(move_id):
     """Get count of photos uploaded for this move"""
@@ -370,6 +423,9 @@ def show_driver_portal():
     </div>
     """, unsafe_allow_html=True)
     
+    # Background uploads still processing (or just finished)
+    show_photo_jobs()
+    
     # Get current photo counts
     photo_counts = get_photo_count(move_id)
     total_photos = sum(photo_counts.values())
@@ -415,7 +471,7 @@ def show_driver_portal():
         if new_pickup_photos:
             if st.button("💾 Save New Pickup Photos", key="save_new_pickup"):
                 count = save_driver_photos(move_id, 'new_pickup', new_pickup_photos)
-                st.success(f"✅ Saved {count} photos")
+                st.info(f"⏳ Uploading {count} photos...")
                 st.rerun()
     
     with tab2:
@@ -440,7 +496,7 @@ def show_driver_portal():
         if new_delivery_photos:
             if st.button("💾 Save New Delivery Photos", key="save_new_delivery"):
                 count = save_driver_photos(move_id, 'new_delivery', new_delivery_photos)
-                st.success(f"✅ Saved {count} photos")
+                st.info(f"⏳ Uploading {count} photos...")
                 st.rerun()
     
     with tab3:
@@ -459,7 +515,7 @@ def show_driver_portal():
             if old_pickup_photos:
                 if st.button("💾 Save Old Pickup Photo", key="save_old_pickup"):
                     count = save_driver_photos(move_id, 'old_pickup', old_pickup_photos)
-                    st.success(f"✅ Saved {count} photo")
+                    st.info(f"⏳ Uploading {count} photo...")
                     st.rerun()
         else:
             st.info("No old trailer for this route")
@@ -480,7 +536,7 @@ def show_driver_portal():
             if old_return_photos:
                 if st.button("💾 Save Old Return Photo", key="save_old_return"):
                     count = save_driver_photos(move_id, 'old_return', old_return_photos)
-                    st.success(f"✅ Saved {count} photo")
+                    st.info(f"⏳ Uploading {count} photo...")
                     st.rerun()
         else:
             st.info("No old trailer for this route")
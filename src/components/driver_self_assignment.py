@@ -84,12 +84,21 @@ class DriverSelfAssignment:
         
         cursor.execute(query)
         columns = [desc[0] for desc in cursor.description]
-        results = cursor.fetchall()
+        moves = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        
+        # Addresses come from the location index and every route's miles from
+        # one origin x destination lookup, instead of queries per trailer pair
+        locations = mileage_calc.get_locations()
+        base_location = locations.base_location or "Fleet Memphis"
+        from_address = locations.address(base_location)
+        to_addresses = {
+            move['location']: move['full_address'] or locations.address(move['location'])
+            for move in moves if move['location']
+        }
+        route_miles = mileage_calc.calculate_mileages(base_location, from_address, to_addresses.items())
         
         available_moves = []
-        for row in results:
-            move = dict(zip(columns, row))
-            
+        for move in moves:
             # Check reservation status
             if move['is_reserved']:
                 if move['reserved_by_driver'] == self.driver_name:
@@ -104,23 +113,16 @@ class DriverSelfAssignment:
                 move['availability'] = 'available'
             
             # Calculate mileage and pay
-            base_location = self.get_base_location()
-            if base_location and move['location']:
-                from_address = mileage_calc.get_location_full_address(base_location)
-                to_address = move['full_address']
-                
-                if from_address and to_address:
-                    one_way_miles, _ = mileage_calc.calculate_mileage_with_cache(
-                        base_location, move['location'], from_address, to_address
-                    )
-                    if one_way_miles:
-                        move['one_way_miles'] = one_way_miles
-                        move['round_trip_miles'] = one_way_miles * 2
-                        move['estimated_pay'] = self.calculate_driver_pay(move['round_trip_miles'])
-                    else:
-                        move['one_way_miles'] = 0
-                        move['round_trip_miles'] = 0
-                        move['estimated_pay'] = 0
+            if from_address and to_addresses.get(move['location']):
+                one_way_miles = route_miles.get(move['location'])
+                if one_way_miles:
+                    move['one_way_miles'] = one_way_miles
+                    move['round_trip_miles'] = one_way_miles * 2
+                    move['estimated_pay'] = self.calculate_driver_pay(move['round_trip_miles'])
+                else:
+                    move['one_way_miles'] = 0
+                    move['round_trip_miles'] = 0
+                    move['estimated_pay'] = 0
             
             available_moves.append(move)
         
@@ -128,10 +130,7 @@ class DriverSelfAssignment:
     
     def get_base_location(self):
         """Get the default base location"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT location_title FROM locations WHERE is_base_location = 1 LIMIT 1")
-        result = cursor.fetchone()
-        return result[0] if result else "Fleet Memphis"
+        return mileage_calc.get_locations().base_location or "Fleet Memphis"
     
     def calculate_driver_pay(self, miles):
         """Calculate driver pay based on mileage"""
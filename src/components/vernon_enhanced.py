@@ -267,7 +267,7 @@ class VernonEnhanced:
             cursor.execute("""
                 SELECT COUNT(*) FROM moves 
                 WHERE status = 'in_progress'
-                AND julianday('now') - julianday(created_at) > ?
+                AND created_at < datetime('now', '-' || ? || ' days')
             """, (self.config['thresholds']['stuck_moves'],))
             stuck = cursor.fetchone()[0]
             
@@ -492,7 +492,7 @@ class VernonEnhanced:
                        julianday('now') - julianday(created_at) as days_old
                 FROM moves
                 WHERE status = 'assigned'
-                AND julianday('now') - julianday(created_at) > ?
+                AND created_at < datetime('now', '-' || ? || ' days')
             """, (self.config['thresholds']['stuck_moves'],))
             stuck_moves = cursor.fetchall()
             
@@ -245,7 +245,7 @@ class VernonSidebar:
             cursor.execute("""
                 SELECT COUNT(*) FROM moves 
                 WHERE status = 'in_progress' 
-                AND julianday('now') - julianday(created_at) > 7
+                AND created_at < datetime('now', '-7 days')
             """)
             stuck = cursor.fetchone()[0]
             if stuck > 0:
@@ -484,7 +484,7 @@ class VernonSidebar:
                 UPDATE moves 
                 SET status = 'abandoned'
                 WHERE status = 'in_progress'
-                AND julianday('now') - julianday(created_at) > 7
+                AND created_at < datetime('now', '-7 days')
             """)
             
             conn.commit()
@@ -0,0 +1,184 @@
+"""
+API authentication: signed bearer tokens and a verified-credential cache
+/api/login issues an HMAC-signed token that later requests present instead of
+a password, so they are verified without touching the database. HTTP Basic
+clients are still supported; a verified username/password pair is cached for
+a short TTL. Password changes, role changes and deactivations are picked up
+from the auth_revocations table (filled by triggers on users), which the API
+polls every few seconds rather than on every request.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+
+TOKEN_TTL = int(os.environ.get('SWT_API_TOKEN_TTL', 8 * 3600))
+CREDENTIAL_TTL = int(os.environ.get('SWT_API_CREDENTIAL_TTL', 300))
+REVOCATION_POLL_INTERVAL = 5
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def install_revocation_triggers(conn):
+    """Record users whose credentials or access changed (unix time, seconds)"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(users)").fetchall()]
+    if not columns:
+        return False
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS auth_revocations (
+            username TEXT PRIMARY KEY,
+            revoked_at REAL NOT NULL
+        )
+    """)
+    watched = [c for c in ('username', 'password', 'role', 'active') if c in columns]
+    changed = ' OR '.join(f"OLD.{c} IS NOT NEW.{c}" for c in watched)
+    now = "(julianday('now') - 2440587.5) * 86400.0"
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS auth_revocations_users_upd
+        AFTER UPDATE OF {', '.join(watched)} ON users
+        WHEN {changed}
+        BEGIN
+            INSERT OR REPLACE INTO auth_revocations (username, revoked_at) VALUES (OLD.username, {now});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS auth_revocations_users_del
+        AFTER DELETE ON users
+        BEGIN
+            INSERT OR REPLACE INTO auth_revocations (username, revoked_at) VALUES (OLD.username, {now});
+        END
+    """)
+    conn.commit()
+    return True
+
+
+class Authenticator:
+    """Token signing, credential cache and revocation state for one API process"""
+
+    def __init__(self, secret=None, token_ttl=TOKEN_TTL, credential_ttl=CREDENTIAL_TTL,
+                 poll_interval=REVOCATION_POLL_INTERVAL):
+        secret = secret or os.environ.get('SWT_API_SECRET')
+        if not secret:
+            # Tokens then only survive until the API restarts
+            print("SWT_API_SECRET not set - using a per-process token key")
+            secret = secrets.token_hex(32)
+        self._key = secret.encode() if isinstance(secret, str) else secret
+        self.token_ttl = token_ttl
+        self.credential_ttl = credential_ttl
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        # (username, password hash) -> (user dict, expires at)
+        self._credentials = {}
+        # username -> unix time; tokens issued before it are rejected
+        self._revoked_at = {}
+        # token ids ended by /api/logout -> token expiry
+        self._logged_out = {}
+        self._last_revocation = 0.0
+        self._next_poll = 0.0
+
+    # ----- tokens -----
+
+    def _sign(self, payload):
+        return _b64encode(hmac.new(self._key, payload.encode(), hashlib.sha256).digest())
+
+    def issue_token(self, user):
+        """Signed bearer token for a verified user; returns (token, expires_at)"""
+        issued_at = time.time()
+        claims = {
+            'sub': user['user'],
+            'role': user['role'],
+            'iat': issued_at,
+            'exp': issued_at + self.token_ttl,
+            'jti': secrets.token_hex(8),
+        }
+        payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+        return f"{payload}.{self._sign(payload)}", claims['exp']
+
+    def check_token(self, token):
+        """User dict for a valid token, None if forged, expired or revoked"""
+        try:
+            payload, signature = token.split('.', 1)
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                return None
+            claims = json.loads(_b64decode(payload))
+        except (ValueError, TypeError):
+            return None
+
+        now = time.time()
+        if claims.get('exp', 0) <= now:
+            return None
+        with self._lock:
+            if claims['iat'] <= self._revoked_at.get(claims['sub'], 0):
+                return None
+            if claims['jti'] in self._logged_out:
+                return None
+        return {'user': claims['sub'], 'role': claims['role'], 'token_id': claims['jti'],
+                'expires_at': claims['exp']}
+
+    def logout(self, token_id, expires_at):
+        with self._lock:
+            now = time.time()
+            for jti, exp in list(self._logged_out.items()):
+                if exp <= now:
+                    del self._logged_out[jti]
+            self._logged_out[token_id] = expires_at
+
+    # ----- Basic credentials -----
+
+    def cached_credentials(self, username, password_hash):
+        with self._lock:
+            entry = self._credentials.get((username, password_hash))
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._credentials[(username, password_hash)]
+                return None
+            return entry[0]
+
+    def remember_credentials(self, username, password_hash, user):
+        with self._lock:
+            self._credentials[(username, password_hash)] = (user, time.monotonic() + self.credential_ttl)
+
+    # ----- revocation -----
+
+    def revoke(self, username, revoked_at=None):
+        """Invalidate cached credentials and earlier tokens for username"""
+        revoked_at = revoked_at or time.time()
+        with self._lock:
+            if revoked_at > self._revoked_at.get(username, 0):
+                self._revoked_at[username] = revoked_at
+            for key in [k for k in self._credentials if k[0] == username]:
+                del self._credentials[key]
+
+    def revocation_poll_due(self):
+        """True at most once per poll interval"""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_poll:
+                return False
+            self._next_poll = now + self.poll_interval
+            return True
+
+    @property
+    def revocations_since(self):
+        return self._last_revocation
+
+    def apply_revocations(self, rows):
+        """Rows of (username, revoked_at) read from auth_revocations"""
+        for username, revoked_at in rows:
+            self.revoke(username, revoked_at)
+            self._last_revocation = max(self._last_revocation, revoked_at)
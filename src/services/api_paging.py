@@ -0,0 +1,130 @@
+"""
+Keyset pagination and field projection for API list endpoints
+Pages are ordered by (sort column, id) descending and continue from an opaque
+cursor holding the last row's key, so each page is an index seek no matter
+how deep the client pages - unlike OFFSET, which rescans every earlier row.
+Rows whose sort column is NULL sort last (SQLite orders NULL lowest). They are
+a second phase, paged by id once the non-NULL rows run out; the cursor records
+the phase so each statement stays a plain range on the index.
+"""
+
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Cursor phases: rows with a sort value, then rows whose sort value is NULL
+CURSOR_PHASES = ('value', 'null')
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """[phase, sort value, id] from a cursor; raises ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or len(values) != 3 or values[0] not in CURSOR_PHASES:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_fields(fields, columns):
+    """Requested column list from a comma separated fields= value
+
+    Returns None for all columns. Raises ValueError naming unknown fields.
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in columns]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def table_columns(conn, table_name):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall()]
+
+
+def keyset_queries(table, sort_column, select='*', filters=None, cursor=None):
+    """The statements a page runs, in order, as (sql, params) pairs
+
+    Each ends in LIMIT ? (the caller appends the row budget) and the next one
+    only runs when the previous phase ran out of rows. fetch_page uses this
+    and the index audit plans it, so both see the same SQL.
+    """
+    base = []
+    base_params = []
+    for column, value in (filters or {}).items():
+        if value is not None:
+            base.append(f"{column} = ?")
+            base_params.append(value)
+
+    if sort_column == 'id':
+        phases = [([], [])] if not cursor else [(["id < ?"], [cursor[2]])]
+        order = "id DESC"
+    else:
+        # A row-value comparison with NULL is never true, so the range phase
+        # only sees non-NULL rows and the NULL rows follow by id
+        null_phase = ([f"{sort_column} IS NULL"], [])
+        if not cursor:
+            phases = [([f"{sort_column} IS NOT NULL"], []), null_phase]
+        elif cursor[0] == 'value':
+            phases = [([f"({sort_column}, id) < (?, ?)"], [cursor[1], cursor[2]]), null_phase]
+        else:
+            phases = [([f"{sort_column} IS NULL", "id < ?"], [cursor[2]])]
+        order = f"{sort_column} DESC, id DESC"
+
+    queries = []
+    for where, params in phases:
+        query = f"SELECT {select} FROM {table}"
+        if base + where:
+            query += " WHERE " + " AND ".join(base + where)
+        queries.append((query + f" ORDER BY {order} LIMIT ?", base_params + params))
+    return queries
+
+
+def fetch_page(conn, table, sort_column, filters=None, limit=DEFAULT_PAGE_SIZE, cursor=None, fields=None):
+    """One page of rows, newest first, plus the cursor for the next page
+
+    filters: {column: value} equality filters (None values are ignored)
+    fields: comma separated column names to return (all when empty)
+    Returns: (rows as dicts, next_cursor or None)
+    """
+    columns = table_columns(conn, table)
+    if sort_column not in columns:
+        sort_column = 'id'
+    requested = parse_fields(fields, columns)
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    key_columns = [sort_column, 'id'] if sort_column != 'id' else ['id']
+    if requested is None:
+        select = '*'
+    else:
+        select = ', '.join(requested + [c for c in key_columns if c not in requested])
+
+    rows = []
+    for query, params in keyset_queries(table, sort_column, select, filters,
+                                        decode_cursor(cursor) if cursor else None):
+        cur = conn.execute(query, params + [limit + 1 - len(rows)])
+        names = [column[0] for column in cur.description]
+        rows.extend(dict(zip(names, row)) for row in cur.fetchall())
+        if len(rows) > limit:
+            break
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        phase = 'null' if last[sort_column] is None else 'value'
+        next_cursor = encode_cursor([phase, last[sort_column], last['id']])
+
+    if requested is not None:
+        rows = [{c: row[c] for c in requested} for row in rows]
+
+    return rows, next_cursor
@@ -0,0 +1,137 @@
+"""
+Async SQLite access for the REST API
+A bounded pool of reusable read connections plus one writer connection whose
+work is serialized on a single thread. Queries run off the event loop, so
+async endpoints never block it and polling clients don't each hold a
+threadpool slot while waiting on SQLite.
+"""
+
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+READ_POOL_SIZE = 4
+
+
+def _dict_rows(cursor):
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+class AsyncDatabase:
+    """Read pool + serialized writer for one database file
+
+    Call open() at startup and close() at shutdown (see the API lifespan).
+    """
+
+    def __init__(self, db_path, read_pool_size=READ_POOL_SIZE, timeout=10.0, pragmas=None):
+        self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.timeout = timeout
+        self.pragmas = pragmas or {}
+        self._readers = None
+        self._all_readers = []
+        self._writer = None
+        self._read_executor = None
+        self._write_executor = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            try:
+                conn.execute(f"PRAGMA {name} = {value}")
+            except sqlite3.DatabaseError as e:
+                print(f"PRAGMA {name} not applied to {self.db_path}: {e}")
+        return conn
+
+    async def open(self):
+        loop = asyncio.get_running_loop()
+        self._read_executor = ThreadPoolExecutor(self.read_pool_size, thread_name_prefix='db-read')
+        self._write_executor = ThreadPoolExecutor(1, thread_name_prefix='db-write')
+
+        # Open the writer first so WAL mode is set before readers attach
+        self._writer = await loop.run_in_executor(self._write_executor, self._connect)
+
+        self._readers = asyncio.Queue()
+        for _ in range(self.read_pool_size):
+            conn = await loop.run_in_executor(self._read_executor, self._connect)
+            self._all_readers.append(conn)
+            self._readers.put_nowait(conn)
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        if self._writer is not None:
+            await loop.run_in_executor(self._write_executor, self._writer.close)
+            self._writer = None
+        for conn in self._all_readers:
+            await loop.run_in_executor(self._read_executor, conn.close)
+        self._all_readers = []
+        self._readers = None
+        for executor in (self._read_executor, self._write_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._read_executor = None
+        self._write_executor = None
+
+    async def run_read(self, fn, *args):
+        """Run fn(conn, *args) on a pooled read connection"""
+        conn = await self._readers.get()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._read_executor, self._read_call, conn, fn, args)
+        finally:
+            self._readers.put_nowait(conn)
+
+    @staticmethod
+    def _read_call(conn, fn, args):
+        try:
+            return fn(conn, *args)
+        finally:
+            # End the implicit read snapshot so the connection sees new writes
+            if conn.in_transaction:
+                conn.rollback()
+
+    async def run_write(self, fn, *args):
+        """Run fn(conn, *args) on the writer inside one transaction
+
+        Writes are queued on a single thread, so they never contend with
+        each other for SQLite's write lock. Exceptions roll back and propagate.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._write_executor, self._write_call, fn, args)
+
+    def _write_call(self, fn, args):
+        conn = self._writer
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn, *args)
+            conn.commit()
+            return result
+        except BaseException:
+            conn.rollback()
+            raise
+
+    async def fetch_all(self, sql, params=()):
+        """All rows as a list of dicts"""
+        return await self.run_read(lambda conn: _dict_rows(conn.execute(sql, params)))
+
+    async def fetch_one(self, sql, params=()):
+        """First row as a dict, or None"""
+        def query(conn):
+            cursor = conn.execute(sql, params)
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([column[0] for column in cursor.description], row))
+        return await self.run_read(query)
+
+    async def fetch_value(self, sql, params=()):
+        """First column of the first row, or None"""
+        def query(conn):
+            row = conn.execute(sql, params).fetchone()
+            return row[0] if row else None
+        return await self.run_read(query)
+
+    async def execute(self, sql, params=()):
+        """Run one write statement; returns the affected row count"""
+        return await self.run_write(lambda conn: conn.execute(sql, params).rowcount)
@@ -0,0 +1,189 @@
+"""
+Batch geocoding with a persistent cache
+Addresses are geocoded on a bounded thread pool under a shared rate limit,
+with retry and exponential backoff for throttling and transient errors.
+Results (including "not found") are cached in geocode_cache by normalized
+address, and location coordinates are written with one executemany.
+
+The backend is any callable address -> {'status', 'latitude', 'longitude',
+'formatted_address'}. GoogleGeocoder calls the Geocoding API over HTTP; its
+base URL (SWT_GEOCODE_URL) can point at scripts/dev/distance_matrix_stub.py.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_BASE_URL = 'https://maps.googleapis.com'
+ENDPOINT = '/maps/api/geocode/json'
+
+MAX_WORKERS = 8
+# Requests per second across all workers (the API allows 50)
+RATE_LIMIT = 10
+RETRIES = 3
+BACKOFF_SECONDS = 0.5
+
+# Statuses worth retrying; anything else is a final answer
+RETRY_STATUSES = ('OVER_QUERY_LIMIT', 'UNKNOWN_ERROR')
+# Final answers that are cached (errors like REQUEST_DENIED are not)
+CACHED_STATUSES = ('OK', 'ZERO_RESULTS')
+
+
+def normalize_address(address):
+    """Cache key: lower case, punctuation and repeated whitespace removed"""
+    address = re.sub(r"[^\w\s]", ' ', str(address).lower())
+    return ' '.join(address.split())
+
+
+class GoogleGeocoder:
+    """Geocoding API backend (urllib, no client library needed)"""
+
+    def __init__(self, api_key=None, base_url=None, timeout=10):
+        self.api_key = api_key or os.environ.get('GOOGLE_MAPS_API_KEY')
+        self.base_url = (base_url or os.environ.get('SWT_GEOCODE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.timeout = timeout
+
+    def __call__(self, address):
+        query = urllib.parse.urlencode({'address': address, 'key': self.api_key})
+        with urllib.request.urlopen(f"{self.base_url}{ENDPOINT}?{query}", timeout=self.timeout) as response:
+            body = json.load(response)
+
+        status = body.get('status', 'UNKNOWN_ERROR')
+        if status != 'OK' or not body.get('results'):
+            return {'status': status if status != 'OK' else 'ZERO_RESULTS'}
+        best = body['results'][0]
+        return {
+            'status': 'OK',
+            'latitude': best['geometry']['location']['lat'],
+            'longitude': best['geometry']['location']['lng'],
+            'formatted_address': best.get('formatted_address'),
+        }
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def ensure_geocode_cache(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS geocode_cache (
+            address_key TEXT PRIMARY KEY,
+            address TEXT,
+            status TEXT NOT NULL,
+            latitude REAL,
+            longitude REAL,
+            formatted_address TEXT,
+            cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+
+class BatchGeocoder:
+    """Geocode many addresses concurrently, through geocode_cache"""
+
+    def __init__(self, backend, max_workers=MAX_WORKERS, rate=RATE_LIMIT,
+                 retries=RETRIES, backoff=BACKOFF_SECONDS):
+        self.backend = backend
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _geocode_one(self, address):
+        """Backend result with retries; transport errors end as UNKNOWN_ERROR"""
+        result = {'status': 'UNKNOWN_ERROR'}
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1) * (1 + random.random()))
+            self.limiter.wait()
+            with self._lock:
+                self.calls += 1
+            try:
+                result = self.backend(address)
+            except (OSError, ValueError) as e:
+                result = {'status': 'UNKNOWN_ERROR', 'error': str(e)}
+            if result.get('status') not in RETRY_STATUSES:
+                break
+        return result
+
+    def geocode_many(self, conn, addresses):
+        """{address: result} for every address, cached answers first
+
+        Each address is looked up once per normalized form; only cache misses
+        reach the backend. New OK / ZERO_RESULTS answers are cached.
+        """
+        ensure_geocode_cache(conn)
+        keys = {address: normalize_address(address) for address in addresses}
+        unique_keys = list(dict.fromkeys(keys.values()))
+
+        known = {}
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start + 500]
+            for key, status, lat, lng, formatted in conn.execute(f"""
+                SELECT address_key, status, latitude, longitude, formatted_address
+                FROM geocode_cache WHERE address_key IN ({', '.join(['?' for _ in chunk])})
+            """, chunk).fetchall():
+                known[key] = {'status': status, 'latitude': lat, 'longitude': lng,
+                              'formatted_address': formatted, 'cached': True}
+
+        # One representative address per uncached key
+        pending = {}
+        for address, key in keys.items():
+            if key not in known:
+                pending.setdefault(key, address)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending)),
+                                    thread_name_prefix='geocode') as pool:
+                results = dict(zip(pending, pool.map(self._geocode_one, pending.values())))
+            known.update(results)
+
+            conn.executemany("""
+                INSERT OR REPLACE INTO geocode_cache
+                (address_key, address, status, latitude, longitude, formatted_address, cached_at)
+                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """, [(key, pending[key], result['status'], result.get('latitude'), result.get('longitude'),
+                   result.get('formatted_address'))
+                  for key, result in results.items() if result['status'] in CACHED_STATUSES])
+            conn.commit()
+
+        return {address: known[key] for address, key in keys.items()}
+
+    def geocode_locations(self, conn, locations):
+        """Geocode (location id, address) pairs and store their coordinates
+
+        All coordinate updates are applied with one executemany in a single
+        transaction. Returns {location id: result}.
+        """
+        locations = list(locations)
+        results = self.geocode_many(conn, [address for _, address in locations])
+
+        updates = [(results[address]['latitude'], results[address]['longitude'], location_id)
+                   for location_id, address in locations if results[address]['status'] == 'OK']
+        if updates:
+            conn.executemany("UPDATE locations SET latitude = ?, longitude = ? WHERE id = ?", updates)
+            conn.commit()
+
+        return {location_id: results[address] for location_id, address in locations}
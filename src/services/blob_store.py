@@ -0,0 +1,244 @@
+"""
+Content-addressed file store for documents and photos
+File bytes live on disk under their SHA-256 (fan-out directories ab/cd/<sha>),
+SQLite keeps only a small metadata row. Identical uploads are stored once.
+"""
+
+import hashlib
+import os
+import tempfile
+from datetime import datetime
+
+# Root directory for stored files (relative to the app's working directory)
+BLOB_ROOT = os.environ.get('SWT_BLOB_ROOT', 'blob_store')
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """sha256-addressed files with two levels of fan-out directories"""
+
+    def __init__(self, root=BLOB_ROOT):
+        self.root = root
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return bool(digest) and os.path.exists(self.path_for(digest))
+
+    def put(self, data):
+        """Store bytes or a readable file object
+
+        File objects are streamed in chunks, never read fully into memory.
+        Returns: (sha256 hex digest, size in bytes)
+        """
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                if isinstance(data, (bytes, bytearray, memoryview)):
+                    sha.update(data)
+                    tmp.write(data)
+                    size = len(data)
+                else:
+                    if hasattr(data, 'seek'):
+                        data.seek(0)
+                    for chunk in iter(lambda: data.read(CHUNK_SIZE), b''):
+                        sha.update(chunk)
+                        tmp.write(chunk)
+                        size += len(chunk)
+
+            digest = sha.hexdigest()
+            final_path = self.path_for(digest)
+            if os.path.exists(final_path):
+                # Duplicate upload - keep the existing copy, marked as freshly used
+                # so sweep_orphan_blobs leaves it alone until it is registered
+                os.remove(tmp_path)
+                os.utime(final_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+            return digest, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def open(self, digest):
+        """Open a stored file for streaming reads"""
+        return open(self.path_for(digest), 'rb')
+
+    def iter_chunks(self, digest, chunk_size=CHUNK_SIZE):
+        """Yield a stored file in chunks"""
+        with self.open(digest) as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                yield chunk
+
+    def read(self, digest):
+        """Read a whole stored file (prefer open()/iter_chunks() for large files)"""
+        with self.open(digest) as f:
+            return f.read()
+
+    def delete(self, digest):
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def iter_files(self):
+        """Yield (digest, path) for every stored file
+
+        Only the ab/cd/<sha256> fan-out is walked; anything else under the
+        root (tmp/, previews/ from preview_cache) is not a stored blob.
+        """
+        for first in _hex_entries(self.root, 2):
+            for second in _hex_entries(os.path.join(self.root, first), 2):
+                directory = os.path.join(self.root, first, second)
+                for name in _hex_entries(directory, 64, dirs=False):
+                    if name.startswith(first + second):
+                        yield name, os.path.join(directory, name)
+
+
+def _hex_entries(directory, length, dirs=True):
+    """Names in directory that are lowercase hex of the given length"""
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return []
+    return [
+        entry.name for entry in entries
+        if len(entry.name) == length and entry.is_dir() == dirs
+        and all(c in '0123456789abcdef' for c in entry.name)
+    ]
+
+
+# Shared store for the app
+store = BlobStore()
+
+
+def ensure_blob_tables(conn):
+    """Create the blobs metadata table"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            content_type TEXT,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def ensure_blob_column(conn, table, column='blob_sha256'):
+    """Add the blob reference column to a document/photo table if missing"""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+    if columns and column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+
+
+def register_blob(conn, digest, size, content_type=None):
+    """Record one more reference to an already stored blob"""
+    ensure_blob_tables(conn)
+    conn.execute("""
+        INSERT INTO blobs (sha256, size, content_type, ref_count, created_at)
+        VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT(sha256) DO UPDATE SET ref_count = ref_count + 1
+    """, (digest, size, content_type, datetime.now()))
+
+
+def save_blob(conn, data, content_type=None, blob_store=None):
+    """Store data and record a reference to it in the caller's transaction
+
+    Returns: (sha256, size)
+    """
+    digest, size = (blob_store or store).put(data)
+    register_blob(conn, digest, size, content_type)
+    return digest, size
+
+
+def release_blob(conn, digest):
+    """Drop one reference in the caller's transaction
+
+    The blobs row goes once nothing points at it, but the file stays on
+    disk: the transaction may still roll back and bring the row back.
+    sweep_orphan_blobs removes files whose row is gone.
+    """
+    if not digest:
+        return
+    ensure_blob_tables(conn)
+    conn.execute("UPDATE blobs SET ref_count = ref_count - 1 WHERE sha256 = ?", (digest,))
+    row = conn.execute("SELECT ref_count FROM blobs WHERE sha256 = ?", (digest,)).fetchone()
+    if row is not None and row[0] <= 0:
+        conn.execute("DELETE FROM blobs WHERE sha256 = ?", (digest,))
+
+
+def sweep_orphan_blobs(conn, min_age_seconds=3600, blob_store=None):
+    """Delete stored files that no committed blobs row refers to
+
+    Files touched in the last min_age_seconds are kept: a save_blob whose
+    transaction has not committed yet has a file but no visible row.
+    Returns the number of files removed.
+    """
+    blob_store = blob_store or store
+    ensure_blob_tables(conn)
+    known = {row[0] for row in conn.execute("SELECT sha256 FROM blobs").fetchall()}
+    cutoff = datetime.now().timestamp() - min_age_seconds
+
+    removed = 0
+    for digest, path in list(blob_store.iter_files()):
+        if digest in known:
+            continue
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError as e:
+            print(f"Could not sweep blob {digest}: {e}")
+    return removed
+
+
+def load_blob(digest, inline_data=None, blob_store=None):
+    """Bytes for a row that has either a blob reference or legacy inline data"""
+    if digest:
+        return (blob_store or store).read(digest)
+    return inline_data
+
+
+def migrate_table_blobs(conn, table, data_column, digest_column='blob_sha256',
+                        batch_size=50, blob_store=None):
+    """Move inline BLOBs from table.data_column into the store
+
+    Works in small batches (one commit each) so the migration can be
+    interrupted and resumed. Returns the number of rows migrated.
+    """
+    ensure_blob_tables(conn)
+    ensure_blob_column(conn, table, digest_column)
+    conn.commit()
+
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(f"""
+            SELECT id, {data_column} FROM {table}
+            WHERE id > ? AND {data_column} IS NOT NULL AND {digest_column} IS NULL
+            ORDER BY id
+            LIMIT ?
+        """, (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+
+        for row_id, data in rows:
+            digest, _ = save_blob(conn, data, blob_store=blob_store)
+            conn.execute(
+                f"UPDATE {table} SET {digest_column} = ?, {data_column} = NULL WHERE id = ?",
+                (digest, row_id)
+            )
+            last_id = row_id
+            migrated += 1
+        conn.commit()
+
+    return migrated
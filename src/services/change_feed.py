@@ -0,0 +1,255 @@
+"""
+Change feed for incremental client sync
+Triggers on the core tables append every insert, update and delete to
+data_changes, so no write path (Streamlit page, API, import script) can skip
+it. data_changes.id is AUTOINCREMENT and therefore a monotonic cursor: clients
+ask for changes after the last id they saw and get each changed entity once,
+with its current row.
+"""
+
+# Tables fed into data_changes (only those present in a database are used)
+FEED_TABLES = ['moves', 'trailers', 'trailer_inventory', 'drivers', 'locations']
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 2000
+
+# Delete tombstones are kept this long; older cursors must do a full resync
+TOMBSTONE_RETENTION_DAYS = 30
+
+ACTIONS = {'INSERT': 'insert', 'UPDATE': 'update', 'DELETE': 'delete'}
+
+
+def _table_columns(conn, table_name):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall()]
+
+
+DATA_CHANGES_DDL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        entity_type TEXT NOT NULL,
+        entity_id TEXT NOT NULL,
+        action TEXT NOT NULL,
+        old_value TEXT,
+        new_value TEXT,
+        changed_by TEXT,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        processed BOOLEAN DEFAULT 0
+    )
+"""
+
+
+def _migrate_append_only(conn):
+    """Rebuild a data_changes table created with the old UNIQUE constraint
+
+    The UNIQUE(entity_type, entity_id, action, changed_at) index made every
+    write an INSERT OR REPLACE (delete + insert + index churn). The log is
+    append-only now; superseded rows are removed by compact_changes().
+    """
+    unique_index = conn.execute("""
+        SELECT 1 FROM sqlite_master
+        WHERE type = 'index' AND tbl_name = 'data_changes' AND name LIKE 'sqlite_autoindex_%'
+    """).fetchone()
+    if not unique_index:
+        return
+
+    # Triggers that write data_changes must go first, or the rename fails
+    for (name,) in conn.execute("""
+        SELECT name FROM sqlite_master WHERE type = 'trigger' AND sql LIKE '%data_changes%'
+    """).fetchall():
+        conn.execute(f"DROP TRIGGER {name}")
+
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'data_changes'").fetchone()
+    conn.execute(DATA_CHANGES_DDL.format(name='data_changes_rebuild'))
+    conn.execute("INSERT INTO data_changes_rebuild SELECT id, entity_type, entity_id, action, old_value, "
+                 "new_value, changed_by, changed_at, processed FROM data_changes")
+    conn.execute("DROP TABLE data_changes")
+    conn.execute("ALTER TABLE data_changes_rebuild RENAME TO data_changes")
+    if sequence:
+        # Never hand out a cursor value a client may already have seen
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'data_changes'", (sequence[0],))
+
+
+def ensure_change_log(conn):
+    """Create the append-only data_changes log and the triggers that feed it"""
+    conn.execute(DATA_CHANGES_DDL.format(name='data_changes'))
+    _migrate_append_only(conn)
+
+    # Cursor reads are rowid range scans on id; this one serves compaction
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_data_changes_entity
+        ON data_changes(entity_type, entity_id, id)
+    """)
+    # Only used by the old processed-flag polling
+    conn.execute("DROP INDEX IF EXISTS idx_data_changes_unprocessed")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_feed_state (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_consumers (
+            consumer TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    for table in FEED_TABLES:
+        if 'id' not in _table_columns(conn, table):
+            continue
+        for operation, action in ACTIONS.items():
+            row = 'OLD' if operation == 'DELETE' else 'NEW'
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS data_changes_{table}_{action}
+                AFTER {operation} ON {table}
+                BEGIN
+                    INSERT INTO data_changes (entity_type, entity_id, action, changed_at)
+                    VALUES ('{table}', {row}.id, '{action}', datetime('now', 'localtime'));
+                END
+            """)
+    conn.commit()
+
+
+def get_consumer_offset(conn, consumer):
+    """Last change id a named consumer has processed (None if never seen)"""
+    row = conn.execute("SELECT last_id FROM change_consumers WHERE consumer = ?", (consumer,)).fetchone()
+    return row[0] if row else None
+
+
+def save_consumer_offset(conn, consumer, last_id):
+    conn.execute("""
+        INSERT INTO change_consumers (consumer, last_id, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(consumer) DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at
+    """, (consumer, last_id))
+
+
+def read_log(conn, since, limit=DEFAULT_BATCH_SIZE):
+    """Raw log rows after a cursor, oldest first (one rowid range read)"""
+    return conn.execute("""
+        SELECT id, entity_type, entity_id, action, new_value, changed_by, changed_at
+        FROM data_changes
+        WHERE id > ?
+        ORDER BY id
+        LIMIT ?
+    """, (since, limit)).fetchall()
+
+
+def current_cursor(conn):
+    """Cursor for "everything up to now", for clients starting from a full load"""
+    row = conn.execute("SELECT MAX(id) FROM data_changes").fetchone()
+    return row[0] or 0
+
+
+def _compacted_floor(conn):
+    row = conn.execute("SELECT value FROM change_feed_state WHERE name = 'tombstone_floor'").fetchone()
+    return row[0] if row else 0
+
+
+def read_changes(conn, since, limit=DEFAULT_BATCH_SIZE, entity_types=None):
+    """Changes after cursor `since`, one entry per entity, oldest first
+
+    Within a batch an entity's changes are folded: an insert followed by
+    updates is reported as an insert, anything followed by a delete as a
+    delete. Non-deleted entities carry their current row in 'data'.
+    Returns: dict with changes, cursor (pass back as since), has_more, and
+    reset=True when since predates compacted tombstones (client must reload).
+    """
+    limit = max(1, min(int(limit), MAX_BATCH_SIZE))
+    tables = [t for t in (entity_types or FEED_TABLES) if t in FEED_TABLES]
+
+    if since < _compacted_floor(conn):
+        return {'changes': [], 'cursor': current_cursor(conn), 'has_more': False, 'reset': True}
+
+    placeholders = ', '.join(['?' for _ in tables])
+    rows = conn.execute(f"""
+        SELECT id, entity_type, entity_id, action, changed_at
+        FROM data_changes
+        WHERE id > ? AND entity_type IN ({placeholders})
+        ORDER BY id
+        LIMIT ?
+    """, [since] + tables + [limit]).fetchall()
+
+    folded = {}
+    for change_id, entity_type, entity_id, action, changed_at in rows:
+        key = (entity_type, entity_id)
+        previous = folded.pop(key, None)
+        if previous and previous['action'] == 'insert' and action == 'update':
+            action = 'insert'
+        # Re-inserting moves the entity to its latest position in the batch
+        folded[key] = {
+            'cursor': change_id,
+            'entity': entity_type,
+            'id': entity_id,
+            'action': action,
+            'changed_at': changed_at,
+            'data': None,
+        }
+
+    # Current rows for everything not deleted, one query per table
+    wanted = {}
+    for change in folded.values():
+        if change['action'] != 'delete':
+            wanted.setdefault(change['entity'], []).append(change['id'])
+    for table, ids in wanted.items():
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            cursor = conn.execute(
+                f"SELECT * FROM {table} WHERE id IN ({', '.join(['?' for _ in chunk])})", chunk
+            )
+            names = [column[0] for column in cursor.description]
+            for values in cursor.fetchall():
+                record = dict(zip(names, values))
+                folded[(table, str(record['id']))]['data'] = record
+
+    return {
+        'changes': sorted(folded.values(), key=lambda change: change['cursor']),
+        'cursor': rows[-1][0] if rows else since,
+        'has_more': len(rows) == limit,
+        'reset': False,
+    }
+
+
+def compact_changes(conn, retention_days=TOMBSTONE_RETENTION_DAYS):
+    """Drop superseded feed rows, expired delete tombstones and old app rows
+
+    Only the latest change per entity is needed: any client behind it will
+    still receive that change. Returns the number of rows removed.
+    """
+    tables = FEED_TABLES
+    placeholders = ', '.join(['?' for _ in tables])
+
+    superseded = conn.execute(f"""
+        DELETE FROM data_changes
+        WHERE entity_type IN ({placeholders})
+          AND id < (SELECT MAX(latest.id) FROM data_changes latest
+                    WHERE latest.entity_type = data_changes.entity_type
+                      AND latest.entity_id = data_changes.entity_id)
+    """, tables).rowcount
+
+    expired_floor = conn.execute(f"""
+        SELECT MAX(id) FROM data_changes
+        WHERE entity_type IN ({placeholders}) AND action = 'delete'
+          AND changed_at < datetime('now', 'localtime', ?)
+    """, tables + [f"-{int(retention_days)} days"]).fetchone()[0]
+
+    expired = 0
+    if expired_floor:
+        expired = conn.execute(f"""
+            DELETE FROM data_changes
+            WHERE entity_type IN ({placeholders}) AND action = 'delete' AND id <= ?
+        """, tables + [expired_floor]).rowcount
+        conn.execute("""
+            INSERT INTO change_feed_state (name, value) VALUES ('tombstone_floor', ?)
+            ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)
+        """, (expired_floor,))
+
+    # Application-level rows (RealtimeSyncManager.track_change) just age out
+    aged = conn.execute(f"""
+        DELETE FROM data_changes
+        WHERE entity_type NOT IN ({placeholders})
+          AND changed_at < datetime('now', 'localtime', ?)
+    """, tables + [f"-{int(retention_days)} days"]).rowcount
+
+    conn.commit()
+    return superseded + expired + aged
@@ -0,0 +1,219 @@
+"""
+Pooled SQLite connections for Smith & Williams Trucking
+Keeps one tuned, reusable connection per thread per database file
+"""
+
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+
+# Applied once when a connection is opened
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',        # readers never block the writer
+    'synchronous': 'NORMAL',      # safe with WAL, one fsync per checkpoint
+    'busy_timeout': 10000,        # wait up to 10s for a write lock
+    'cache_size': -16000,         # 16 MB page cache (negative = KiB)
+    'mmap_size': 268435456,       # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+}
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to the pool
+
+    Existing code calls conn.commit() and conn.close() after every operation.
+    Inside a pool transaction() those calls join the outer transaction instead
+    of committing it early, so legacy helpers can be composed atomically.
+
+    Every get_connection() on a thread returns this same object, so borrows
+    are counted: a helper's close() only releases its own borrow, and the
+    connection is reset once the outermost borrower closes it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.transaction_depth = 0
+        self.borrowers = 0
+        self.pending_callbacks = []
+
+    def after_commit(self, callback):
+        """Call callback() once the current work is committed (dropped on rollback)"""
+        self.pending_callbacks.append(callback)
+
+    def run_commit_callbacks(self):
+        callbacks, self.pending_callbacks = self.pending_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"after_commit callback failed: {e}")
+
+    def commit(self):
+        """Commit unless an outer transaction() scope owns the commit"""
+        if self.transaction_depth == 0:
+            super().commit()
+            self.run_commit_callbacks()
+
+    def rollback(self):
+        super().rollback()
+        self.pending_callbacks = []
+
+    def close(self):
+        """Release this borrow; the last one hands the connection back for reuse"""
+        self.borrowers = max(self.borrowers - 1, 0)
+        if self.borrowers > 0 or self.transaction_depth > 0:
+            return
+        if self.in_transaction:
+            # A plain close() discards uncommitted work - keep that behaviour
+            self.rollback()
+        self.pending_callbacks = []
+        self.row_factory = None
+        self.text_factory = str
+
+    def close_for_real(self):
+        """Actually close the underlying SQLite handle"""
+        super().close()
+
+
+class ConnectionPool:
+    """Per-thread connection pool for a single SQLite database file"""
+
+    def __init__(self, db_path, timeout=10.0, pragmas=None):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            factory=PooledConnection
+        )
+        try:
+            # Unknown pragmas are ignored by SQLite, so a failure here is real
+            # (locked file, bad value) and the connection is not handed out
+            for name, value in self.pragmas.items():
+                conn.execute(f"PRAGMA {name} = {value}")
+        except sqlite3.DatabaseError:
+            conn.close_for_real()
+            raise
+        with self._lock:
+            self._connections.add(conn)
+        return conn
+
+    def get_connection(self):
+        """Borrow this thread's connection, opening it on first use
+
+        Pair every call with conn.close().
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        conn.borrowers += 1
+        return conn
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """Run a block in one transaction, yielding the thread's connection
+
+        The outermost scope issues BEGIN (IMMEDIATE by default so the write
+        lock is taken up front) and COMMIT/ROLLBACK. Nested scopes use
+        SAVEPOINTs so an inner failure only unwinds its own work.
+
+        Work left uncommitted outside any scope (a legacy helper that raised
+        before its commit/close) is rolled back when the outermost scope
+        opens, the same as a plain close() would have discarded it.
+        """
+        conn = self.get_connection()
+        depth = conn.transaction_depth
+        savepoint = f"sp_{depth}"
+        owns_commit = depth == 0
+
+        try:
+            if owns_commit:
+                if conn.in_transaction:
+                    conn.rollback()
+                conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            else:
+                conn.execute(f"SAVEPOINT {savepoint}")
+        except BaseException:
+            conn.close()
+            raise
+
+        callback_mark = len(conn.pending_callbacks)
+        conn.transaction_depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            conn.transaction_depth = depth
+            del conn.pending_callbacks[callback_mark:]
+            if owns_commit:
+                sqlite3.Connection.rollback(conn)
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            conn.transaction_depth = depth
+            if owns_commit:
+                sqlite3.Connection.commit(conn)
+                conn.run_commit_callbacks()
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """Close every connection this pool has handed out"""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections = weakref.WeakSet()
+        for conn in connections:
+            try:
+                conn.close_for_real()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+# Process-wide registry, one pool per database file
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path):
+    """Get (or create) the shared pool for a database file"""
+    pool = _pools.get(db_path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(db_path)
+            if pool is None:
+                pool = ConnectionPool(db_path)
+                _pools[db_path] = pool
+    return pool
+
+
+def get_connection(db_path):
+    """Drop-in replacement for sqlite3.connect(db_path)"""
+    return get_pool(db_path).get_connection()
+
+
+def transaction(db_path, immediate=True):
+    """Transaction context manager on the shared pool for db_path"""
+    return get_pool(db_path).transaction(immediate=immediate)
+
+
+def close_all_pools():
+    """Close all pooled connections (shutdown hooks, tests, backups)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
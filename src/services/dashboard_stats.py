@@ -0,0 +1,254 @@
+"""
+Dashboard statistics engine
+Keeps per-group counters for moves, trailers and drivers in a trigger-maintained
+fleet_counters table so dashboard KPIs are read from a handful of rows instead
+of scanning each table once per metric.
+"""
+
+import sqlite3
+
+# Tables tracked in fleet_counters (only those present in a database are used)
+COUNTED_TABLES = ['moves', 'trailers', 'trailer_inventory', 'drivers']
+
+# First existing column wins
+MOVE_AMOUNT_COLUMNS = ['estimated_earnings', 'amount', 'driver_pay']
+MOVE_MILES_COLUMNS = ['total_miles', 'estimated_miles', 'actual_miles']
+
+# Trailer number patterns used when a trailers table has no is_new column
+NEW_TRAILER_PATTERN = "({p}trailer_number LIKE '190%' OR {p}trailer_number LIKE '18V%' OR {p}trailer_number = '7728')"
+OLD_TRAILER_PATTERN = (
+    "(LENGTH({p}trailer_number) = 4 AND substr({p}trailer_number, 1, 1) IN ('3', '4', '5', '6', '7') "
+    "AND {p}trailer_number != '7728')"
+)
+
+
+def _table_columns(conn, table_name):
+    """Column names of a table, empty list if it doesn't exist"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall()]
+
+
+def _first(columns, candidates):
+    for column in candidates:
+        if column in columns:
+            return column
+    return None
+
+
+def _group_expressions(table_name, columns, prefix=''):
+    """SQL expressions for (status, is_new, period, amount, miles) of one row
+
+    prefix is '' for a plain SELECT, or 'NEW.' / 'OLD.' inside triggers.
+    is_new is 1/0 for new/old trailers, -1 when unclassified, 0 for other tables.
+    period is the YYYY-MM of move_date for moves, '' otherwise.
+    """
+    p = prefix
+    status = f"COALESCE({p}status, '')" if 'status' in columns else "''"
+
+    is_new = "0"
+    period = "''"
+    amount = "0"
+    miles = "0"
+
+    if table_name in ('trailers', 'trailer_inventory'):
+        if 'is_new' in columns:
+            is_new = f"COALESCE({p}is_new, 0)"
+        elif 'trailer_number' in columns:
+            is_new = (
+                f"CASE WHEN {NEW_TRAILER_PATTERN.format(p=p)} THEN 1 "
+                f"WHEN {OLD_TRAILER_PATTERN.format(p=p)} THEN 0 ELSE -1 END"
+            )
+    elif table_name == 'moves':
+        if 'move_date' in columns:
+            period = f"COALESCE(strftime('%Y-%m', {p}move_date), '')"
+        amount_column = _first(columns, MOVE_AMOUNT_COLUMNS)
+        if amount_column:
+            amount = f"COALESCE({p}{amount_column}, 0)"
+        miles_column = _first(columns, MOVE_MILES_COLUMNS)
+        if miles_column:
+            miles = f"COALESCE({p}{miles_column}, 0)"
+
+    return status, is_new, period, amount, miles
+
+
+def _tracked_columns(table_name, columns):
+    """Columns whose updates can move a row between counter groups"""
+    tracked = [c for c in ('status', 'is_new', 'trailer_number', 'move_date') if c in columns]
+    if table_name == 'moves':
+        tracked += [c for c in (_first(columns, MOVE_AMOUNT_COLUMNS), _first(columns, MOVE_MILES_COLUMNS)) if c]
+    return tracked
+
+
+def _upsert_sql(table_name, expressions, sign):
+    status, is_new, period, amount, miles = expressions
+    return f"""
+        INSERT INTO fleet_counters (table_name, status, is_new, period, row_count, amount, miles)
+        VALUES ('{table_name}', {status}, {is_new}, {period}, {sign}1, {sign}({amount}), {sign}({miles}))
+        ON CONFLICT(table_name, status, is_new, period) DO UPDATE SET
+            row_count = row_count + excluded.row_count,
+            amount = amount + excluded.amount,
+            miles = miles + excluded.miles;
+    """
+
+
+def install_fleet_counters(conn):
+    """Create fleet_counters, its triggers, and backfill it in one grouped pass
+
+    Safe to call repeatedly; a table is only (re)counted when its triggers
+    are missing, e.g. on first run or after the table was rebuilt.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fleet_counters (
+            table_name TEXT NOT NULL,
+            status TEXT NOT NULL,
+            is_new INTEGER NOT NULL DEFAULT 0,
+            period TEXT NOT NULL DEFAULT '',
+            row_count INTEGER NOT NULL DEFAULT 0,
+            amount REAL NOT NULL DEFAULT 0,
+            miles REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (table_name, status, is_new, period)
+        )
+    """)
+
+    existing_triggers = {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall()
+    }
+
+    for table_name in COUNTED_TABLES:
+        if f"fleet_counters_{table_name}_ins" in existing_triggers:
+            continue
+        columns = _table_columns(conn, table_name)
+        if not columns:
+            continue
+
+        new_row = _group_expressions(table_name, columns, 'NEW.')
+        old_row = _group_expressions(table_name, columns, 'OLD.')
+
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS fleet_counters_{table_name}_ins
+            AFTER INSERT ON {table_name}
+            BEGIN
+                {_upsert_sql(table_name, new_row, '+')}
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS fleet_counters_{table_name}_del
+            AFTER DELETE ON {table_name}
+            BEGIN
+                {_upsert_sql(table_name, old_row, '-')}
+            END
+        """)
+        tracked = _tracked_columns(table_name, columns)
+        if tracked:
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS fleet_counters_{table_name}_upd
+                AFTER UPDATE OF {', '.join(tracked)} ON {table_name}
+                BEGIN
+                    {_upsert_sql(table_name, old_row, '-')}
+                    {_upsert_sql(table_name, new_row, '+')}
+                END
+            """)
+
+        # Backfill from the current contents in a single pass
+        conn.execute("DELETE FROM fleet_counters WHERE table_name = ?", (table_name,))
+        status, is_new, period, amount, miles = _group_expressions(table_name, columns)
+        conn.execute(f"""
+            INSERT INTO fleet_counters (table_name, status, is_new, period, row_count, amount, miles)
+            SELECT '{table_name}', {status}, {is_new}, {period}, COUNT(*), SUM({amount}), SUM({miles})
+            FROM {table_name}
+            GROUP BY 2, 3, 4
+        """)
+
+    conn.commit()
+
+
+def compute_counter_rows(conn, table_name):
+    """Counter rows for one table straight from the data (one grouped scan)"""
+    columns = _table_columns(conn, table_name)
+    if not columns:
+        return []
+    status, is_new, period, amount, miles = _group_expressions(table_name, columns)
+    return conn.execute(f"""
+        SELECT '{table_name}', {status}, {is_new}, {period}, COUNT(*), SUM({amount}), SUM({miles})
+        FROM {table_name}
+        GROUP BY 2, 3, 4
+    """).fetchall()
+
+
+class FleetStats:
+    """Read-only view over fleet_counters rows"""
+
+    def __init__(self, rows):
+        self.rows = [
+            {
+                'table': row[0],
+                'status': row[1],
+                'is_new': row[2],
+                'period': row[3],
+                'count': row[4] or 0,
+                'amount': row[5] or 0,
+                'miles': row[6] or 0,
+            }
+            for row in rows
+        ]
+
+    def _select(self, table, status=None, exclude_status=None, is_new=None, period=None, period_from=None):
+        if isinstance(status, str):
+            status = [status]
+        if isinstance(exclude_status, str):
+            exclude_status = [exclude_status]
+        for row in self.rows:
+            if row['table'] != table:
+                continue
+            if status is not None and row['status'] not in status:
+                continue
+            if exclude_status is not None and row['status'] in exclude_status:
+                continue
+            if is_new is not None and row['is_new'] != is_new:
+                continue
+            if period is not None and row['period'] != period:
+                continue
+            if period_from is not None and row['period'] < period_from:
+                continue
+            yield row
+
+    def count(self, table, **filters):
+        """Number of rows in table matching the filters"""
+        return sum(row['count'] for row in self._select(table, **filters))
+
+    def amount(self, table, **filters):
+        """Summed amount (earnings/pay) for matching rows"""
+        return sum(row['amount'] for row in self._select(table, **filters))
+
+    def miles(self, table, **filters):
+        """Summed miles for matching rows"""
+        return sum(row['miles'] for row in self._select(table, **filters))
+
+    def has_table(self, table):
+        return any(row['table'] == table for row in self.rows)
+
+
+def _computed_rows(conn):
+    rows = []
+    for table_name in COUNTED_TABLES:
+        rows.extend(compute_counter_rows(conn, table_name))
+    return rows
+
+
+def read_fleet_stats(conn):
+    """Load every dashboard counter with one read of fleet_counters
+
+    Nothing is installed or committed here - install_fleet_counters runs once
+    at database init / API startup. Falls back to one grouped scan per table
+    if fleet_counters hasn't been created (read-only or uninitialized database).
+    """
+    try:
+        rows = conn.execute("""
+            SELECT table_name, status, is_new, period, row_count, amount, miles
+            FROM fleet_counters
+            WHERE row_count != 0
+        """).fetchall()
+    except sqlite3.OperationalError as e:
+        print(f"fleet_counters unavailable, computing directly: {e}")
+        rows = _computed_rows(conn)
+    return FleetStats(rows)
+
@@ -0,0 +1,172 @@
+"""
+Table-versioned data cache
+Query results are cached per (database, query, params) and stamped with the
+version of every table they read. Triggers bump a table's version on any
+INSERT/UPDATE/DELETE - from Streamlit, the API or a script - so a cached
+result is served until one of its tables actually changes.
+
+The triggers are installed once, at database init (install_version_tracking).
+Reads never create or commit anything: a table without tracking, or a read
+inside an open transaction (whose versions may yet roll back), is loaded
+straight from the database and not stored.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Upper bound on cached results per process
+MAX_ENTRIES = 256
+
+# Tables read through the cache (trackers are installed for those that exist)
+TRACKED_TABLES = ['moves', 'archived_moves', 'trailers', 'trailer_inventory', 'drivers',
+                  'locations', 'route_history']
+
+
+class TableVersionCache:
+    """Process-wide LRU cache invalidated by per-table version counters"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tracked = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def ensure_tracking(self, conn, db_path, tables):
+        """Create table_versions and its triggers for any untracked table (init only - commits)"""
+        pending = [t for t in tables if (db_path, t) not in self._tracked]
+        if not pending:
+            return
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS table_versions (
+                table_name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        for table in pending:
+            conn.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,))
+            for operation in ('INSERT', 'UPDATE', 'DELETE'):
+                conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS table_versions_{table}_{operation.lower()}
+                    AFTER {operation} ON {table}
+                    BEGIN
+                        UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                    END
+                """)
+        conn.commit()
+
+        with self._lock:
+            self._tracked.update((db_path, t) for t in pending)
+
+    def table_versions(self, conn, tables):
+        """Current version of each table, as a tuple in the order given"""
+        placeholders = ', '.join(['?' for _ in tables])
+        rows = dict(conn.execute(
+            f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})",
+            list(tables)
+        ).fetchall())
+        return tuple(rows.get(t, 0) for t in tables)
+
+    def tracked_versions(self, conn, tables):
+        """Versions of tables, or None if any of them has no version tracking"""
+        placeholders = ', '.join(['?' for _ in tables])
+        try:
+            rows = dict(conn.execute(
+                f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})",
+                list(tables)
+            ).fetchall())
+        except sqlite3.OperationalError:
+            return None
+        if len(rows) < len(set(tables)):
+            return None
+        return tuple(rows[t] for t in tables)
+
+    def get_or_load(self, conn, db_path, key, tables, loader):
+        """Return the cached result for key, calling loader(conn) when stale"""
+        tables = tuple(sorted(tables))
+        versions = self.tracked_versions(conn, tables)
+        if versions is None:
+            return loader(conn)
+        cache_key = (db_path, tables, key)
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        result = loader(conn)
+        if conn.in_transaction:
+            # Versions read here are uncommitted; after a rollback the next
+            # write would reach the same numbers and serve this result
+            return result
+
+        with self._lock:
+            self._entries[cache_key] = (versions, result)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return result
+
+    def invalidate(self, tables=None, db_path=None):
+        """Drop cached results that read any of tables (all when None)"""
+        with self._lock:
+            for cache_key in list(self._entries):
+                key_db, key_tables, _ = cache_key
+                if db_path is not None and key_db != db_path:
+                    continue
+                if tables is not None and not set(tables) & set(key_tables):
+                    continue
+                del self._entries[cache_key]
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared by every module in the process
+cache = TableVersionCache()
+
+
+def install_version_tracking(conn, db_path, tables=TRACKED_TABLES):
+    """Install version triggers for the tables that exist (database init / startup)"""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    cache.ensure_tracking(conn, db_path, [t for t in tables if t in existing])
+
+
+def bump_version(conn, *tables):
+    """Bump table versions by hand (for writes that bypass the triggers)"""
+    for table in tables:
+        conn.execute("""
+            INSERT INTO table_versions (table_name, version) VALUES (?, 1)
+            ON CONFLICT(table_name) DO UPDATE SET version = version + 1
+        """, (table,))
+
+
+def cached_read_sql(conn, db_path, query, tables, params=None):
+    """pd.read_sql_query served from the cache until one of tables changes
+
+    Returns a copy so callers can modify the DataFrame freely.
+    """
+    import pandas as pd
+
+    key = (query, tuple(params) if params else ())
+    df = cache.get_or_load(
+        conn, db_path, key, tables,
+        lambda c: pd.read_sql_query(query, c, params=params)
+    )
+    return df.copy()
+
+
+def cached_query(conn, db_path, query, tables, params=None):
+    """cursor.fetchall() served from the cache until one of tables changes"""
+    key = ('rows', query, tuple(params) if params else ())
+    return cache.get_or_load(
+        conn, db_path, key, tables,
+        lambda c: c.execute(query, params or ()).fetchall()
+    )
@@ -4,6 +4,9 @@ from datetime import datetime
 import database as db
 import utils
 
+# Sheet names recognised as trailer move data, in priority order
+TRAILER_SHEET_NAMES = ['Trailer Move Tracker', 'Trailer Moves', 'Moves', 'Sheet1']
+
 def import_excel_file(file_path_or_buffer):
     """
     Import data from Excel file
@@ -31,28 +34,136 @@ def import_excel_file(file_path_or_buffer):
             stats['drivers'] = import_drivers(drivers_df)
         
         # Import Trailer Moves (check for different possible sheet names)
-        trailer_sheet_names = ['Trailer Move Tracker', 'Trailer Moves', 'Moves', 'Sheet1']
         trailer_moves_df = None
         
-        for sheet_name in trailer_sheet_names:
+        for sheet_name in TRAILER_SHEET_NAMES:
             if sheet_name in excel_data:
                 trailer_moves_df = excel_data[sheet_name]
                 break
         
         if trailer_moves_df is not None:
-            stats['trailer_moves'] = import_trailer_moves(trailer_moves_df)
+            stats['trailer_moves'] = import_trailer_moves(trailer_moves_df, stats['errors'])
         
         # Create summary message
         message = f"Import completed: {stats['trailer_moves']} moves, {stats['locations']} locations, {stats['drivers']} drivers"
         
         if stats['errors']:
-            message += f"\nWarnings: {', '.join(stats['errors'])}"
+            message += f"\nWarnings ({len(stats['errors'])}): {', '.join(stats['errors'][:10])}"
         
         return True, message, stats
         
     except Exception as e:
         return False, f"Import failed: {str(e)}", None
 
+def _is_csv(file_path_or_buffer):
+    """True when the path (or uploaded file name) looks like a CSV"""
+    name = file_path_or_buffer if isinstance(file_path_or_buffer, str) else getattr(file_path_or_buffer, 'name', '')
+    return str(name).lower().endswith('.csv')
+
+def iter_sheet_chunks(worksheet, chunk_size):
+    """
+    Yield a read-only openpyxl worksheet as DataFrames of at most chunk_size rows
+    Each chunk keeps the sheet's row positions as its index.
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    
+    buffer = []
+    start = 0
+    for values in rows:
+        buffer.append(values)
+        if len(buffer) >= chunk_size:
+            yield pd.DataFrame(buffer, columns=header, index=range(start, start + len(buffer)))
+            start += len(buffer)
+            buffer = []
+    
+    if buffer:
+        yield pd.DataFrame(buffer, columns=header, index=range(start, start + len(buffer)))
+
+def import_excel_file_streaming(file_path_or_buffer, chunk_size=1000, progress_callback=None):
+    """
+    Import an Excel workbook or CSV file in bounded memory
+    Sheets are read row by row (openpyxl read-only mode, or CSV chunksize) and
+    each chunk is cleaned, mapped and inserted as one batch.
+    progress_callback(sheet_name, rows_processed, total_rows) is called after
+    every chunk; total_rows is None when the size isn't known up front.
+    Returns: (success, message, stats)
+    """
+    stats = {
+        'trailer_moves': 0,
+        'locations': 0,
+        'drivers': 0,
+        'errors': []
+    }
+    
+    def report(sheet_name, done, total):
+        if progress_callback:
+            progress_callback(sheet_name, done, total)
+    
+    try:
+        if _is_csv(file_path_or_buffer):
+            # A CSV export holds trailer moves only
+            done = 0
+            for chunk in pd.read_csv(file_path_or_buffer, chunksize=chunk_size):
+                stats['trailer_moves'] += import_trailer_moves(chunk, stats['errors'])
+                done += len(chunk)
+                report('CSV', done, None)
+        else:
+            from openpyxl import load_workbook
+            
+            workbook = load_workbook(file_path_or_buffer, read_only=True, data_only=True)
+            try:
+                sheet_importers = []
+                if 'Locations' in workbook.sheetnames:
+                    sheet_importers.append(('Locations', 'locations', import_locations))
+                if 'Drivers' in workbook.sheetnames:
+                    sheet_importers.append(('Drivers', 'drivers', import_drivers))
+                for sheet_name in TRAILER_SHEET_NAMES:
+                    if sheet_name in workbook.sheetnames:
+                        sheet_importers.append((
+                            sheet_name, 'trailer_moves',
+                            lambda chunk: import_trailer_moves(chunk, stats['errors'])
+                        ))
+                        break
+                
+                for sheet_name, stat_key, importer in sheet_importers:
+                    worksheet = workbook[sheet_name]
+                    total = worksheet.max_row - 1 if worksheet.max_row else None
+                    done = 0
+                    for chunk in iter_sheet_chunks(worksheet, chunk_size):
+                        stats[stat_key] += importer(chunk)
+                        done += len(chunk)
+                        report(sheet_name, done, total)
+            finally:
+                workbook.close()
+        
+        # Create summary message
+        message = f"Import completed: {stats['trailer_moves']} moves, {stats['locations']} locations, {stats['drivers']} drivers"
+        
+        if stats['errors']:
+            message += f"\nWarnings ({len(stats['errors'])}): {', '.join(stats['errors'][:10])}"
+        
+        return True, message, stats
+        
+    except Exception as e:
+        return False, f"Import failed: {str(e)}", stats
+
+def streamlit_progress_callback():
+    """Progress bar + status line for import_excel_file_streaming"""
+    progress_bar = st.progress(0.0)
+    status_text = st.empty()
+    
+    def callback(sheet_name, done, total):
+        if total:
+            progress_bar.progress(min(done / total, 1.0))
+            status_text.text(f"{sheet_name}: {done:,} of {total:,} rows")
+        else:
+            status_text.text(f"{sheet_name}: {done:,} rows")
+    
+    return callback
+
 def import_locations(df):
     """Import locations from DataFrame"""
     count = 0
@@ -141,162 +252,176 @@ def import_drivers(df):
     
     return count
 
-def import_trailer_moves(df):
-    """Import trailer moves from DataFrame"""
-    count = 0
+# Expected column mappings for various possible column names
+MOVE_COLUMN_MAPPINGS = {
+    # New trailer columns
+    'New Trailer': 'new_trailer',
+    'new_trailer': 'new_trailer',
+    'New Trailer #': 'new_trailer',
+    'Trailer': 'new_trailer',
     
-    # Expected column mappings for various possible column names
-    column_mappings = {
-        # New trailer columns
-        'New Trailer': 'new_trailer',
-        'new_trailer': 'new_trailer',
-        'New Trailer #': 'new_trailer',
-        'Trailer': 'new_trailer',
-        
-        # Pickup location
-        'Pickup Location': 'pickup_location',
-        'pickup_location': 'pickup_location',
-        'Pickup': 'pickup_location',
-        'From': 'pickup_location',
-        
-        # Destination
-        'Destination': 'destination',
-        'destination': 'destination',
-        'Delivery Location': 'destination',
-        'To': 'destination',
-        
-        # Old trailer columns
-        'Old Trailer': 'old_trailer',
-        'old_trailer': 'old_trailer',
-        'Old Trailer #': 'old_trailer',
-        'Previous Trailer': 'old_trailer',
-        
-        # Old pickup
-        'Old Pickup': 'old_pickup',
-        'old_pickup': 'old_pickup',
-        'Old Pickup Location': 'old_pickup',
-        
-        # Old destination
-        'Old Destination': 'old_destination',
-        'old_destination': 'old_destination',
-        'Old Delivery': 'old_destination',
-        
-        # Driver
-        'Assigned Driver': 'assigned_driver',
-        'assigned_driver': 'assigned_driver',
-        'Driver': 'assigned_driver',
-        'Driver Name': 'assigned_driver',
-        
-        # Dates
-        'Date Assigned': 'date_assigned',
-        'date_assigned': 'date_assigned',
-        'Assigned Date': 'date_assigned',
-        'Completion Date': 'completion_date',
-        'completion_date': 'completion_date',
-        'Completed Date': 'completion_date',
-        
-        # Status fields
-        'Received PPW': 'received_ppw',
-        'received_ppw': 'received_ppw',
-        'PPW': 'received_ppw',
-        'Processed': 'processed',
-        'processed': 'processed',
-        'Paid': 'paid',
-        'paid': 'paid',
-        'Payment Status': 'paid',
-        
-        # Financial fields
-        'Miles': 'miles',
-        'miles': 'miles',
-        'Distance': 'miles',
-        'Rate': 'rate',
-        'rate': 'rate',
-        'Rate per Mile': 'rate',
-        'Factor Fee': 'factor_fee',
-        'factor_fee': 'factor_fee',
-        'Factor %': 'factor_fee',
-        'Load Pay': 'load_pay',
-        'load_pay': 'load_pay',
-        'Total Pay': 'load_pay',
-        'Payment': 'load_pay',
-        
-        # Comments
-        'Comments': 'comments',
-        'comments': 'comments',
-        'Notes': 'comments'
-    }
+    # Pickup location
+    'Pickup Location': 'pickup_location',
+    'pickup_location': 'pickup_location',
+    'Pickup': 'pickup_location',
+    'From': 'pickup_location',
+    
+    # Destination
+    'Destination': 'destination',
+    'destination': 'destination',
+    'Delivery Location': 'destination',
+    'To': 'destination',
+    
+    # Old trailer columns
+    'Old Trailer': 'old_trailer',
+    'old_trailer': 'old_trailer',
+    'Old Trailer #': 'old_trailer',
+    'Previous Trailer': 'old_trailer',
+    
+    # Old pickup
+    'Old Pickup': 'old_pickup',
+    'old_pickup': 'old_pickup',
+    'Old Pickup Location': 'old_pickup',
+    
+    # Old destination
+    'Old Destination': 'old_destination',
+    'old_destination': 'old_destination',
+    'Old Delivery': 'old_destination',
+    
+    # Driver
+    'Assigned Driver': 'assigned_driver',
+    'assigned_driver': 'assigned_driver',
+    'Driver': 'assigned_driver',
+    'Driver Name': 'assigned_driver',
+    
+    # Dates
+    'Date Assigned': 'date_assigned',
+    'date_assigned': 'date_assigned',
+    'Assigned Date': 'date_assigned',
+    'Completion Date': 'completion_date',
+    'completion_date': 'completion_date',
+    'Completed Date': 'completion_date',
     
+    # Status fields
+    'Received PPW': 'received_ppw',
+    'received_ppw': 'received_ppw',
+    'PPW': 'received_ppw',
+    'Processed': 'processed',
+    'processed': 'processed',
+    'Paid': 'paid',
+    'paid': 'paid',
+    'Payment Status': 'paid',
+    
+    # Financial fields
+    'Miles': 'miles',
+    'miles': 'miles',
+    'Distance': 'miles',
+    'Rate': 'rate',
+    'rate': 'rate',
+    'Rate per Mile': 'rate',
+    'Factor Fee': 'factor_fee',
+    'factor_fee': 'factor_fee',
+    'Factor %': 'factor_fee',
+    'Load Pay': 'load_pay',
+    'load_pay': 'load_pay',
+    'Total Pay': 'load_pay',
+    'Payment': 'load_pay',
+    
+    # Comments
+    'Comments': 'comments',
+    'comments': 'comments',
+    'Notes': 'comments'
+}
+
+MOVE_FIELDS = ['new_trailer', 'pickup_location', 'destination',
+               'old_trailer', 'old_pickup', 'old_destination',
+               'assigned_driver', 'date_assigned', 'completion_date',
+               'received_ppw', 'processed', 'paid',
+               'miles', 'rate', 'factor_fee', 'load_pay', 'comments']
+MOVE_DATE_FIELDS = ['date_assigned', 'completion_date']
+MOVE_BOOL_FIELDS = ['received_ppw', 'processed', 'paid']
+MOVE_NUMERIC_FIELDS = ['miles', 'rate', 'factor_fee', 'load_pay']
+MOVE_KEY_FIELDS = ['new_trailer', 'pickup_location', 'destination']
+
+def prepare_trailer_moves(df):
+    """
+    Map and coerce a raw moves sheet into insert-ready columns
+    All coercion is done with pandas column operations, not per row.
+    Returns: DataFrame holding only MOVE_FIELDS columns, None for missing values
+    """
     # Rename columns based on mappings
-    df = df.rename(columns={k: v for k, v in column_mappings.items() if k in df.columns})
+    df = df.rename(columns={k: v for k, v in MOVE_COLUMN_MAPPINGS.items() if k in df.columns})
+    
+    # Several source headers can map to the same field - keep the first
+    df = df.loc[:, ~df.columns.duplicated()]
     
     # Clean the data
     df = utils.clean_excel_data(df)
     
-    # Import each trailer move
-    for _, row in df.iterrows():
-        try:
-            # Prepare data dictionary
-            move_data = {}
-            
-            # Add all standard fields
-            fields = ['new_trailer', 'pickup_location', 'destination', 
-                     'old_trailer', 'old_pickup', 'old_destination',
-                     'assigned_driver', 'date_assigned', 'completion_date',
-                     'received_ppw', 'processed', 'paid',
-                     'miles', 'rate', 'factor_fee', 'load_pay', 'comments']
-            
-            for field in fields:
-                if field in row:
-                    value = row[field]
-                    
-                    # Handle date fields
-                    if field in ['date_assigned', 'completion_date']:
-                        if pd.notna(value):
-                            if isinstance(value, pd.Timestamp):
-                                value = value.strftime('%Y-%m-%d')
-                            elif isinstance(value, str) and value:
-                                parsed_date = utils.parse_date(value)
-                                if parsed_date:
-                                    value = parsed_date.strftime('%Y-%m-%d')
-                        else:
-                            value = None
-                    
-                    # Handle boolean fields
-                    elif field in ['received_ppw', 'processed', 'paid']:
-                        value = bool(value) if pd.notna(value) else False
-                    
-                    # Handle numeric fields
-                    elif field in ['miles', 'rate', 'factor_fee', 'load_pay']:
-                        value = float(value) if pd.notna(value) else None
-                        if field == 'rate' and (value is None or value == 0):
-                            value = 2.10
-                        elif field == 'factor_fee' and (value is None or value == 0):
-                            value = 0.03
-                    
-                    # Handle string fields
-                    else:
-                        value = str(value) if pd.notna(value) else ''
-                    
-                    if value is not None and value != '':
-                        move_data[field] = value
-            
-            # Calculate load_pay if not provided
-            if 'load_pay' not in move_data or not move_data['load_pay']:
-                if 'miles' in move_data and move_data['miles']:
-                    rate = move_data.get('rate', 2.10)
-                    factor_fee = move_data.get('factor_fee', 0.03)
-                    move_data['load_pay'] = utils.calculate_load_pay(
-                        move_data['miles'], rate, factor_fee
-                    )
-            
-            # Only import if there's meaningful data
-            if any(move_data.get(f) for f in ['new_trailer', 'pickup_location', 'destination']):
-                db.add_trailer_move(move_data)
-                count += 1
-                
-        except Exception as e:
-            # Log error but continue with other rows
+    moves = pd.DataFrame(index=df.index)
+    
+    for field in MOVE_FIELDS:
+        if field not in df.columns:
             continue
+        column = df[field]
+        
+        if field in MOVE_DATE_FIELDS:
+            moves[field] = pd.to_datetime(column, errors='coerce').dt.strftime('%Y-%m-%d')
+        elif field in MOVE_BOOL_FIELDS:
+            moves[field] = column.fillna(False).astype(bool)
+        elif field in MOVE_NUMERIC_FIELDS:
+            moves[field] = pd.to_numeric(column, errors='coerce')
+        else:
+            moves[field] = column.where(column.notna(), '').astype(str).str.strip()
+    
+    # Default rate and factor fee when missing or zero
+    for field, default in (('rate', 2.10), ('factor_fee', 0.03)):
+        if field in moves.columns:
+            moves[field] = moves[field].where(moves[field].fillna(0) != 0, default)
+    
+    # Calculate load_pay if not provided
+    if 'miles' in moves.columns:
+        rate = moves['rate'] if 'rate' in moves.columns else 2.10
+        factor_fee = moves['factor_fee'] if 'factor_fee' in moves.columns else 0.03
+        calculated = (moves['miles'] * rate * (1 - factor_fee)).round(2)
+        
+        has_miles = moves['miles'].fillna(0) != 0
+        if 'load_pay' in moves.columns:
+            missing_pay = moves['load_pay'].fillna(0) == 0
+            moves['load_pay'] = moves['load_pay'].where(~(missing_pay & has_miles), calculated)
+        else:
+            moves['load_pay'] = calculated.where(has_miles)
+    
+    # Empty strings and NaN/NaT become NULL
+    moves = moves.astype(object).where(moves.notna(), None)
+    moves = moves.replace({'': None})
+    
+    # Only import if there's meaningful data
+    key_fields = [f for f in MOVE_KEY_FIELDS if f in moves.columns]
+    if not key_fields:
+        return moves.iloc[0:0]
+    
+    return moves[moves[key_fields].notna().any(axis=1)]
+
+def import_trailer_moves(df, errors=None):
+    """
+    Import trailer moves from DataFrame in one batched transaction
+    errors: optional list that receives a message per rejected row
+    Returns: number of moves imported
+    """
+    moves = prepare_trailer_moves(df)
+    if moves.empty:
+        return 0
+    
+    columns = list(moves.columns)
+    rows = list(moves.itertuples(index=False, name=None))
+    
+    count, row_errors = db.bulk_add_trailer_moves(columns, rows)
+    
+    if errors is not None:
+        for position, message in row_errors:
+            # +2 for the header row and 1-based spreadsheet numbering
+            errors.append(f"Row {moves.index[position] + 2}: {message}")
     
     return count
 
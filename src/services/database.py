@@ -7,18 +7,36 @@ import pandas as pd
 from datetime import datetime
 import json
 import os
+import change_feed
+import connection_pool
+import dashboard_stats
+import date_contract
+import db_indexes
+import data_cache
 from database_connection_manager import db_manager, get_all_drivers_safe, sync_drivers_from_users
 
 DB_FILE = 'trailer_tracker_streamlined.db'
 
 def get_connection():
-    """Get database connection with retry logic"""
-    try:
-        # Use the connection manager for better reliability
-        return sqlite3.connect(DB_FILE, check_same_thread=False, timeout=10.0)
-    except:
-        # Fallback to regular connection
-        return sqlite3.connect(DB_FILE, check_same_thread=False)
+    """Get this thread's pooled connection (WAL, busy timeout, tuned cache)
+
+    Callers may keep calling conn.close(); the connection is returned to the
+    pool rather than torn down.
+    """
+    return connection_pool.get_connection(DB_FILE)
+
+def transaction(immediate=True):
+    """Context manager running a block of writes as one transaction
+
+    Usage:
+        with db.transaction() as conn:
+            conn.execute(...)
+    """
+    return connection_pool.transaction(DB_FILE, immediate=immediate)
+
+def cached_read_sql(conn, query, tables, params=None):
+    """Read a DataFrame through the table-versioned cache (see data_cache)"""
+    return data_cache.cached_read_sql(conn, DB_FILE, query, tables, params)
 
 def init_database():
     """Initialize database with all required tables"""
@@ -170,30 +188,35 @@ def init_database():
     VALUES ('Fleet Memphis', '3716 Hwy 78', 'Memphis', 'TN', '38109', 1)
     ''')
     
+    # ISO dates enforced on write, indexes for the hot filters, then
+    # dashboard counters and cache version triggers
+    date_contract.ensure_date_contract(conn)
+    db_indexes.apply_indexes(conn)
+    dashboard_stats.install_fleet_counters(conn)
+    data_cache.install_version_tracking(conn, DB_FILE)
+    change_feed.ensure_change_log(conn)
+    
     conn.commit()
     conn.close()
 
 # Trailer operations
 def add_trailer(trailer_data):
     """Add new trailer"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     columns = ', '.join(trailer_data.keys())
     placeholders = ', '.join(['?' for _ in trailer_data])
     
-    cursor.execute(f'''
-    INSERT INTO trailers ({columns})
-    VALUES ({placeholders})
-    ''', list(trailer_data.values()))
-    
-    trailer_id = cursor.lastrowid
-    
-    # Log activity
-    log_activity('add_trailer', 'trailer', trailer_id, trailer_data.get('created_by', 'system'))
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+        INSERT INTO trailers ({columns})
+        VALUES ({placeholders})
+        ''', list(trailer_data.values()))
+        
+        trailer_id = cursor.lastrowid
+        
+        # Log activity in the same transaction
+        log_activity('add_trailer', 'trailer', trailer_id, trailer_data.get('created_by', 'system'))
     
-    conn.commit()
-    conn.close()
     return trailer_id
 
 def update_trailer(trailer_id, updates):
@@ -216,7 +239,7 @@ def update_trailer(trailer_id, updates):
 def get_all_trailers():
     """Get all trailers"""
     conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM trailers ORDER BY added_date DESC", conn)
+    df = cached_read_sql(conn, "SELECT * FROM trailers ORDER BY added_date DESC", ['trailers'])
     conn.close()
     return df
 
@@ -224,9 +247,11 @@ def get_available_trailers(trailer_type=None):
     """Get available trailers"""
     conn = get_connection()
     query = "SELECT * FROM trailers WHERE status = 'available'"
+    params = None
     if trailer_type:
-        query += f" AND trailer_type = '{trailer_type}'"
-    df = pd.read_sql_query(query, conn)
+        query += " AND trailer_type = ?"
+        params = [trailer_type]
+    df = cached_read_sql(conn, query, ['trailers'], params)
     conn.close()
     return df
 
@@ -258,7 +283,7 @@ def add_location(location_title, street_address, city, state, zip_code=None):
 def get_all_locations():
     """Get all locations"""
     conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM locations ORDER BY location_title", conn)
+    df = cached_read_sql(conn, "SELECT * FROM locations ORDER BY location_title", ['locations'])
     conn.close()
     return df
 
@@ -289,7 +314,7 @@ def get_all_drivers():
     # Then get all drivers with retry logic
     try:
         conn = get_connection()
-        df = pd.read_sql_query("SELECT * FROM drivers ORDER BY driver_name", conn)
+        df = cached_read_sql(conn, "SELECT * FROM drivers ORDER BY driver_name", ['drivers'])
         conn.close()
         return df
     except Exception as e:
@@ -315,34 +340,72 @@ def update_driver_status(driver_name, status):
 # Move operations
 def add_trailer_move(move_data):
     """Add new trailer move"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     columns = ', '.join(move_data.keys())
     placeholders = ', '.join(['?' for _ in move_data])
     
-    cursor.execute(f'''
-    INSERT INTO moves ({columns})
-    VALUES ({placeholders})
-    ''', list(move_data.values()))
+    with transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+        INSERT INTO moves ({columns})
+        VALUES ({placeholders})
+        ''', list(move_data.values()))
+        
+        move_id = cursor.lastrowid
+        
+        # Log activity in the same transaction
+        log_activity('create_move', 'move', move_id, move_data.get('created_by', 'system'))
+    
+    return move_id
+
+def bulk_add_trailer_moves(columns, rows, created_by='system'):
+    """Insert many moves with one executemany in a single transaction
     
-    move_id = cursor.lastrowid
+    columns: move column names, rows: value tuples in the same order
+    Returns: (inserted_count, errors) where errors is a list of (row_position, message)
+    """
+    if not rows:
+        return 0, []
     
-    # Log activity
-    log_activity('create_move', 'move', move_id, move_data.get('created_by', 'system'))
+    column_sql = ', '.join(columns)
+    placeholders = ', '.join(['?' for _ in columns])
+    insert_sql = f"INSERT INTO moves ({column_sql}) VALUES ({placeholders})"
     
-    conn.commit()
-    conn.close()
-    return move_id
+    inserted = 0
+    errors = []
+    
+    with transaction() as conn:
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM moves").fetchone()[0]
+        
+        try:
+            with transaction():
+                conn.executemany(insert_sql, rows)
+            inserted = len(rows)
+        except sqlite3.IntegrityError:
+            # Retry row by row so one bad row doesn't sink the whole batch
+            for position, row in enumerate(rows):
+                try:
+                    with transaction():
+                        conn.execute(insert_sql, row)
+                    inserted += 1
+                except sqlite3.IntegrityError as e:
+                    errors.append((position, str(e)))
+        
+        # One activity row per new move, same transaction
+        conn.execute('''
+        INSERT INTO activity_log (action, entity_type, entity_id, user)
+        SELECT 'create_move', 'move', id, ? FROM moves WHERE id > ?
+        ''', (created_by, last_id))
+    
+    return inserted, errors
 
 def get_all_trailer_moves():
     """Get all trailer moves"""
     conn = get_connection()
-    df = pd.read_sql_query("""
+    df = cached_read_sql(conn, """
     SELECT * FROM moves 
     WHERE id NOT IN (SELECT id FROM archived_moves)
     ORDER BY created_at DESC
-    """, conn)
+    """, ['moves', 'archived_moves'])
     conn.close()
     return df
 
@@ -391,7 +454,11 @@ def archive_old_moves(days_old=90):
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute(f'''
+    # One cutoff for both statements, so nothing crosses it between the copy
+    # and the delete; created_at < ? is a range scan on idx_moves_created
+    cutoff = cursor.execute("SELECT datetime('now', ?)", (f"-{int(days_old)} days",)).fetchone()[0]
+    
+    cursor.execute('''
     INSERT INTO archived_moves (id, move_data)
     SELECT id, json_object(
         'move_id', move_id,
@@ -404,67 +471,55 @@ def archive_old_moves(days_old=90):
         'status', status
     )
     FROM moves
-    WHERE julianday('now') - julianday(created_at) > ?
-    ''', (days_old,))
+    WHERE created_at < ?
+    ''', (cutoff,))
     
     # Delete from main table
-    cursor.execute(f'''
+    cursor.execute('''
     DELETE FROM moves
-    WHERE julianday('now') - julianday(created_at) > ?
-    ''', (days_old,))
+    WHERE created_at < ?
+    ''', (cutoff,))
     
     conn.commit()
     conn.close()
 
 # Activity logging
 def log_activity(action, entity_type, entity_id, user, details=None):
-    """Log system activity"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-    INSERT INTO activity_log (action, entity_type, entity_id, user, details)
-    VALUES (?, ?, ?, ?, ?)
-    ''', (action, entity_type, entity_id, user, json.dumps(details) if details else None))
-    
-    conn.commit()
-    conn.close()
+    """Log system activity
+    
+    Joins the caller's transaction() when one is open, so the log row is
+    committed (or rolled back) together with the change it describes.
+    """
+    with transaction() as conn:
+        conn.execute('''
+        INSERT INTO activity_log (action, entity_type, entity_id, user, details)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (action, entity_type, entity_id, user, json.dumps(details) if details else None))
 
 # Summary statistics
 def get_summary_stats():
     """Get summary statistics"""
     conn = get_connection()
-    cursor = conn.cursor()
-    
-    stats = {}
     
-    # Total moves
-    cursor.execute("SELECT COUNT(*) FROM moves")
-    stats['total_moves'] = cursor.fetchone()[0]
+    # One read of the trigger-maintained counters instead of a scan per metric
+    fleet = dashboard_stats.read_fleet_stats(conn)
     
-    # Active moves
-    cursor.execute("SELECT COUNT(*) FROM moves WHERE status IN ('assigned', 'in_progress')")
-    stats['active_moves'] = cursor.fetchone()[0]
+    stats = {}
     
-    # Completed moves
-    cursor.execute("SELECT COUNT(*) FROM moves WHERE status = 'completed'")
-    stats['completed_moves'] = cursor.fetchone()[0]
+    # Move counts
+    stats['total_moves'] = fleet.count('moves')
+    stats['active_moves'] = fleet.count('moves', status=['assigned', 'in_progress'])
+    stats['completed_moves'] = fleet.count('moves', status='completed')
     
     # Total miles
-    cursor.execute("SELECT SUM(total_miles) FROM moves WHERE status = 'completed'")
-    result = cursor.fetchone()[0]
-    stats['total_miles'] = result if result else 0
+    stats['total_miles'] = fleet.miles('moves', status='completed')
     
     # Total revenue
     stats['total_revenue'] = stats['total_miles'] * 2.10
     
-    # Available drivers
-    cursor.execute("SELECT COUNT(*) FROM drivers WHERE status = 'available'")
-    stats['available_drivers'] = cursor.fetchone()[0]
-    
-    # Available trailers
-    cursor.execute("SELECT COUNT(*) FROM trailers WHERE status = 'available'")
-    stats['available_trailers'] = cursor.fetchone()[0]
+    # Available drivers and trailers
+    stats['available_drivers'] = fleet.count('drivers', status='available')
+    stats['available_trailers'] = fleet.count('trailers', status='available')
     
     conn.close()
     return stats
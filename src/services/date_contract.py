@@ -0,0 +1,171 @@
+"""
+ISO-8601 date storage contract
+Date columns hold 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS[.ffffff]' text, or
+NULL. Text in that form sorts chronologically, so a date range is a plain
+comparison on the bare column - move_date >= ? AND move_date < ? - which an
+index serves as a range scan. Wrapping the column in date() or julianday()
+hides it from the index and forces a full scan.
+
+ensure_date_contract rewrites existing values into the canonical form and
+installs triggers that reject any other form on INSERT and UPDATE.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+# table -> date columns under the contract (only existing columns are enforced)
+DATE_COLUMNS = {
+    'moves': ['move_date', 'pickup_date', 'delivery_date', 'completed_date', 'created_at'],
+}
+
+# Accepted on input and normalized away; ISO forms are handled by fromisoformat
+INPUT_FORMATS = ('%m/%d/%Y', '%m/%d/%y', '%m-%d-%Y', '%Y/%m/%d', '%m/%d/%Y %H:%M', '%m/%d/%Y %I:%M %p',
+                 '%B %d, %Y', '%b %d, %Y')
+
+TRIGGER_VERSION = 1
+
+
+def parse_date_value(value):
+    """date/datetime for a stored or user-supplied value, None for blanks
+
+    Raises ValueError for text that is not a recognizable date.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return value
+    if hasattr(value, 'to_pydatetime'):  # pandas Timestamp
+        return value.to_pydatetime()
+
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        for fmt in INPUT_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+            except ValueError:
+                continue
+            return parsed if ('%H' in fmt or '%I' in fmt) else parsed.date()
+        else:
+            raise ValueError(f"Unrecognized date: {value!r}")
+    if len(text) <= 10 and parsed.time() == datetime.min.time():
+        return parsed.date()
+    return parsed
+
+
+def iso_date(value):
+    """'YYYY-MM-DD' for a date, datetime or date text; None for blanks"""
+    parsed = parse_date_value(value)
+    if parsed is None:
+        return None
+    if isinstance(parsed, datetime):
+        parsed = parsed.date()
+    return parsed.isoformat()
+
+
+def iso_value(value):
+    """Canonical stored form: 'YYYY-MM-DD' for dates, 'YYYY-MM-DD HH:MM:SS[.ffffff]' for times"""
+    parsed = parse_date_value(value)
+    if parsed is None:
+        return None
+    if isinstance(parsed, datetime):
+        if parsed.tzinfo is not None:
+            # Stored times are naive; store UTC, as CURRENT_TIMESTAMP does
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed.isoformat(sep=' ')
+    return parsed.isoformat()
+
+
+def day_range(start, end=None):
+    """(first day, day after the last) for col >= ? AND col < ?
+
+    Covers every stored value on those days, with or without a time part.
+    """
+    first = iso_date(start)
+    last = iso_date(end if end is not None else start)
+    return first, (date.fromisoformat(last) + timedelta(days=1)).isoformat()
+
+
+def valid_sql(expr):
+    """SQL condition true when expr is NULL or canonical ISO text"""
+    return (f"({expr} IS NULL OR (typeof({expr}) = 'text'"
+            f" AND {expr} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'"
+            f" AND date({expr}) IS NOT NULL"
+            f" AND (length({expr}) = 10 OR substr({expr}, 11, 1) = ' ')))")
+
+
+def _table_columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def normalize_existing(conn, table, columns):
+    """Rewrite non-canonical values in place; returns (fixed, unparseable) counts"""
+    invalid = ' OR '.join(f"NOT {valid_sql(c)}" for c in columns)
+    rows = conn.execute(f"SELECT rowid, {', '.join(columns)} FROM {table} WHERE {invalid}").fetchall()
+
+    updates = []
+    unparseable = 0
+    for rowid, *values in rows:
+        fixed = []
+        for value in values:
+            try:
+                fixed.append(iso_value(value))
+            except ValueError:
+                # Left as is; the UPDATE trigger only checks columns that change
+                fixed.append(value)
+                unparseable += 1
+        updates.append((*fixed, rowid))
+
+    if updates:
+        assignments = ', '.join(f"{c} = ?" for c in columns)
+        conn.executemany(f"UPDATE {table} SET {assignments} WHERE rowid = ?", updates)
+    return len(updates), unparseable
+
+
+def ensure_date_contract(conn, tables=None):
+    """Normalize stored dates and install the rejecting triggers
+
+    Safe to call at every startup: once the triggers exist the table is
+    already canonical and only the trigger check runs.
+    """
+    for table, wanted in (tables or DATE_COLUMNS).items():
+        existing = _table_columns(conn, table)
+        columns = [c for c in wanted if c in existing]
+        if not columns:
+            continue
+
+        insert_trigger = f"trg_{table}_iso_dates_insert_v{TRIGGER_VERSION}"
+        installed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (insert_trigger,)
+        ).fetchone()
+        if installed:
+            continue
+
+        fixed, unparseable = normalize_existing(conn, table, columns)
+        if fixed:
+            print(f"Normalized dates in {fixed} {table} rows")
+        if unparseable:
+            print(f"Warning: {unparseable} {table} date values could not be parsed and were left as is")
+
+        message = f"{table} dates must be ISO-8601 text (YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)"
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {insert_trigger}
+            BEFORE INSERT ON {table}
+            WHEN NOT ({' AND '.join(valid_sql(f'NEW.{c}') for c in columns)})
+            BEGIN
+                SELECT RAISE(ABORT, '{message}');
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_iso_dates_update_v{TRIGGER_VERSION}
+            BEFORE UPDATE OF {', '.join(columns)} ON {table}
+            WHEN NOT ({' AND '.join(f"(NEW.{c} IS OLD.{c} OR {valid_sql(f'NEW.{c}')})" for c in columns)})
+            BEGIN
+                SELECT RAISE(ABORT, '{message}');
+            END
+        """)
+    conn.commit()
@@ -0,0 +1,165 @@
+"""
+Index migration and query plan audit
+INDEXES matches the WHERE / ORDER BY clauses of the hot queries in
+api_server.py, app.py dashboards and the document/photo screens.
+HOT_QUERIES is checked with EXPLAIN QUERY PLAN so a schema or query change
+that falls back to a full table or index scan is caught before it ships. The
+API list endpoints are planned from api_paging itself, every cursor phase.
+"""
+
+import re
+import sqlite3
+
+try:
+    from src.services.api_paging import keyset_queries
+except ImportError:
+    from api_paging import keyset_queries
+
+# (index name, table, columns) - created only when the table and all columns exist
+INDEXES = [
+    # /api/moves?status=  and dashboard "active moves" lists
+    ('idx_moves_status_created', 'moves', ['status', 'created_at']),
+    ('idx_moves_status_move_date', 'moves', ['status', 'move_date']),
+    # /api/moves?driver=  and /api/drivers/{name}/moves, driver portals
+    ('idx_moves_driver_created', 'moves', ['driver_name', 'created_at']),
+    ('idx_moves_driver_pickup', 'moves', ['driver_name', 'pickup_date']),
+    # /api/moves (unfiltered, newest first), recent activity, archiving
+    ('idx_moves_created', 'moves', ['created_at']),
+    # /api/moves/{order_number}
+    ('idx_moves_order_number', 'moves', ['order_number']),
+    # Monthly revenue / receipts by date range
+    ('idx_moves_move_date', 'moves', ['move_date']),
+    # One driver's receipt / invoice period (ISO dates - see date_contract)
+    ('idx_moves_driver_move_date', 'moves', ['driver_name', 'move_date']),
+    ('idx_moves_driver_completed', 'moves', ['driver_name', 'completed_date']),
+    # Trailer availability by type
+    ('idx_trailers_status_is_new', 'trailers', ['status', 'is_new']),
+    ('idx_trailer_inventory_status', 'trailer_inventory', ['status']),
+    # /api/trailers keyset pages on (created_at, id)
+    ('idx_trailer_inventory_status_created', 'trailer_inventory', ['status', 'created_at']),
+    ('idx_trailer_inventory_created', 'trailer_inventory', ['created_at']),
+    ('idx_drivers_status', 'drivers', ['status']),
+    # Document and photo lookups per move
+    ('idx_documents_move_id', 'documents', ['move_id']),
+    ('idx_driver_photos_move_id', 'driver_photos', ['move_id', 'photo_type']),
+    ('idx_activity_log_timestamp', 'activity_log', ['timestamp']),
+]
+
+# (label, table, sort column, filter columns) for each api_server read_page call
+API_PAGES = [
+    ('api moves newest', 'moves', 'created_at', []),
+    ('api moves by status', 'moves', 'created_at', ['status']),
+    ('api moves by driver', 'moves', 'created_at', ['driver_name']),
+    ('api driver moves', 'moves', 'pickup_date', ['driver_name']),
+    ('api trailers', 'trailer_inventory', 'created_at', []),
+    ('api trailers by status', 'trailer_inventory', 'created_at', ['status']),
+]
+
+# A first page, a page after a row with a sort value, a page in the NULL phase
+CURSOR_STATES = [('first page', None), ('after cursor', ['value', None, None]), ('NULL phase', ['null', None, None])]
+
+
+def api_page_queries(pages=API_PAGES):
+    """(label, SQL) for every statement fetch_page runs for the API list endpoints"""
+    queries = []
+    for label, table, sort_column, filter_columns in pages:
+        filters = {column: '' for column in filter_columns}
+        for state, cursor in CURSOR_STATES:
+            statements = keyset_queries(table, sort_column, '*', filters, cursor)
+            for step, (sql, _) in enumerate(statements, 1):
+                suffix = f", step {step}" if len(statements) > 1 else ""
+                queries.append((f"{label} ({state}{suffix})", sql))
+    return queries
+
+
+# (label, SQL) - parameters are bound as NULL for planning
+HOT_QUERIES = api_page_queries() + [
+    ('api move by order number',
+     "SELECT * FROM moves WHERE order_number = ?"),
+    ('dashboard active moves',
+     "SELECT * FROM moves WHERE status IN ('active', 'assigned', 'in_transit') ORDER BY move_date DESC"),
+    ('dashboard monthly revenue',
+     "SELECT SUM(estimated_earnings) FROM moves WHERE move_date >= ?"),
+    ('completed this month',
+     "SELECT COUNT(*) FROM moves WHERE status = 'completed' AND move_date >= date('now', 'start of month')"),
+    ('payroll receipts by period',
+     "SELECT * FROM moves WHERE move_date >= ? AND move_date < ? ORDER BY driver_name, move_date DESC"),
+    ('driver receipt',
+     "SELECT * FROM moves WHERE move_date >= ? AND move_date < ? AND driver_name IN (?) ORDER BY driver_name, move_date DESC"),
+    ('driver invoice period',
+     "SELECT * FROM moves WHERE driver_name = ? AND completed_date >= ? AND completed_date < ? ORDER BY completed_date"),
+    ('stuck moves',
+     "SELECT COUNT(*) FROM moves WHERE status = 'in_progress' AND created_at < datetime('now', '-7 days')"),
+    ('archive old moves',
+     "SELECT id FROM moves WHERE created_at < ?"),
+    ('available trailers by type',
+     "SELECT * FROM trailers WHERE status = ? AND is_new = ?"),
+    ('active drivers',
+     "SELECT * FROM drivers WHERE status = ?"),
+    ('move documents',
+     "SELECT * FROM documents WHERE move_id = ? ORDER BY upload_date DESC"),
+    ('move photos',
+     "SELECT photo_type, COUNT(*) FROM driver_photos WHERE move_id = ? GROUP BY photo_type"),
+]
+
+# "SCAN moves" reads the whole table and "SCAN moves USING [COVERING] INDEX ..."
+# walks the whole index in order; only SEARCH narrows to a key range
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)(?:\s|$)')
+
+
+def _table_columns(conn, table_name):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall()]
+
+
+def apply_indexes(conn):
+    """Create every index whose table and columns exist; returns names created"""
+    created = []
+    existing = {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+    }
+    columns_by_table = {}
+
+    for name, table, columns in INDEXES:
+        if name in existing:
+            continue
+        if table not in columns_by_table:
+            columns_by_table[table] = _table_columns(conn, table)
+        if not columns_by_table[table] or not all(c in columns_by_table[table] for c in columns):
+            continue
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+        created.append(name)
+
+    if created:
+        # Give the planner fresh statistics for the new indexes
+        conn.execute("ANALYZE")
+    conn.commit()
+    return created
+
+
+def explain(conn, sql):
+    """EXPLAIN QUERY PLAN detail lines for sql, parameters bound as NULL"""
+    param_count = sql.count('?')
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * param_count).fetchall()
+    return [row[-1] for row in rows]
+
+
+def audit_query_plans(conn, queries=None):
+    """Plan every hot query and report any that scan a whole table or index
+
+    Queries referencing tables or columns missing from this database are
+    skipped. Returns: (failures, skipped) where failures is a list of
+    (label, plan_lines) and skipped a list of (label, reason).
+    """
+    failures = []
+    skipped = []
+
+    for label, sql in (queries or HOT_QUERIES):
+        try:
+            plan = explain(conn, sql)
+        except sqlite3.OperationalError as e:
+            skipped.append((label, str(e)))
+            continue
+        if any(FULL_SCAN.match(line) for line in plan):
+            failures.append((label, plan))
+
+    return failures, skipped
@@ -0,0 +1,131 @@
+"""
+Offline driving-distance estimates
+Great-circle (haversine) distances between every pair of located locations
+are computed once with NumPy and scaled by a road-circuity factor calibrated
+from route_history. An estimate is then a dictionary lookup plus a multiply,
+with no network access, so it can answer instantly while Google is asked in
+the background, or stand in for Google when no API key is set.
+"""
+
+import threading
+
+import numpy as np
+
+import data_cache
+import location_index
+
+EARTH_RADIUS_MILES = 3958.8
+
+# Road miles per great-circle mile until route_history has enough samples
+DEFAULT_ROAD_FACTOR = 1.2
+MIN_CALIBRATION_SAMPLES = 5
+# Calibrated factors outside this range are treated as bad data
+ROAD_FACTOR_BOUNDS = (1.0, 2.0)
+
+# route_history.actual_miles are round trips (payout miles)
+ROUTE_HISTORY_LEGS = 2
+
+
+def haversine_matrix(latitudes, longitudes):
+    """Great-circle miles between every pair of points (n x n array)"""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lng = np.radians(np.asarray(longitudes, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlng = lng[:, None] - lng[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def calibrate_road_factor(great_circle, actual):
+    """Median road/great-circle ratio, or (DEFAULT_ROAD_FACTOR, 0) without enough data"""
+    great_circle = np.asarray(great_circle, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    usable = great_circle > 1.0
+    ratios = actual[usable] / great_circle[usable]
+    low, high = ROAD_FACTOR_BOUNDS
+    ratios = ratios[(ratios >= low) & (ratios <= high)]
+    if len(ratios) < MIN_CALIBRATION_SAMPLES:
+        return DEFAULT_ROAD_FACTOR, int(len(ratios))
+    return float(np.median(ratios)), int(len(ratios))
+
+
+class DistanceModel:
+    """Precomputed pairwise distances for one locations snapshot"""
+
+    def __init__(self, locations, history_rows=()):
+        located = [entry for entry in locations.by_id.values() if entry['coordinates']]
+        self._index = {}
+        for i, entry in enumerate(located):
+            self._index[entry['title']] = i
+            self._index[entry['id']] = i
+
+        if located:
+            latitudes, longitudes = zip(*(entry['coordinates'] for entry in located))
+            self.great_circle = haversine_matrix(latitudes, longitudes)
+        else:
+            self.great_circle = np.zeros((0, 0))
+
+        pairs = [(self._index.get(o), self._index.get(d), miles) for o, d, miles in history_rows]
+        pairs = [(i, j, miles / ROUTE_HISTORY_LEGS) for i, j, miles in pairs if i is not None and j is not None]
+        if pairs:
+            rows, cols, actual = zip(*pairs)
+            self.road_factor, self.samples = calibrate_road_factor(self.great_circle[list(rows), list(cols)], actual)
+        else:
+            self.road_factor, self.samples = DEFAULT_ROAD_FACTOR, 0
+
+        # Road miles as plain floats so lookups avoid NumPy scalar overhead
+        self._road_miles = (self.great_circle * self.road_factor).tolist()
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def miles(self, origin, destination):
+        """Estimated one-way road miles between two location titles/ids, or None"""
+        i = self._index.get(origin)
+        j = self._index.get(destination)
+        if i is None or j is None:
+            return None
+        return self._road_miles[i][j]
+
+
+class DistanceEstimator:
+    """Process-wide DistanceModel per database, rebuilt when its inputs change"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # db_path -> (locations snapshot, route_history version, DistanceModel)
+        self._models = {}
+
+    def model(self, conn, db_path):
+        locations = location_index.index.snapshot(conn, db_path)
+
+        has_history = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'route_history'"
+        ).fetchone()
+        history_version = None
+        if has_history:
+            history_version = data_cache.cache.tracked_versions(conn, ('route_history',))
+        cacheable = not (has_history and history_version is None) and not conn.in_transaction
+
+        with self._lock:
+            entry = self._models.get(db_path)
+            if cacheable and entry is not None and entry[0] is locations and entry[1] == history_version:
+                return entry[2]
+
+        history = []
+        if has_history:
+            history = conn.execute("""
+                SELECT origin_location_id, destination_location_id, actual_miles
+                FROM route_history
+                WHERE actual_miles > 0
+            """).fetchall()
+        model = DistanceModel(locations, history)
+
+        if cacheable:
+            with self._lock:
+                self._models[db_path] = (locations, history_version, model)
+        return model
+
+
+# Shared by every module in the process
+estimator = DistanceEstimator()
@@ -0,0 +1,416 @@
+"""
+Batched driving distances with a persistent origin x destination cache
+Distance Matrix requests are packed up to the API limits (25 origins, 25
+destinations, 100 elements per request) and every cell is stored in
+mileage_cache with its source and fetch time, fronted by an in-memory LRU.
+Lookup order is memory, mileage_cache, the offline estimator
+(distance_estimator), then Google. Cells older than the TTL, and estimates,
+are served at once while a background thread fetches the real distance.
+Pairs Google cannot route (NOT_FOUND / ZERO_RESULTS) are cached as well, for
+a few hours, so they are not re-requested on every lookup.
+The endpoint is configurable (SWT_DISTANCE_MATRIX_URL) so development and CI
+can run against the local stub server in scripts/dev/distance_matrix_stub.py.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import distance_estimator
+
+DEFAULT_BASE_URL = 'https://maps.googleapis.com'
+ENDPOINT = '/maps/api/distancematrix/json'
+
+# Distance Matrix API limits per request
+MAX_ORIGINS = 25
+MAX_DESTINATIONS = 25
+MAX_ELEMENTS = 100
+
+MILES_PER_METER = 0.000621371
+
+# Cached Google distances older than this are refreshed on next use
+TTL_DAYS = int(os.environ.get('SWT_MILEAGE_TTL_DAYS', 30))
+
+# In-memory LRU in front of mileage_cache; entries are re-read after MEMORY_TTL
+# seconds so edits made by other processes show up
+MEMORY_ENTRIES = 4096
+MEMORY_TTL = 300
+
+SOURCE = 'google'
+# Cells from distance_estimator; returned but never written to mileage_cache
+ESTIMATE_SOURCE = 'estimate'
+# Sources that came from the API and may be refreshed; manual entries never expire
+REFRESHABLE_SOURCES = ('google', 'calculated')
+
+# Element statuses for pairs Google has no route for. They are stored with no
+# miles under UNROUTABLE_SOURCE and asked again after UNROUTABLE_TTL_HOURS.
+UNROUTABLE_STATUSES = ('NOT_FOUND', 'ZERO_RESULTS')
+UNROUTABLE_SOURCE = 'unroutable'
+UNROUTABLE_TTL_HOURS = int(os.environ.get('SWT_MILEAGE_UNROUTABLE_TTL_HOURS', 6))
+
+
+class DistanceMatrixError(Exception):
+    """Request-level Distance Matrix failure (transport or API status)"""
+
+
+def format_place(place):
+    """API parameter for an address string or a (lat, lng) pair"""
+    if isinstance(place, (tuple, list)):
+        return f"{place[0]},{place[1]}"
+    return str(place)
+
+
+def plan_batches(origin_count, destination_count):
+    """(origin start, origin end, destination start, destination end) per request"""
+    if not origin_count or not destination_count:
+        return []
+    destination_step = min(MAX_DESTINATIONS, destination_count)
+    origin_step = max(1, min(MAX_ORIGINS, MAX_ELEMENTS // destination_step))
+    return [
+        (o, min(o + origin_step, origin_count), d, min(d + destination_step, destination_count))
+        for o in range(0, origin_count, origin_step)
+        for d in range(0, destination_count, destination_step)
+    ]
+
+
+def ensure_mileage_cache(conn):
+    """Create mileage_cache if needed and add the duration column"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS mileage_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            from_location TEXT,
+            to_location TEXT,
+            miles REAL,
+            source TEXT,
+            cached_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(from_location, to_location)
+        )
+    """)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(mileage_cache)").fetchall()]
+    if 'duration_seconds' not in columns:
+        conn.execute("ALTER TABLE mileage_cache ADD COLUMN duration_seconds INTEGER")
+    conn.commit()
+
+
+class DistanceMatrixService:
+    """Origin x destination distances backed by mileage_cache"""
+
+    def __init__(self, db_path, api_key=None, base_url=None, ttl_days=TTL_DAYS, timeout=15,
+                 estimates=True, unroutable_ttl_hours=UNROUTABLE_TTL_HOURS):
+        self.db_path = db_path
+        self.api_key = api_key or os.environ.get('GOOGLE_MAPS_API_KEY')
+        self.base_url = (base_url or os.environ.get('SWT_DISTANCE_MATRIX_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.ttl_days = ttl_days
+        self.timeout = timeout
+        self.estimates = estimates
+        self.unroutable_ttl_hours = unroutable_ttl_hours
+        self.requests_made = 0
+
+        self._lock = threading.Lock()
+        self._ready = False
+        # (origin name, destination name) pairs queued for background refresh
+        self._refreshing = set()
+        self._executor = None
+        # (origin name, destination name) -> (expires at, cell)
+        self._memory = OrderedDict()
+
+    @property
+    def enabled(self):
+        return bool(self.api_key)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._ready:
+            ensure_mileage_cache(conn)
+            self._ready = True
+        return conn
+
+    # ----- API -----
+
+    def request(self, origins, destinations):
+        """Raw batched lookup for places (addresses or (lat, lng) pairs)
+
+        Returns {(origin index, destination index): cell} where cell has
+        'status' and, when it is 'OK', 'miles' and 'duration_seconds'.
+        Raises DistanceMatrixError if a request fails as a whole.
+        """
+        results = {}
+        for o_start, o_end, d_start, d_end in plan_batches(len(origins), len(destinations)):
+            query = urllib.parse.urlencode({
+                'origins': '|'.join(format_place(p) for p in origins[o_start:o_end]),
+                'destinations': '|'.join(format_place(p) for p in destinations[d_start:d_end]),
+                'mode': 'driving',
+                'units': 'imperial',
+                'key': self.api_key,
+            })
+            try:
+                with urllib.request.urlopen(f"{self.base_url}{ENDPOINT}?{query}", timeout=self.timeout) as response:
+                    body = json.load(response)
+            except (OSError, ValueError) as e:
+                raise DistanceMatrixError(f"Distance Matrix request failed: {e}")
+            self.requests_made += 1
+
+            if body.get('status') != 'OK':
+                raise DistanceMatrixError(f"API error: {body.get('status', 'Unknown error')}")
+
+            for i, row in enumerate(body.get('rows', [])):
+                for j, element in enumerate(row.get('elements', [])):
+                    cell = {'status': element.get('status', 'UNKNOWN_ERROR')}
+                    if cell['status'] == 'OK':
+                        cell['miles'] = round(element['distance']['value'] * MILES_PER_METER, 1)
+                        cell['duration_seconds'] = element.get('duration', {}).get('value')
+                    results[(o_start + i, d_start + j)] = cell
+        return results
+
+    # ----- cache -----
+
+    def _recall(self, keys):
+        """Cells for keys still held in memory"""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._memory[key]
+                    continue
+                self._memory.move_to_end(key)
+                found[key] = entry[1]
+        return found
+
+    def _remember(self, cells):
+        expires = time.monotonic() + MEMORY_TTL
+        with self._lock:
+            for key, cell in cells.items():
+                self._memory[key] = (expires, cell)
+                self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def forget(self, origin=None, destination=None):
+        """Drop remembered cells matching origin and/or destination (all when neither)"""
+        with self._lock:
+            for key in list(self._memory):
+                if (origin is None or key[0] == origin) and (destination is None or key[1] == destination):
+                    del self._memory[key]
+
+    def cached_cell(self, origin_name, destination_name):
+        """Cached cell by names only (memory, then mileage_cache); no API call"""
+        key = (origin_name, destination_name)
+        cell = self._recall([key]).get(key)
+        if cell is None:
+            conn = self._connect()
+            try:
+                loaded = self.cached(conn, [origin_name], [destination_name])
+            finally:
+                conn.close()
+            self._remember(loaded)
+            cell = loaded.get(key)
+        if cell is not None and cell['source'] == UNROUTABLE_SOURCE:
+            return None
+        return cell
+
+    def cached(self, conn, origin_names, destination_names):
+        """Cached cells for the given names: {(origin, destination): cell}
+
+        Unroutable pairs come back with source UNROUTABLE_SOURCE and no miles
+        until their short TTL runs out; after that they are left out.
+        """
+        if not origin_names or not destination_names:
+            return {}
+        sources = ', '.join(['?' for _ in REFRESHABLE_SOURCES])
+        rows = conn.execute(f"""
+            SELECT from_location, to_location, miles, duration_seconds, source,
+                   source IN ({sources}) AND cached_date < datetime('now', ?)
+            FROM mileage_cache
+            WHERE from_location IN ({', '.join(['?' for _ in origin_names])})
+              AND to_location IN ({', '.join(['?' for _ in destination_names])})
+              AND NOT (source = ? AND cached_date < datetime('now', ?))
+        """, list(REFRESHABLE_SOURCES) + [f"-{int(self.ttl_days)} days"]
+             + list(origin_names) + list(destination_names)
+             + [UNROUTABLE_SOURCE, f"-{int(self.unroutable_ttl_hours)} hours"]).fetchall()
+        return {
+            (origin, destination): {
+                'miles': miles,
+                'duration_seconds': duration,
+                'source': source,
+                'stale': bool(stale),
+            }
+            for origin, destination, miles, duration, source, stale in rows
+        }
+
+    def _fetch(self, conn, pairs):
+        """Fetch ((origin name, place), (destination name, place)) pairs and store them
+
+        The distinct origins and destinations are requested as one matrix, so
+        cells outside `pairs` may be fetched (and cached) as well. Requested
+        pairs Google cannot route are recorded as unroutable, unless a distance
+        is already cached for them.
+        """
+        origins = list(dict.fromkeys(origin for origin, _ in pairs))
+        destinations = list(dict.fromkeys(destination for _, destination in pairs))
+        results = self.request([place for _, place in origins], [place for _, place in destinations])
+        requested = {(origin[0], destination[0]) for origin, destination in pairs}
+
+        cells = {}
+        unroutable = []
+        for (i, j), cell in results.items():
+            key = (origins[i][0], destinations[j][0])
+            if cell['status'] == 'OK':
+                cells[key] = {
+                    'miles': cell['miles'],
+                    'duration_seconds': cell['duration_seconds'],
+                    'source': SOURCE,
+                    'stale': False,
+                }
+            elif cell['status'] in UNROUTABLE_STATUSES and key in requested:
+                unroutable.append(key)
+
+        conn.executemany("""
+            INSERT OR REPLACE INTO mileage_cache
+            (from_location, to_location, miles, duration_seconds, source, cached_date)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, [(origin, destination, cell['miles'], cell['duration_seconds'], SOURCE)
+              for (origin, destination), cell in cells.items()])
+        # Only replaces an earlier unroutable row, never a cached distance
+        conn.executemany("""
+            INSERT INTO mileage_cache (from_location, to_location, miles, source, cached_date)
+            VALUES (?, ?, NULL, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(from_location, to_location) DO UPDATE SET cached_date = CURRENT_TIMESTAMP
+            WHERE mileage_cache.source = excluded.source
+        """, [(origin, destination, UNROUTABLE_SOURCE) for origin, destination in unroutable])
+        conn.commit()
+        self._remember(cells)
+        return cells
+
+    def matrix(self, origins, destinations, refresh='background'):
+        """Distances for every origin x destination pair
+
+        origins / destinations: lists of (name, place), place being an address
+        or (lat, lng). Missing cells are answered by the offline estimator when
+        both locations have coordinates (source 'estimate') and fetched from
+        Google in the background; otherwise they are fetched now in batched
+        requests. Stale cells are returned as cached and refreshed in a
+        background thread (refresh='now' fetches missing and stale cells before
+        returning, refresh=None fetches only missing ones).
+        Returns {(origin name, destination name): {miles, duration_seconds,
+        source, stale}}; pairs that could not be resolved are absent. Pairs
+        cached as unroutable are not requested again until that entry expires
+        (an estimate is still returned for them).
+        """
+        pairs = [(origin, destination) for origin in origins for destination in destinations]
+        cells = self._recall([(o[0], d[0]) for o, d in pairs])
+        unknown = [p for p in pairs if (p[0][0], p[1][0]) not in cells]
+
+        conn = None
+        try:
+            if unknown:
+                conn = self._connect()
+                loaded = self.cached(conn, list(dict.fromkeys(o[0] for o, _ in unknown)),
+                                     list(dict.fromkeys(d[0] for _, d in unknown)))
+                self._remember(loaded)
+                cells.update(loaded)
+
+            unroutable = {key for key, cell in cells.items() if cell['source'] == UNROUTABLE_SOURCE}
+            for key in unroutable:
+                del cells[key]
+
+            missing = [p for p in pairs if (p[0][0], p[1][0]) not in cells]
+            stale = [p for p in pairs if cells.get((p[0][0], p[1][0]), {}).get('stale')]
+            if refresh == 'now':
+                missing += stale
+                stale = []
+
+            # Offline estimates answer first; Google replaces them (now, or in the
+            # background when refresh='background') and they remain if it can't
+            if missing and self.estimates:
+                conn = conn or self._connect()
+                estimated = self._estimate(conn, missing)
+                cells.update(estimated)
+                if refresh == 'background':
+                    stale += [p for p in missing if (p[0][0], p[1][0]) in estimated
+                              and (p[0][0], p[1][0]) not in unroutable]
+                    missing = [p for p in missing if (p[0][0], p[1][0]) not in estimated]
+
+            missing = [p for p in missing if (p[0][0], p[1][0]) not in unroutable]
+            if missing and self.enabled:
+                conn = conn or self._connect()
+                try:
+                    cells.update(self._fetch(conn, missing))
+                except DistanceMatrixError as e:
+                    print(f"Distance lookup failed: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+
+        if refresh == 'background' and stale and self.enabled:
+            self.refresh_async(stale)
+        return cells
+
+    def _estimate(self, conn, pairs):
+        """Estimate cells for pairs whose locations both have coordinates"""
+        try:
+            model = distance_estimator.estimator.model(conn, self.db_path)
+        except sqlite3.Error as e:
+            print(f"Distance estimate unavailable: {e}")
+            return {}
+        cells = {}
+        for (origin, _), (destination, _) in pairs:
+            miles = model.miles(origin, destination)
+            if miles is not None:
+                cells[(origin, destination)] = {
+                    'miles': round(miles, 1),
+                    'duration_seconds': None,
+                    'source': ESTIMATE_SOURCE,
+                    'stale': True,
+                }
+        return cells
+
+    def distance(self, origin, destination, refresh='background'):
+        """Single (name, place) pair; the cell dict or None"""
+        return self.matrix([origin], [destination], refresh).get((origin[0], destination[0]))
+
+    # ----- background refresh -----
+
+    def refresh_async(self, pairs):
+        """Queue stale pairs for refresh; pairs already queued are skipped"""
+        with self._lock:
+            pending = [p for p in pairs if (p[0][0], p[1][0]) not in self._refreshing]
+            if not pending:
+                return None
+            self._refreshing.update((p[0][0], p[1][0]) for p in pending)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mileage-refresh')
+        return self._executor.submit(self._refresh, pending)
+
+    def _refresh(self, pairs):
+        conn = self._connect()
+        try:
+            self._fetch(conn, pairs)
+        except Exception as e:
+            print(f"Mileage refresh failed: {e}")
+        finally:
+            conn.close()
+            with self._lock:
+                self._refreshing.difference_update((p[0][0], p[1][0]) for p in pairs)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_service(db_path, api_key=None):
+    """Shared service per database (and key), so clients and refresh threads are reused"""
+    key = (os.path.abspath(db_path), api_key)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = DistanceMatrixService(db_path, api_key=api_key)
+        return _services[key]
@@ -11,6 +11,8 @@ import database as db
 import json
 import base64
 import sqlite3
+from blob_store import save_blob, load_blob, ensure_blob_tables, ensure_blob_column
+from preview_cache import get_preview
 
 class DocumentManager:
     """Manages all document uploads and tracking"""
@@ -50,6 +52,10 @@ class DocumentManager:
                 ON move_documents(move_id, document_type)
             """)
             
+            # File bytes live in the blob store; rows keep the sha256 reference
+            ensure_blob_tables(conn)
+            ensure_blob_column(conn, 'move_documents')
+            
             # Add document tracking columns to moves table if not exist
             cursor.execute("PRAGMA table_info(moves)")
             columns = [col[1] for col in cursor.fetchall()]
@@ -82,13 +88,16 @@ class DocumentManager:
         cursor = conn.cursor()
         
         try:
+            # Store file bytes in the blob store (deduplicated by content)
+            blob_sha256, _ = save_blob(conn, file_data)
+            
             # Insert document record
             cursor.execute("""
                 INSERT INTO move_documents (
-                    move_id, document_type, file_name, file_data,
+                    move_id, document_type, file_name, blob_sha256,
                     uploaded_by, uploaded_by_role
                 ) VALUES (?, ?, ?, ?, ?, ?)
-            """, (move_id, doc_type, file_name, file_data, uploaded_by, user_role))
+            """, (move_id, doc_type, file_name, blob_sha256, uploaded_by, user_role))
             
             # Update move record based on document type
             if doc_type == 'pod_fleet_receipt':
@@ -173,7 +182,7 @@ class DocumentManager:
                 """, (move_id,))
     
     def get_move_documents(self, move_id):
-        """Get all documents for a move"""
+        """Get all documents for a move (metadata only, see get_document_data)"""
         conn = db.get_connection()
         cursor = conn.cursor()
         
@@ -184,7 +193,9 @@ class DocumentManager:
                 uploaded_by,
                 uploaded_by_role,
                 upload_timestamp,
-                verified
+                verified,
+                id,
+                blob_sha256
             FROM move_documents
             WHERE move_id = ?
             ORDER BY upload_timestamp DESC
@@ -198,11 +209,28 @@ class DocumentManager:
                 'uploaded_by': row[2],
                 'role': row[3],
                 'timestamp': row[4],
-                'verified': row[5]
+                'verified': row[5],
+                'id': row[6],
+                'blob_sha256': row[7]
             })
         
         conn.close()
         return documents
+    
+    def get_document_data(self, document_id):
+        """Full file bytes for one document, loaded on demand"""
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT blob_sha256, file_data FROM move_documents WHERE id = ?",
+            (document_id,)
+        )
+        row = cursor.fetchone()
+        conn.close()
+        
+        if not row:
+            return None
+        return load_blob(*row)
 
 
 def show_driver_document_upload(driver_name, move_id):
@@ -366,6 +394,10 @@ def show_driver_document_upload(driver_name, move_id):
                 
                 st.write(f"{doc_emoji} {doc['type'].replace('_', ' ').title()}")
                 st.caption(f"By: {doc['uploaded_by']} ({doc['role']}) - {doc['timestamp']}")
+                
+                preview = get_preview(doc['blob_sha256'])
+                if preview:
+                    st.image(preview, width=160)
 
 
 def show_admin_document_management(move_id):
@@ -0,0 +1,270 @@
+"""
+In-process event broker for realtime updates
+Writers publish change and notification events once their transaction
+commits; subscribers (Streamlit sessions, SSE and WebSocket clients) receive
+only the events meant for their role/user. A single relay thread per process
+tails data_changes and realtime_notifications so writes made by another
+process (API vs Streamlit) are delivered too - one cheap query per second per
+process instead of a poll per session.
+"""
+
+import asyncio
+import json
+import queue
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import datetime
+
+# Events buffered per subscriber before the oldest are dropped
+MAX_QUEUE = 200
+
+# Event keys remembered for de-duplication (local publish + relay)
+SEEN_KEYS = 5000
+
+RELAY_INTERVAL = 1.0
+
+
+def change_event(change_id, entity_type, entity_id, action, data=None, changed_by=None, changed_at=None):
+    """Event for a row in data_changes"""
+    return {
+        'kind': 'change',
+        'key': ('change', change_id),
+        'type': f"{entity_type}_{action}",
+        'entity_type': entity_type,
+        'entity_id': str(entity_id),
+        'action': action,
+        'data': data,
+        'changed_by': changed_by,
+        'created_at': str(changed_at or datetime.now()),
+        'target_role': None,
+        'target_user': None,
+    }
+
+
+def notification_event(notification_id, target_role, target_user, notification_type,
+                       priority=0, data=None, created_at=None):
+    """Event for a row in realtime_notifications"""
+    return {
+        'kind': 'notification',
+        'key': ('notification', notification_id),
+        'type': notification_type,
+        'notification_id': notification_id,
+        'priority': priority,
+        'data': data,
+        'created_at': str(created_at or datetime.now()),
+        'target_role': target_role,
+        'target_user': target_user,
+    }
+
+
+class Subscription:
+    """One consumer's filtered event queue
+
+    Sync consumers use get()/drain(); asyncio consumers pass loop= and await next().
+    """
+
+    def __init__(self, broker, role=None, user=None, kinds=None, maxsize=MAX_QUEUE, loop=None):
+        self.broker = broker
+        self.role = role
+        self.user = user
+        self.kinds = set(kinds) if kinds else None
+        self.loop = loop
+        self.dropped = 0
+        if loop is None:
+            self._queue = queue.Queue(maxsize)
+        else:
+            self._queue = asyncio.Queue(maxsize)
+
+    def matches(self, event):
+        if self.kinds is not None and event['kind'] not in self.kinds:
+            return False
+        if event.get('target_user') and event['target_user'] != self.user:
+            return False
+        if event.get('target_role') and event['target_role'] != self.role:
+            return False
+        return True
+
+    def _put(self, event):
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except (queue.Full, asyncio.QueueFull):
+                # Slow consumer - drop the oldest event
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except (queue.Empty, asyncio.QueueEmpty):
+                    pass
+
+    def deliver(self, event):
+        if self.loop is None:
+            self._put(event)
+        else:
+            try:
+                self.loop.call_soon_threadsafe(self._put, event)
+            except RuntimeError:
+                # Event loop already closed
+                self.close()
+
+    def get(self, timeout=None):
+        """Next event, or None after timeout (sync subscriptions)"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        """All queued events without waiting"""
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except (queue.Empty, asyncio.QueueEmpty):
+                return events
+
+    async def next(self, timeout=None):
+        """Next event, or None after timeout (asyncio subscriptions)"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """Thread-safe fan-out of events to matching subscriptions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Weak so abandoned Streamlit sessions don't keep queues alive
+        self._subscriptions = weakref.WeakSet()
+        self._seen = OrderedDict()
+        self._sequence = 0
+
+    def subscribe(self, role=None, user=None, kinds=None, maxsize=MAX_QUEUE, loop=None):
+        subscription = Subscription(self, role, user, kinds, maxsize, loop)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        """Deliver event to every matching subscriber; False if already published"""
+        key = event.get('key')
+        with self._lock:
+            if key is not None:
+                if key in self._seen:
+                    return False
+                self._seen[key] = True
+                while len(self._seen) > SEEN_KEYS:
+                    self._seen.popitem(last=False)
+            self._sequence += 1
+            event = dict(event, id=self._sequence)
+            subscribers = [s for s in self._subscriptions if s.matches(event)]
+
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return True
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+
+# Shared broker for the process
+broker = EventBroker()
+
+
+class ChangeRelay(threading.Thread):
+    """Publishes rows other processes added to data_changes / realtime_notifications"""
+
+    def __init__(self, connect, event_broker=None, interval=RELAY_INTERVAL):
+        super().__init__(name='event-relay', daemon=True)
+        self.connect = connect
+        self.broker = event_broker or broker
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self.last_change_id = None
+        self.last_notification_id = None
+        self.last_error = None
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        conn = self.connect()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    self.poll(conn)
+                    self.last_error = None
+                except Exception as e:
+                    # Tables may not exist yet on a fresh database - report once
+                    if str(e) != self.last_error:
+                        print(f"Event relay poll failed: {e}")
+                        self.last_error = str(e)
+                finally:
+                    if conn.in_transaction:
+                        conn.rollback()
+                self._stop_event.wait(self.interval)
+        finally:
+            conn.close()
+
+    def _max_id(self, conn, table):
+        return conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+    def poll(self, conn):
+        # Start from "now" - history is served by /api/changes, not the relay
+        if self.last_change_id is None:
+            self.last_change_id = self._max_id(conn, 'data_changes')
+        if self.last_notification_id is None:
+            self.last_notification_id = self._max_id(conn, 'realtime_notifications')
+
+        for change_id, entity_type, entity_id, action, changed_by, changed_at in conn.execute("""
+            SELECT id, entity_type, entity_id, action, changed_by, changed_at
+            FROM data_changes WHERE id > ? ORDER BY id
+        """, (self.last_change_id,)).fetchall():
+            self.broker.publish(change_event(change_id, entity_type, entity_id, action,
+                                             changed_by=changed_by, changed_at=changed_at))
+            self.last_change_id = change_id
+
+        for row in conn.execute("""
+            SELECT id, target_role, target_user, notification_type, priority, data, created_at
+            FROM realtime_notifications WHERE id > ? ORDER BY id
+        """, (self.last_notification_id,)).fetchall():
+            notification_id, target_role, target_user, notification_type, priority, data, created_at = row
+            self.broker.publish(notification_event(
+                notification_id, target_role, target_user, notification_type, priority,
+                json.loads(data) if data else None, created_at
+            ))
+            self.last_notification_id = notification_id
+
+
+_relay = None
+_relay_lock = threading.Lock()
+
+
+def start_relay(connect, interval=RELAY_INTERVAL):
+    """Start the process-wide relay once; returns it"""
+    global _relay
+    with _relay_lock:
+        if _relay is None or not _relay.is_alive():
+            _relay = ChangeRelay(connect, interval=interval)
+            _relay.start()
+    return _relay
+
+
+def stop_relay():
+    global _relay
+    with _relay_lock:
+        if _relay is not None:
+            _relay.stop()
+            _relay.join(timeout=5)
+            _relay = None
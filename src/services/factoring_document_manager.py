@@ -10,6 +10,8 @@ from datetime import datetime
 import os
 import base64
 import json
+from blob_store import save_blob, load_blob, release_blob, ensure_blob_tables, ensure_blob_column
+from preview_cache import get_preview
 
 def get_connection():
     return sqlite3.connect('trailer_tracker_streamlined.db')
@@ -36,6 +38,10 @@ def create_document_tables():
         FOREIGN KEY (move_id) REFERENCES moves(move_id)
     )''')
     
+    # File bytes live in the blob store; rows keep the sha256 reference
+    ensure_blob_tables(conn)
+    ensure_blob_column(conn, 'factoring_documents')
+    
     # Document requirements table
     cursor.execute('''CREATE TABLE IF NOT EXISTS document_requirements (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -218,16 +224,15 @@ def save_document(move_id, doc_type, file_obj):
     conn = get_connection()
     cursor = conn.cursor()
     
-    # Read file data
-    file_data = file_obj.read()
+    # Stream file into the blob store (deduplicated by content)
     file_name = file_obj.name
-    file_size = len(file_data)
+    blob_sha256, file_size = save_blob(conn, file_obj, getattr(file_obj, 'type', None))
     
-    # Save to database
+    # Save metadata to database
     cursor.execute('''INSERT INTO factoring_documents 
-                     (move_id, document_type, file_name, file_data, file_size, uploaded_by)
+                     (move_id, document_type, file_name, blob_sha256, file_size, uploaded_by)
                      VALUES (?, ?, ?, ?, ?, ?)''',
-                  (move_id, doc_type, file_name, file_data, file_size, 
+                  (move_id, doc_type, file_name, blob_sha256, file_size, 
                    st.session_state.get('user', 'System')))
     
     # Update document requirements
@@ -318,8 +323,9 @@ def show_document_verification():
     cursor = conn.cursor()
     
     # Get unverified documents
+    # Metadata only - file bytes are read when a document is opened
     cursor.execute('''SELECT fd.id, fd.move_id, fd.document_type, fd.file_name,
-                            fd.uploaded_by, fd.uploaded_at, m.driver_name
+                            fd.uploaded_by, fd.uploaded_at, m.driver_name, fd.blob_sha256
                      FROM factoring_documents fd
                      JOIN moves m ON fd.move_id = m.move_id
                      WHERE fd.verified = 0
@@ -328,7 +334,7 @@ def show_document_verification():
     
     if unverified:
         for doc in unverified:
-            doc_id, move_id, doc_type, file_name, uploaded_by, uploaded_at, driver = doc
+            doc_id, move_id, doc_type, file_name, uploaded_by, uploaded_at, driver, blob_sha256 = doc
             
             with st.expander(f"📄 {move_id} - {doc_type}", expanded=True):
                 col1, col2, col3 = st.columns([2, 1, 1])
@@ -343,13 +349,17 @@ def show_document_verification():
                     - Uploaded by: {uploaded_by}
                     - Date: {uploaded_at}
                     """)
+                    
+                    preview = get_preview(blob_sha256)
+                    if preview:
+                        st.image(preview, caption=file_name)
                 
                 with col2:
                     # View document button
                     if st.button(f"View Document", key=f"view_{doc_id}"):
-                        cursor.execute('SELECT file_data FROM factoring_documents WHERE id = ?',
+                        cursor.execute('SELECT blob_sha256, file_data FROM factoring_documents WHERE id = ?',
                                      (doc_id,))
-                        file_data = cursor.fetchone()[0]
+                        file_data = load_blob(*cursor.fetchone())
                         
                         # Create download link
                         b64 = base64.b64encode(file_data).decode()
@@ -531,7 +541,7 @@ def show_document_archive():
     # Build query
     query = '''SELECT fd.id, fd.move_id, m.driver_name, fd.document_type, 
                      fd.file_name, fd.file_size, fd.uploaded_by, fd.uploaded_at,
-                     fd.verified, fd.verified_by
+                     fd.verified, fd.verified_by, fd.blob_sha256
               FROM factoring_documents fd
               JOIN moves m ON fd.move_id = m.move_id
               WHERE 1=1'''
@@ -559,7 +569,7 @@ def show_document_archive():
     if documents:
         # Display documents
         for doc in documents:
-            doc_id, move_id, driver, doc_type, file_name, file_size, uploaded_by, uploaded_at, verified, verified_by = doc
+            doc_id, move_id, driver, doc_type, file_name, file_size, uploaded_by, uploaded_at, verified, verified_by, blob_sha256 = doc
             
             with st.expander(f"📄 {move_id} - {doc_type} - {file_name}"):
                 col1, col2, col3 = st.columns([2, 1, 1])
@@ -579,12 +589,16 @@ def show_document_archive():
                         st.success(f"✅ Verified by {verified_by}")
                     else:
                         st.warning("⏳ Pending verification")
+                    
+                    preview = get_preview(blob_sha256)
+                    if preview:
+                        st.image(preview, caption=file_name)
                 
                 with col2:
                     if st.button(f"Download", key=f"download_{doc_id}"):
-                        cursor.execute('SELECT file_data FROM factoring_documents WHERE id = ?',
+                        cursor.execute('SELECT blob_sha256, file_data FROM factoring_documents WHERE id = ?',
                                      (doc_id,))
-                        file_data = cursor.fetchone()[0]
+                        file_data = load_blob(*cursor.fetchone())
                         
                         st.download_button(
                             "💾 Save File",
@@ -596,6 +610,9 @@ def show_document_archive():
                 with col3:
                     if st.session_state.get('user_role') in ['Owner', 'Admin']:
                         if st.button(f"Delete", key=f"delete_{doc_id}"):
+                            cursor.execute('SELECT blob_sha256 FROM factoring_documents WHERE id = ?',
+                                         (doc_id,))
+                            release_blob(conn, cursor.fetchone()[0])
                             cursor.execute('DELETE FROM factoring_documents WHERE id = ?',
                                          (doc_id,))
                             conn.commit()
@@ -8,6 +8,8 @@ import os
 from datetime import datetime
 import googlemaps
 from typing import Dict, Optional, Tuple
+from batch_geocoder import BatchGeocoder, GoogleGeocoder
+from distance_matrix import ESTIMATE_SOURCE, get_service
 
 class GoogleMapsIntegration:
     def __init__(self, api_key: Optional[str] = None):
@@ -22,6 +24,16 @@ class GoogleMapsIntegration:
             self.gmaps = None
             self.enabled = False
             print("Google Maps API key not found. Using fallback calculations.")
+        
+        # Batched, cached Distance Matrix lookups (shared per database)
+        self.distances = get_service(self.db_path, self.api_key)
+        self.geocoder = BatchGeocoder(GoogleGeocoder(self.api_key))
+    
+    def _geocode_address(self, title, address, city, state, zip_code) -> str:
+        """Address string to geocode for a location row"""
+        if address and address != 'Address TBD':
+            return f"{address}, {city}, {state} {zip_code}"
+        return f"{title}, {city}, {state}"
     
     def geocode_location(self, location_id: int) -> Dict:
         """Get coordinates for a location using Google Maps Geocoding API"""
@@ -42,149 +54,82 @@ class GoogleMapsIntegration:
             conn.close()
             return {'success': False, 'message': 'Location not found'}
         
-        title, address, city, state, zip_code = location
-        
-        # Build address string
-        if address and address != 'Address TBD':
-            full_address = f"{address}, {city}, {state} {zip_code}"
-        else:
-            full_address = f"{title}, {city}, {state}"
-        
         try:
-            # Geocode the address
-            geocode_result = self.gmaps.geocode(full_address)
-            
-            if geocode_result:
-                lat = geocode_result[0]['geometry']['location']['lat']
-                lng = geocode_result[0]['geometry']['location']['lng']
-                formatted_address = geocode_result[0]['formatted_address']
-                
-                # Update database with coordinates
-                cursor.execute('''
-                    UPDATE locations 
-                    SET latitude = ?, longitude = ?
-                    WHERE id = ?
-                ''', (lat, lng, location_id))
-                
-                conn.commit()
-                conn.close()
-                
-                return {
-                    'success': True,
-                    'latitude': lat,
-                    'longitude': lng,
-                    'formatted_address': formatted_address
-                }
+            result = self.geocoder.geocode_locations(conn, [(location_id, self._geocode_address(*location))])
         except Exception as e:
-            conn.close()
             return {'success': False, 'message': str(e)}
+        finally:
+            conn.close()
         
-        conn.close()
-        return {'success': False, 'message': 'Geocoding failed'}
+        result = result[location_id]
+        if result['status'] != 'OK':
+            return {'success': False, 'message': f"Geocoding failed: {result['status']}"}
+        return {
+            'success': True,
+            'latitude': result['latitude'],
+            'longitude': result['longitude'],
+            'formatted_address': result['formatted_address']
+        }
+    
+    def _place(self, row) -> object:
+        """Distance Matrix place for a (title, address, city, state, zip, lat, lng) row"""
+        title, address, city, state, zip_code, lat, lng = row
+        if lat and lng:
+            return (lat, lng)
+        return f"{address}, {city}, {state} {zip_code}"
+    
+    def _route_info(self, origin_title: str, dest_title: str, cell: Optional[Dict]) -> Dict:
+        """Route dict for a distance_matrix cell, or established values without one"""
+        payout_miles = self._get_payout_miles(origin_title, dest_title)
+        
+        if not cell:
+            return {
+                'success': True,
+                'actual_miles_one_way': payout_miles / 2,
+                'actual_miles_round_trip': payout_miles,
+                'payout_miles': payout_miles,
+                'duration_one_way': 'N/A',
+                'duration_hours': 0,
+                'google_distance_text': 'Using established route data',
+                'note': 'Google Maps API not available - using established values'
+            }
+        
+        duration_seconds = cell['duration_seconds'] or 0
+        estimated = cell['source'] == ESTIMATE_SOURCE
+        return {
+            'success': True,
+            'actual_miles_one_way': cell['miles'],
+            'actual_miles_round_trip': cell['miles'] * 2,
+            'payout_miles': payout_miles,  # Keep our established calculation
+            'duration_one_way': f"{duration_seconds // 3600} hours {duration_seconds % 3600 // 60} mins"
+                                if duration_seconds else 'N/A',
+            'duration_hours': duration_seconds / 3600,
+            'google_distance_text': f"{'~' if estimated else ''}{cell['miles']:,.1f} mi",
+            'note': 'Estimated from coordinates - using established payout miles for earnings'
+                    if estimated else 'Using established payout miles for earnings calculation'
+        }
     
     def get_route_distance(self, origin_id: int, destination_id: int) -> Dict:
         """Get actual route distance using Google Maps Distance Matrix API"""
-        if not self.enabled:
-            return self._get_fallback_distance(origin_id, destination_id)
-        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # Get location coordinates or addresses
         cursor.execute('''
-            SELECT location_title, address, city, state, zip_code, latitude, longitude
+            SELECT id, location_title, address, city, state, zip_code, latitude, longitude
             FROM locations WHERE id IN (?, ?)
         ''', (origin_id, destination_id))
-        
-        locations = cursor.fetchall()
-        if len(locations) != 2:
-            conn.close()
-            return self._get_fallback_distance(origin_id, destination_id)
-        
-        # Build origin and destination strings
-        origin_data = locations[0] if locations[0][0].startswith('Fleet') else locations[1]
-        dest_data = locations[1] if locations[1][0].startswith('FedEx') else locations[0]
-        
-        # Use coordinates if available, otherwise use address
-        if origin_data[5] and origin_data[6]:  # Has lat/lng
-            origin = (origin_data[5], origin_data[6])
-        else:
-            origin = f"{origin_data[1]}, {origin_data[2]}, {origin_data[3]} {origin_data[4]}"
-        
-        if dest_data[5] and dest_data[6]:  # Has lat/lng
-            destination = (dest_data[5], dest_data[6])
-        else:
-            destination = f"{dest_data[1]}, {dest_data[2]}, {dest_data[3]} {dest_data[4]}"
-        
-        try:
-            # Get distance matrix
-            matrix = self.gmaps.distance_matrix(
-                origins=[origin],
-                destinations=[destination],
-                mode="driving",
-                units="imperial"
-            )
-            
-            if matrix['status'] == 'OK':
-                element = matrix['rows'][0]['elements'][0]
-                
-                if element['status'] == 'OK':
-                    # Get one-way distance
-                    distance_text = element['distance']['text']
-                    distance_miles = element['distance']['value'] * 0.000621371  # meters to miles
-                    duration_text = element['duration']['text']
-                    duration_hours = element['duration']['value'] / 3600  # seconds to hours
-                    
-                    # Calculate round trip
-                    round_trip_miles = distance_miles * 2
-                    
-                    # Get our established payout for this route
-                    payout_miles = self._get_payout_miles(origin_data[0], dest_data[0])
-                    
-                    conn.close()
-                    
-                    return {
-                        'success': True,
-                        'actual_miles_one_way': distance_miles,
-                        'actual_miles_round_trip': round_trip_miles,
-                        'payout_miles': payout_miles,  # Keep our established calculation
-                        'duration_one_way': duration_text,
-                        'duration_hours': duration_hours,
-                        'google_distance_text': distance_text,
-                        'note': 'Using established payout miles for earnings calculation'
-                    }
-        except Exception as e:
-            print(f"Google Maps API error: {e}")
-        
-        conn.close()
-        return self._get_fallback_distance(origin_id, destination_id)
-    
-    def _get_fallback_distance(self, origin_id: int, destination_id: int) -> Dict:
-        """Get fallback distance based on established routes"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get location names
-        cursor.execute('SELECT location_title FROM locations WHERE id = ?', (origin_id,))
-        origin = cursor.fetchone()[0] if cursor.fetchone() else 'Unknown'
-        
-        cursor.execute('SELECT location_title FROM locations WHERE id = ?', (destination_id,))
-        dest = cursor.fetchone()[0] if cursor.fetchone() else 'Unknown'
-        
+        locations = {row[0]: row[1:] for row in cursor.fetchall()}
         conn.close()
         
-        payout_miles = self._get_payout_miles(origin, dest)
+        origin = locations.get(origin_id)
+        dest = locations.get(destination_id)
+        if not origin or not dest:
+            return self._route_info(origin[0] if origin else 'Unknown',
+                                    dest[0] if dest else 'Unknown', None)
         
-        return {
-            'success': True,
-            'actual_miles_one_way': payout_miles / 2,
-            'actual_miles_round_trip': payout_miles,
-            'payout_miles': payout_miles,
-            'duration_one_way': 'N/A',
-            'duration_hours': 0,
-            'google_distance_text': 'Using established route data',
-            'note': 'Google Maps API not available - using established values'
-        }
+        # Cached, estimated (offline) or fetched from Google, in that order
+        cell = self.distances.distance((origin[0], self._place(origin)), (dest[0], self._place(dest)))
+        return self._route_info(origin[0], dest[0], cell)
     
     def _get_payout_miles(self, origin: str, destination: str) -> float:
         """Get established payout miles for a route"""
@@ -225,7 +170,11 @@ class GoogleMapsIntegration:
         return 450.0
     
     def update_all_locations(self):
-        """Geocode all locations that don't have coordinates"""
+        """Geocode all locations that don't have coordinates
+        
+        Runs as one batch: concurrent rate-limited requests, answers cached in
+        geocode_cache, and every coordinate update in one executemany.
+        """
         if not self.enabled:
             return {'success': False, 'message': 'API not enabled'}
         
@@ -234,22 +183,27 @@ class GoogleMapsIntegration:
         
         # Get locations without coordinates
         cursor.execute('''
-            SELECT id, location_title 
+            SELECT id, location_title, address, city, state, zip_code
             FROM locations 
             WHERE (latitude IS NULL OR longitude IS NULL)
             AND address != 'Address TBD'
         ''')
         
         locations = cursor.fetchall()
-        conn.close()
+        try:
+            geocoded = self.geocoder.geocode_locations(
+                conn, [(row[0], self._geocode_address(*row[1:])) for row in locations]
+            )
+        finally:
+            conn.close()
         
         results = []
-        for loc_id, title in locations:
-            result = self.geocode_location(loc_id)
+        for loc_id, title, *_ in locations:
+            status = geocoded[loc_id]['status']
             results.append({
                 'location': title,
-                'success': result['success'],
-                'message': result.get('message', 'Geocoded successfully')
+                'success': status == 'OK',
+                'message': 'Geocoded successfully' if status == 'OK' else f"Geocoding failed: {status}"
             })
         
         return {
@@ -260,24 +214,43 @@ class GoogleMapsIntegration:
         }
     
     def get_route_suggestions(self, origin_id: int) -> list:
-        """Get route suggestions with actual vs payout miles"""
+        """Get route suggestions with actual vs payout miles
+        
+        All FedEx hubs are looked up as one origin x destination matrix, so
+        this is a single cached read (and at most a few batched API requests).
+        """
         routes = []
         
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        cursor.execute('''
+            SELECT location_title, address, city, state, zip_code, latitude, longitude
+            FROM locations WHERE id = ?
+        ''', (origin_id,))
+        origin = cursor.fetchone()
+        
         # Get all FedEx locations
         cursor.execute('''
-            SELECT id, location_title, city, state
+            SELECT id, location_title, address, city, state, zip_code, latitude, longitude
             FROM locations
             WHERE location_type = 'fedex_hub'
             ORDER BY location_title
         ''')
-        
         destinations = cursor.fetchall()
+        conn.close()
         
-        for dest_id, title, city, state in destinations:
-            distance_info = self.get_route_distance(origin_id, dest_id)
+        origin_title = origin[0] if origin else 'Unknown'
+        cells = {}
+        if origin:
+            cells = self.distances.matrix(
+                [(origin_title, self._place(origin))],
+                [(row[1], self._place(row[1:])) for row in destinations]
+            )
+        
+        for dest in destinations:
+            dest_id, title, city, state = dest[0], dest[1], dest[3], dest[4]
+            distance_info = self._route_info(origin_title, title, cells.get((origin_title, title)))
             
             routes.append({
                 'destination': f"{title} - {city}, {state}",
@@ -288,8 +261,6 @@ class GoogleMapsIntegration:
                 'duration': distance_info.get('duration_one_way', 'N/A')
             })
         
-        conn.close()
-        
         # Sort by earnings
         routes.sort(key=lambda x: x['earnings'], reverse=True)
         
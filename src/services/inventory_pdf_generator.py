@@ -4,17 +4,20 @@ Smith & Williams Trucking LLC
 All trailer information sections restored
 """
 
-import os
 import sqlite3
 from datetime import datetime, date
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
+from reportlab.lib.enums import TA_RIGHT, TA_LEFT
 from reportlab.pdfgen import canvas
 
+try:
+    from src.services.pdf_toolkit import STYLES, company_letterhead
+except ImportError:
+    from pdf_toolkit import STYLES, company_letterhead
+
 # DATABASE - Use the same as app.py
 DB_PATH = 'smith_williams_trucking.db'
 
@@ -30,49 +33,8 @@ COMPANY = {
     'owner': 'Brandon Smith'
 }
 
-def add_letterhead(canvas, doc):
-    """Add company letterhead to EVERY page"""
-    canvas.saveState()
-    
-    # Logo
-    if os.path.exists('swt_logo_white.png'):
-        try:
-            canvas.drawImage('swt_logo_white.png', 0.75*inch, doc.pagesize[1] - 1.2*inch,
-                           width=1.2*inch, height=0.6*inch, preserveAspectRatio=True)
-        except:
-            pass
-    
-    # Company Name
-    canvas.setFont('Helvetica-Bold', 16)
-    canvas.setFillColor(colors.HexColor('#003366'))
-    canvas.drawString(2.2*inch, doc.pagesize[1] - 0.85*inch, COMPANY['name'])
-    
-    # Address
-    canvas.setFont('Helvetica', 10)
-    canvas.setFillColor(colors.black)
-    canvas.drawString(2.2*inch, doc.pagesize[1] - 1*inch, COMPANY['address'])
-    canvas.drawString(2.2*inch, doc.pagesize[1] - 1.15*inch, f"{COMPANY['dot']} | {COMPANY['mc']}")
-    
-    # Contact
-    canvas.drawRightString(doc.pagesize[0] - inch, doc.pagesize[1] - 0.85*inch, f"Phone: {COMPANY['phone']}")
-    canvas.drawRightString(doc.pagesize[0] - inch, doc.pagesize[1] - 1*inch, COMPANY['email'])
-    canvas.drawRightString(doc.pagesize[0] - inch, doc.pagesize[1] - 1.15*inch, COMPANY['website'])
-    
-    # Header Line
-    canvas.setStrokeColor(colors.HexColor('#DC143C'))
-    canvas.setLineWidth(2)
-    canvas.line(inch, doc.pagesize[1] - 1.4*inch, doc.pagesize[0] - inch, doc.pagesize[1] - 1.4*inch)
-    
-    # Footer
-    canvas.setStrokeColor(colors.HexColor('#003366'))
-    canvas.line(inch, 0.8*inch, doc.pagesize[0] - inch, 0.8*inch)
-    
-    canvas.setFont('Helvetica', 8)
-    canvas.drawString(inch, 0.6*inch, f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}")
-    canvas.drawRightString(doc.pagesize[0] - inch, 0.6*inch, f"Page {doc.page}")
-    canvas.drawCentredString(doc.pagesize[0]/2, 0.4*inch, f"© {COMPANY['name']}")
-    
-    canvas.restoreState()
+# Company letterhead on EVERY page (drawn once per document)
+add_letterhead = company_letterhead(COMPANY)
 
 def generate_inventory_pdf():
     """Generate DETAILED inventory report with all sections"""
@@ -144,16 +106,14 @@ def generate_inventory_pdf():
                           leftMargin=0.75*inch, rightMargin=0.75*inch)
     
     elements = []
-    styles = getSampleStyleSheet()
     
     # Title
-    title_style = ParagraphStyle('Title', fontSize=24, textColor=colors.HexColor('#003366'),
-                                alignment=TA_CENTER, spaceAfter=30)
+    title_style = STYLES['ReportTitle']
     elements.append(Paragraph("TRAILER INVENTORY REPORT", title_style))
     elements.append(Spacer(1, 0.2*inch))
     
     # Enhanced Summary with all stats
-    info_style = ParagraphStyle('Info', fontSize=11, leftIndent=20)
+    info_style = STYLES['Info']
     
     summary_html = f"""
     <b>INVENTORY SUMMARY</b><br/><br/>
@@ -167,8 +127,7 @@ def generate_inventory_pdf():
     elements.append(Spacer(1, 0.3*inch))
     
     # Section 1: NEW TRAILERS AT FLEET MEMPHIS (Ready for delivery)
-    section_style = ParagraphStyle('Section', fontSize=14, textColor=colors.HexColor('#28a745'),
-                                  fontName='Helvetica-Bold', spaceAfter=10)
+    section_style = STYLES['Section']
     
     elements.append(Paragraph("NEW TRAILERS AT FLEET MEMPHIS (Ready for Delivery)", section_style))
     
@@ -5,6 +5,7 @@ from io import BytesIO
 import database as db
 import utils
 import branding
+import report_jobs
 
 # Try to import reportlab, but continue without it if not available
 try:
@@ -184,12 +185,15 @@ def generate_contractor_invoice():
                     with col1:
                         if st.button(f"📄 Generate Update", key=f"gen_{move['id']}"):
                             pdf_moves = pd.DataFrame([move])
-                            pdf = generate_contractor_update_pdf(move['assigned_driver'], pdf_moves, update_frequency, rate_confirmation_deadline)
-                            st.download_button(
-                                label="💾 Download",
-                                data=pdf,
+                            st.session_state[f"update_job_{move['id']}"] = report_jobs.submit_report(
+                                'contractor_update', contractor_name=move['assigned_driver'], moves_df=pdf_moves,
+                                update_frequency=update_frequency, deadline=rate_confirmation_deadline
+                            )
+                        if st.session_state.get(f"update_job_{move['id']}"):
+                            report_jobs.show_report_job(
+                                st.session_state[f"update_job_{move['id']}"],
                                 file_name=f"rate_confirmation_load_{move['id']}_{datetime.now().strftime('%Y%m%d')}.txt",
-                                mime="text/plain",
+                                label="💾 Download",
                                 key=f"dl_{move['id']}"
                             )
                     with col2:
@@ -238,12 +242,15 @@ def generate_contractor_invoice():
                     col1, col2, col3, col4 = st.columns(4)
                     with col1:
                         if st.button(f"📄 Generate Update", key=f"pdf_{contractor['Contractor']}"):
-                            pdf = generate_contractor_update_pdf(contractor['Contractor'], contractor_moves, update_frequency, rate_confirmation_deadline)
-                            st.download_button(
-                                label="💾 Download Update",
-                                data=pdf,
+                            st.session_state[f"update_job_{contractor['Contractor']}"] = report_jobs.submit_report(
+                                'contractor_update', contractor_name=contractor['Contractor'], moves_df=contractor_moves,
+                                update_frequency=update_frequency, deadline=rate_confirmation_deadline
+                            )
+                        if st.session_state.get(f"update_job_{contractor['Contractor']}"):
+                            report_jobs.show_report_job(
+                                st.session_state[f"update_job_{contractor['Contractor']}"],
                                 file_name=f"rate_confirmation_{update_frequency.lower().replace(' ', '_')}_{contractor['Contractor'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.txt",
-                                mime="text/plain",
+                                label="💾 Download Update",
                                 key=f"download_{contractor['Contractor']}"
                             )
                     
@@ -515,6 +522,9 @@ Reference: {datetime.now().strftime('%Y%m%d')}-{contractor_name[:3].upper()}
     buffer.seek(0)
     return buffer.getvalue()
 
+# Built from the moves passed in, so no table versions in its cache key
+report_jobs.register_report('contractor_update', generate_contractor_update_pdf, content_type='text/plain')
+
 def generate_driver_invoice_pdf(driver_name, moves_df, summary):
     """Generate PDF invoice for driver showing net pay"""
     if not REPORTLAB_AVAILABLE:
@@ -0,0 +1,119 @@
+"""
+In-memory location index
+Every location keyed by title and by id, with its resolved full address and
+coordinates. The index is rebuilt only when the locations table version
+changes (see data_cache - triggers bump it on any write), so looking up
+addresses for a list of moves costs one version check instead of a locations
+query per row.
+"""
+
+import threading
+
+import data_cache
+
+
+def full_address(row):
+    """Best mailing address for a locations row (dict), or None"""
+    if row.get('full_address'):
+        return row['full_address']
+
+    # Build from components
+    if row.get('street_address'):
+        parts = [str(row[c]) for c in ('street_address', 'city', 'state', 'zip_code') if row.get(c)]
+        return ', '.join(parts) + ', USA'
+
+    for column in ('location_address', 'address'):
+        if row.get(column):
+            return row[column]
+    return None
+
+
+def coordinates(row):
+    """(lat, lng) from latitude/longitude or a "lat,lng" coordinates column"""
+    if row.get('latitude') is not None and row.get('longitude') is not None:
+        return (row['latitude'], row['longitude'])
+    if row.get('coordinates'):
+        try:
+            lat, lng = (float(part) for part in str(row['coordinates']).split(','))
+            return (lat, lng)
+        except ValueError:
+            pass
+    return None
+
+
+class Locations:
+    """Immutable snapshot of the locations table"""
+
+    def __init__(self, rows):
+        self.by_title = {}
+        self.by_id = {}
+        self.base_location = None
+        for row in rows:
+            entry = {
+                'id': row.get('id'),
+                'title': row.get('location_title'),
+                'full_address': full_address(row),
+                'coordinates': coordinates(row),
+                'row': row,
+            }
+            self.by_title[entry['title']] = entry
+            self.by_id[entry['id']] = entry
+            if row.get('is_base_location') and self.base_location is None:
+                self.base_location = entry['title']
+
+    def get(self, key):
+        """Entry for a location title or id, or None"""
+        return self.by_title.get(key) or self.by_id.get(key)
+
+    def address(self, key):
+        entry = self.get(key)
+        return entry['full_address'] if entry else None
+
+    def place(self, key):
+        """Coordinates when known, else the full address (for distance lookups)"""
+        entry = self.get(key)
+        if not entry:
+            return None
+        return entry['coordinates'] or entry['full_address']
+
+
+class LocationIndex:
+    """Process-wide Locations snapshot per database"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # db_path -> (locations version, Locations)
+        self._snapshots = {}
+        self.loads = 0
+
+    def snapshot(self, conn, db_path):
+        """Current Locations for db_path; reloads only after locations changed"""
+        version = data_cache.cache.tracked_versions(conn, ('locations',))
+
+        with self._lock:
+            entry = self._snapshots.get(db_path)
+            if version is not None and entry is not None and entry[0] == version:
+                return entry[1]
+
+        cursor = conn.execute("SELECT * FROM locations ORDER BY location_title")
+        names = [column[0] for column in cursor.description]
+        locations = Locations([dict(zip(names, row)) for row in cursor.fetchall()])
+        if version is None or conn.in_transaction:
+            # Untracked, or versions that may still roll back: don't keep it
+            return locations
+
+        with self._lock:
+            self._snapshots[db_path] = (version, locations)
+            self.loads += 1
+        return locations
+
+    def invalidate(self, db_path=None):
+        with self._lock:
+            if db_path is None:
+                self._snapshots.clear()
+            else:
+                self._snapshots.pop(db_path, None)
+
+
+# Shared by every module in the process
+index = LocationIndex()
@@ -0,0 +1,332 @@
+"""
+Driver payment receipts and pay period payroll batches
+Shared by pdf_generator and its professional_/universal_ copies: moves for
+every driver come from one query, contractor details from one more, and the
+receipts render in parallel across a process pool.
+"""
+
+import io
+import os
+import sqlite3
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, date
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.lib.units import inch
+
+try:
+    from src.services.pdf_toolkit import STYLES, company_letterhead
+    from src.services.date_contract import day_range
+except ImportError:
+    from pdf_toolkit import STYLES, company_letterhead
+    from date_contract import day_range
+
+# Optional: merging per-driver receipts into one PDF
+try:
+    from pypdf import PdfReader, PdfWriter
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+# Processes rendering receipts in a payroll batch
+PAYROLL_WORKERS = min(4, os.cpu_count() or 1)
+
+# Where payroll batches are written (not the app's working directory)
+PAYROLL_OUTPUT_DIR = os.environ.get('SWT_PAYROLL_DIR', os.path.join(tempfile.gettempdir(), 'swt_payroll'))
+
+# One letterhead per company per process (batch workers build their own)
+_letterheads = {}
+
+
+def letterhead_for(company):
+    key = tuple(sorted(company.items()))
+    if key not in _letterheads:
+        _letterheads[key] = company_letterhead(company)
+    return _letterheads[key]
+
+
+def fix_date(date_input):
+    """Convert any date format to string"""
+    if isinstance(date_input, date):
+        return date_input.strftime('%Y-%m-%d')
+    return str(date_input)
+
+
+def get_contractor_infos(conn, driver_names, company):
+    """Contractor (company, phone, email) for each driver, one query"""
+    found = {}
+    driver_names = list(driver_names)
+    try:
+        for start in range(0, len(driver_names), 500):
+            chunk = driver_names[start:start + 500]
+            cursor = conn.execute(f"""
+                SELECT driver_name, company_name, phone, email FROM drivers
+                WHERE driver_name IN ({', '.join(['?' for _ in chunk])})
+            """, chunk)
+            for name, company_name, phone, email in cursor.fetchall():
+                if company_name:
+                    found[name] = (company_name, phone or 'Not on file', email or 'Not on file')
+    except sqlite3.Error:
+        pass
+
+    infos = {}
+    for driver_name in driver_names:
+        if driver_name in found:
+            infos[driver_name] = found[driver_name]
+        elif driver_name == company['owner']:
+            # Owner special case
+            infos[driver_name] = (company['name'], company['phone'], company['email'])
+        else:
+            infos[driver_name] = (f"{driver_name} Trucking", "Not on file", "Not on file")
+    return infos
+
+
+def fetch_receipt_moves(conn, from_date, to_date, driver_names=None):
+    """Moves in the period grouped by driver: {driver_name: [move rows]}
+
+    One query for any number of drivers (all drivers with moves when
+    driver_names is None). Rows are (move_id, move_date, new_trailer,
+    old_trailer, destination, miles, earnings, status), newest first.
+    """
+    # ISO dates compare as text: a range scan on idx_moves_move_date
+    params = list(day_range(from_date, to_date))
+    driver_filter = ""
+    if driver_names is not None:
+        driver_names = list(driver_names)
+        if not driver_names:
+            return {}
+        driver_filter = f"AND driver_name IN ({', '.join(['?' for _ in driver_names])})"
+        params += driver_names
+
+    cursor = conn.execute(f"""
+        SELECT
+            driver_name,
+            COALESCE(system_id, order_number, 'MOVE-' || id) as move_id,
+            move_date,
+            new_trailer,
+            old_trailer,
+            COALESCE(destination_location, delivery_location, 'Unknown') as destination,
+            COALESCE(estimated_miles, actual_miles, 0) as miles,
+            COALESCE(estimated_earnings, amount, 0) as earnings,
+            status
+        FROM moves
+        WHERE move_date >= ?
+        AND move_date < ?
+        {driver_filter}
+        ORDER BY driver_name, move_date DESC
+    """, params)
+
+    grouped = {}
+    for row in cursor.fetchall():
+        if row[0]:
+            grouped.setdefault(row[0], []).append(tuple(row[1:]))
+    return grouped
+
+
+def receipt_elements(driver_name, contractor, moves, from_date, to_date):
+    """Flowables for one driver's payment receipt"""
+    company_name, phone, email = contractor
+    info_style = STYLES['Info']
+    elements = []
+
+    # Title
+    elements.append(Paragraph("DRIVER PAYMENT RECEIPT", STYLES['ReportTitle']))
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Driver Info WITH Contractor Company
+    info_html = f"""
+    <b>DRIVER INFORMATION</b><br/><br/>
+    <b>Name:</b> {driver_name}<br/>
+    <b>Contractor Company:</b> {company_name}<br/>
+    <b>Phone:</b> {phone}<br/>
+    <b>Email:</b> {email}<br/>
+    <br/>
+    <b>Period:</b> {from_date} to {to_date}<br/>
+    <b>Generated:</b> {datetime.now().strftime('%B %d, %Y')}
+    """
+
+    elements.append(Paragraph(info_html, info_style))
+    elements.append(Spacer(1, 0.3*inch))
+
+    if moves:
+        # Table with moves
+        data = [['Move ID', 'Date', 'New', 'Old', 'Destination', 'Miles', 'Earnings', 'Status']]
+
+        total_earnings = 0
+        total_miles = 0
+
+        for move in moves:
+            earnings = float(move[6]) if move[6] else 0
+            miles = float(move[5]) if move[5] else 0
+            total_earnings += earnings
+            total_miles += miles
+
+            data.append([
+                str(move[0])[:12],
+                str(move[1])[:10],
+                str(move[2])[:8] if move[2] else '-',
+                str(move[3])[:8] if move[3] else '-',
+                str(move[4])[:20],
+                f"{miles:.0f}",
+                f"${earnings:.2f}",
+                move[7]
+            ])
+
+        # Total row
+        data.append(['', '', '', '', 'TOTAL:', f"{total_miles:.0f}", f"${total_earnings:.2f}", ''])
+
+        # Create table
+        table = Table(data, colWidths=[1.1*inch, 0.9*inch, 0.8*inch, 0.8*inch, 1.5*inch, 0.6*inch, 0.9*inch, 0.8*inch])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#003366')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#f0f0f0')),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ]))
+
+        elements.append(table)
+        elements.append(Spacer(1, 0.3*inch))
+
+        # Summary
+        factoring = total_earnings * 0.03
+        net = total_earnings - factoring
+
+        summary_html = f"""
+        <b>PAYMENT SUMMARY</b><br/><br/>
+        Total Moves: {len(moves)}<br/>
+        Total Miles: {total_miles:,.0f}<br/>
+        Gross Earnings: ${total_earnings:,.2f}<br/>
+        Factoring (3%): -${factoring:,.2f}<br/>
+        <b>NET PAYMENT: ${net:,.2f}</b>
+        """
+        elements.append(Paragraph(summary_html, info_style))
+    else:
+        elements.append(Paragraph(f"<b>No moves found for {driver_name} from {from_date} to {to_date}</b>", info_style))
+
+    return elements
+
+
+def receipt_document(output):
+    """Letter-size document with room for the letterhead (filename or file object)"""
+    return SimpleDocTemplate(output, pagesize=letter,
+                           topMargin=1.75*inch, bottomMargin=inch,
+                           leftMargin=0.75*inch, rightMargin=0.75*inch)
+
+
+def build_receipt(output, company, elements):
+    letterhead = letterhead_for(company)
+    receipt_document(output).build(elements, onFirstPage=letterhead, onLaterPages=letterhead)
+
+
+def render_driver_receipt(company, driver_name, contractor, moves, from_date, to_date):
+    """Payroll batch worker: one receipt as PDF bytes, plus render seconds"""
+    started = time.perf_counter()
+    buffer = io.BytesIO()
+    build_receipt(buffer, company, receipt_elements(driver_name, contractor, moves, from_date, to_date))
+    return buffer.getvalue(), time.perf_counter() - started
+
+
+def _payroll_executor(workers):
+    """Process pool for rendering; threads where processes aren't allowed"""
+    try:
+        return ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError) as e:
+        print(f"Process pool unavailable, using threads: {e}")
+        return ThreadPoolExecutor(max_workers=workers)
+
+
+def generate_payroll_batch(db_path, company, from_date, to_date, driver_names=None, output='zip',
+                           workers=PAYROLL_WORKERS, output_dir=PAYROLL_OUTPUT_DIR):
+    """Generate every driver's receipt for a pay period in one pass
+
+    Moves for all drivers come from one query, grouped in memory; receipts
+    render in parallel across a process pool. output='zip' writes one PDF per
+    driver into a ZIP, output='pdf' one merged PDF (pypdf merges the parallel
+    renders; without it the receipts are built sequentially into one document).
+    The file goes to output_dir.
+
+    Returns: dict with filename (full path), seconds (total) and drivers - a
+    list of {driver, moves, gross, seconds} with each receipt's render time.
+    """
+    started = time.perf_counter()
+    from_date = fix_date(from_date)
+    to_date = fix_date(to_date)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        grouped = fetch_receipt_moves(conn, from_date, to_date, driver_names)
+        drivers = list(driver_names) if driver_names is not None else sorted(grouped)
+        contractors = get_contractor_infos(conn, drivers, company)
+    finally:
+        conn.close()
+
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = os.path.join(output_dir, f"payroll_{from_date}_{to_date}_{stamp}.{'pdf' if output == 'pdf' else 'zip'}")
+    summary = {
+        driver: {
+            'driver': driver,
+            'moves': len(grouped.get(driver, [])),
+            'gross': sum(float(move[6] or 0) for move in grouped.get(driver, [])),
+            'seconds': 0.0,
+        }
+        for driver in drivers
+    }
+
+    if output == 'pdf' and not PYPDF_AVAILABLE:
+        # One document, one process: pages are numbered straight through
+        elements = []
+        for driver in drivers:
+            driver_started = time.perf_counter()
+            if elements:
+                elements.append(PageBreak())
+            elements.extend(receipt_elements(driver, contractors[driver], grouped.get(driver, []),
+                                             from_date, to_date))
+            summary[driver]['seconds'] = time.perf_counter() - driver_started
+        build_receipt(filename, company, elements)
+    else:
+        rendered = {}
+        if workers > 1 and len(drivers) > 1:
+            executor = _payroll_executor(min(workers, len(drivers)))
+            with executor:
+                futures = {
+                    executor.submit(render_driver_receipt, company, driver, contractors[driver],
+                                    grouped.get(driver, []), from_date, to_date): driver
+                    for driver in drivers
+                }
+                for future in as_completed(futures):
+                    rendered[futures[future]] = future.result()
+        else:
+            for driver in drivers:
+                rendered[driver] = render_driver_receipt(company, driver, contractors[driver],
+                                                         grouped.get(driver, []), from_date, to_date)
+
+        for driver, (_, seconds) in rendered.items():
+            summary[driver]['seconds'] = seconds
+
+        if output == 'pdf':
+            writer = PdfWriter()
+            for driver in drivers:
+                for page in PdfReader(io.BytesIO(rendered[driver][0])).pages:
+                    writer.add_page(page)
+            with open(filename, 'wb') as f:
+                writer.write(f)
+        else:
+            with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for driver in drivers:
+                    archive.writestr(f"driver_receipt_{driver.replace(' ', '_')}_{from_date}_{to_date}.pdf",
+                                     rendered[driver][0])
+
+    return {
+        'filename': filename,
+        'seconds': time.perf_counter() - started,
+        'drivers': [summary[driver] for driver in drivers],
+    }
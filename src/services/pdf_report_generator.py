@@ -5,83 +5,158 @@ Generates comprehensive PDF reports with trailer status, progress, and analytics
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import sqlite3
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
+from reportlab.lib.enums import TA_RIGHT
 from reportlab.graphics.shapes import Drawing, Line
 from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics.charts.piecharts import Pie
 from reportlab.platypus import KeepTogether
 import io
 import os
-import plotly.graph_objects as go
-import plotly.io as pio
-from PIL import Image as PILImage
-import tempfile
+
+try:
+    from src.services.pdf_toolkit import STYLES
+    from src.services import report_jobs
+except ImportError:
+    from pdf_toolkit import STYLES
+    import report_jobs
+
+REPORT_DB = 'trailer_tracker_streamlined.db'
+
+# Table columns per section, each with its SQL expression over moves
+TABLE_COLUMNS = {
+    'order_number': "{order_number}",
+    'origin': "{origin_city} || ', ' || {origin_state}",
+    'destination': "{destination_city} || ', ' || {destination_state}",
+    'driver_name': "{driver_name}",
+    'customer_name': "{customer_name}",
+    'pickup_date': "{pickup_date}",
+    'delivery_date': "{delivery_date}",
+    'actual_delivery': "{actual_delivery}",
+    'payment_status': "{payment_status}",
+    'amount': "{amount}",
+    'days_remaining': "ROUND(JULIANDAY({delivery_date}) - JULIANDAY('now'))",
+    'days_until_pickup': "ROUND(JULIANDAY({pickup_date}) - JULIANDAY('now'))",
+}
+MOVE_COLUMNS = ['order_number', 'customer_name', 'origin_city', 'origin_state', 'destination_city',
+                'destination_state', 'driver_name', 'status', 'pickup_date', 'delivery_date',
+                'actual_delivery', 'payment_status', 'amount']
+
+# section -> (status, ORDER BY, columns shown)
+TABLE_SECTIONS = {
+    'active': ('in_progress', 'delivery_date',
+               ['order_number', 'origin', 'destination', 'driver_name',
+                'pickup_date', 'delivery_date', 'days_remaining']),
+    'pending': ('pending', 'pickup_date',
+                ['order_number', 'origin', 'destination', 'pickup_date',
+                 'delivery_date', 'customer_name', 'days_until_pickup']),
+    'completed': ('completed', 'actual_delivery DESC',
+                  ['order_number', 'origin', 'destination', 'driver_name',
+                   'actual_delivery', 'payment_status', 'amount']),
+}
+
+TABLE_ROWS = 10
+
+
+def _sql_round(values, digits=0):
+    """SQLite ROUND: halves go away from zero (numpy rounds them to even)"""
+    scale = 10 ** digits
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5) / scale
+
+
+def load_client_report_data(customer_name=None, db_path=REPORT_DB):
+    """Everything a client update report shows, over one connection
+
+    Per-status counts come from the status index. The financial totals and
+    average transit time come from one scan of moves with conditional
+    aggregates. The active, pending and completed tables are one UNION ALL
+    of three LIMIT queries, one DataFrame per table. customer_name limits the
+    report to that customer's moves; None reports on all of them.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(moves)").fetchall()}
+        # Columns this schema lacks read as NULL instead of failing the query
+        col = {c: (c if c in existing else 'NULL') for c in MOVE_COLUMNS}
+
+        where, params = "", []
+        if customer_name is not None and 'customer_name' in existing:
+            where, params = "WHERE customer_name = ?", [customer_name]
+
+        counts = conn.execute(
+            f"SELECT {col['status']}, COUNT(*) FROM moves {where} GROUP BY 1", params
+        ).fetchall()
+
+        paid, unpaid, projected, avg_transit = conn.execute("""
+            SELECT SUM(CASE WHEN {status} = 'completed' AND {payment_status} = 'paid' THEN {amount} END),
+                   SUM(CASE WHEN {status} = 'completed' AND {payment_status} = 'pending' THEN {amount} END),
+                   SUM(CASE WHEN {status} IN ('in_progress', 'pending') THEN {amount} END),
+                   AVG(CASE WHEN {status} = 'completed' AND {actual_delivery} IS NOT NULL
+                            THEN JULIANDAY({actual_delivery}) - JULIANDAY({pickup_date}) END)
+            FROM moves {where}
+        """.format(where=where, **col), params).fetchone()
+
+        select = ', '.join(f"{expr.format(**col)} AS {name}" for name, expr in TABLE_COLUMNS.items())
+        arms = []
+        for section, (status, order, _) in TABLE_SECTIONS.items():
+            condition = f"{col['status']} = '{status}'" + (" AND customer_name = ?" if params else "")
+            arms.append(f"SELECT * FROM (SELECT '{section}' AS section, {select} FROM moves "
+                        f"WHERE {condition} ORDER BY {order} LIMIT {TABLE_ROWS})")
+        rows = conn.execute(" UNION ALL ".join(arms), params * len(arms)).fetchall()
+    finally:
+        conn.close()
+
+    status_counts = {}
+    for status, count in counts:
+        key = status if status is not None else 'unknown'
+        status_counts[key] = status_counts.get(key, 0) + count
+    status_counts = dict(sorted(status_counts.items()))
+    total_moves = sum(status_counts.values())
+
+    # object dtype keeps NULLs as None for the table builders' truthiness checks
+    names = list(TABLE_COLUMNS)
+    sections = {}
+    for section, (_, _, columns) in TABLE_SECTIONS.items():
+        picked = [names.index(c) + 1 for c in columns]
+        sections[section] = pd.DataFrame(
+            [[row[i] for i in picked] for row in rows if row[0] == section], columns=columns, dtype=object
+        )
+
+    return {
+        'moves': total_moves,
+        'status_counts': status_counts,
+        'status_overview': pd.DataFrame({
+            'status': list(status_counts),
+            'count': list(status_counts.values()),
+            'percentage': _sql_round(np.array(list(status_counts.values())) * 100.0 / max(total_moves, 1), 1),
+        }),
+        'avg_delivery_days': avg_transit or 0,
+        **sections,
+        'financials': {
+            'paid': paid or 0.0,
+            'pending': unpaid or 0.0,
+            'projected': projected or 0.0,
+        },
+    }
+
 
 class PDFReportGenerator:
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.setup_custom_styles()
-        
-    def setup_custom_styles(self):
-        """Setup custom styles for professional PDF appearance"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Title'],
-            fontSize=24,
-            textColor=colors.HexColor('#1e3a8a'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CustomSubtitle',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#3b82f6'),
-            spaceBefore=20,
-            spaceAfter=12,
-            alignment=TA_LEFT,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading3'],
-            fontSize=14,
-            textColor=colors.HexColor('#1e40af'),
-            spaceBefore=15,
-            spaceAfter=10,
-            leftIndent=0,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CustomNormal',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=colors.black,
-            alignment=TA_JUSTIFY,
-            spaceAfter=8
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='Footer',
-            parent=self.styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=TA_CENTER
-        ))
-
-    def generate_client_update_report(self, client_name, start_date=None, end_date=None):
+        # Shared, read-only registry (custom styles included)
+        self.styles = STYLES
+
+    def generate_client_update_report(self, client_name, start_date=None, end_date=None, customer_name=None,
+                                      db_path=REPORT_DB):
         """Generate comprehensive client update report"""
+        # One read of moves feeds every section below
+        report = load_client_report_data(customer_name, db_path)
+
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter,
                                topMargin=0.75*inch, bottomMargin=0.75*inch,
@@ -93,23 +168,23 @@ class PDFReportGenerator:
         story.append(Spacer(1, 0.5*inch))
         
         story.append(Paragraph("EXECUTIVE SUMMARY", self.styles['CustomSubtitle']))
-        story.append(self._create_executive_summary(start_date, end_date))
+        story.append(self._create_executive_summary(report))
         story.append(Spacer(1, 0.3*inch))
         
         story.append(Paragraph("STATUS OVERVIEW", self.styles['CustomSubtitle']))
-        story.append(self._create_status_overview_table())
+        story.append(self._create_status_overview_table(report))
         story.append(Spacer(1, 0.3*inch))
         
         story.append(Paragraph("ACTIVE MOVES - IN PROGRESS", self.styles['CustomSubtitle']))
-        story.append(self._create_active_moves_table())
+        story.append(self._create_active_moves_table(report))
         story.append(PageBreak())
         
         story.append(Paragraph("PENDING MOVES - AWAITING ACTION", self.styles['CustomSubtitle']))
-        story.append(self._create_pending_moves_table())
+        story.append(self._create_pending_moves_table(report))
         story.append(Spacer(1, 0.3*inch))
         
         story.append(Paragraph("COMPLETED MOVES", self.styles['CustomSubtitle']))
-        story.append(self._create_completed_moves_table(start_date, end_date))
+        story.append(self._create_completed_moves_table(report))
         story.append(PageBreak())
         
         story.append(Paragraph("PERFORMANCE METRICS", self.styles['CustomSubtitle']))
@@ -117,7 +192,7 @@ class PDFReportGenerator:
         story.append(Spacer(1, 0.3*inch))
         
         story.append(Paragraph("FINANCIAL SUMMARY", self.styles['CustomSubtitle']))
-        story.append(self._create_financial_summary())
+        story.append(self._create_financial_summary(report))
         
         story.append(Spacer(1, 0.5*inch))
         story.append(self._create_footer())
@@ -151,24 +226,13 @@ class PDFReportGenerator:
         
         return table
 
-    def _create_executive_summary(self, start_date, end_date):
+    def _create_executive_summary(self, report):
         """Create executive summary section"""
-        conn = sqlite3.connect('trailer_tracker_streamlined.db')
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM moves WHERE status = 'completed'")
-        completed = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM moves WHERE status = 'in_progress'")
-        in_progress = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM moves WHERE status = 'pending'")
-        pending = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT AVG(JULIANDAY(actual_delivery) - JULIANDAY(pickup_date)) FROM moves WHERE status = 'completed' AND actual_delivery IS NOT NULL")
-        avg_time = cursor.fetchone()[0] or 0
-        
-        conn.close()
+        counts = report['status_counts']
+        completed = counts.get('completed', 0)
+        in_progress = counts.get('in_progress', 0)
+        pending = counts.get('pending', 0)
+        avg_time = report['avg_delivery_days']
         
         summary_text = f"""
         This report provides a comprehensive overview of trailer move operations for the reporting period.
@@ -184,18 +248,9 @@ class PDFReportGenerator:
         
         return Paragraph(summary_text, self.styles['CustomNormal'])
 
-    def _create_status_overview_table(self):
+    def _create_status_overview_table(self, report):
         """Create status overview table with visual indicators"""
-        conn = sqlite3.connect('trailer_tracker_streamlined.db')
-        
-        query = """
-        SELECT status, COUNT(*) as count,
-               ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM moves), 1) as percentage
-        FROM moves
-        GROUP BY status
-        """
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        df = report['status_overview']
         
         data = [['Status', 'Count', 'Percentage', 'Trend']]
         
@@ -206,7 +261,7 @@ class PDFReportGenerator:
             'cancelled': 'CANCELLED'
         }
         
-        for _, row in df.iterrows():
+        for row in df.to_dict('records'):
             status_text = status_colors.get(row['status'], row['status'].upper())
             data.append([
                 status_text,
@@ -229,34 +284,16 @@ class PDFReportGenerator:
         
         return table
 
-    def _create_active_moves_table(self):
+    def _create_active_moves_table(self, report):
         """Create table of active/in-progress moves"""
-        conn = sqlite3.connect('trailer_tracker_streamlined.db')
-        
-        query = """
-        SELECT 
-            order_number,
-            origin_city || ', ' || origin_state as origin,
-            destination_city || ', ' || destination_state as destination,
-            driver_name,
-            pickup_date,
-            delivery_date,
-            ROUND(JULIANDAY(delivery_date) - JULIANDAY('now')) as days_remaining
-        FROM moves
-        WHERE status = 'in_progress'
-        ORDER BY delivery_date
-        LIMIT 10
-        """
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        df = report['active']
         
         if df.empty:
             return Paragraph("No active moves at this time.", self.styles['CustomNormal'])
         
         data = [['Order #', 'Origin', 'Destination', 'Driver', 'Pickup', 'Delivery', 'Days Left']]
         
-        for _, row in df.iterrows():
+        for row in df.to_dict('records'):
             days_left = row['days_remaining'] if row['days_remaining'] else 'N/A'
             if isinstance(days_left, (int, float)) and days_left < 0:
                 days_left = f"OVERDUE ({abs(int(days_left))}d)"
@@ -286,34 +323,16 @@ class PDFReportGenerator:
         
         return table
 
-    def _create_pending_moves_table(self):
+    def _create_pending_moves_table(self, report):
         """Create table of pending moves awaiting action"""
-        conn = sqlite3.connect('trailer_tracker_streamlined.db')
-        
-        query = """
-        SELECT 
-            order_number,
-            origin_city || ', ' || origin_state as origin,
-            destination_city || ', ' || destination_state as destination,
-            pickup_date,
-            delivery_date,
-            customer_name,
-            ROUND(JULIANDAY(pickup_date) - JULIANDAY('now')) as days_until_pickup
-        FROM moves
-        WHERE status = 'pending'
-        ORDER BY pickup_date
-        LIMIT 10
-        """
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        df = report['pending']
         
         if df.empty:
             return Paragraph("No pending moves at this time.", self.styles['CustomNormal'])
         
         data = [['Order #', 'Origin', 'Destination', 'Customer', 'Pickup', 'Delivery', 'Urgency']]
         
-        for _, row in df.iterrows():
+        for row in df.to_dict('records'):
             days_until = row['days_until_pickup'] if row['days_until_pickup'] else 999
             if days_until < 0:
                 urgency = "OVERDUE"
@@ -347,34 +366,16 @@ class PDFReportGenerator:
         
         return table
 
-    def _create_completed_moves_table(self, start_date, end_date):
+    def _create_completed_moves_table(self, report):
         """Create table of recently completed moves"""
-        conn = sqlite3.connect('trailer_tracker_streamlined.db')
-        
-        query = """
-        SELECT 
-            order_number,
-            origin_city || ', ' || origin_state as origin,
-            destination_city || ', ' || destination_state as destination,
-            driver_name,
-            actual_delivery,
-            payment_status,
-            amount
-        FROM moves
-        WHERE status = 'completed'
-        ORDER BY actual_delivery DESC
-        LIMIT 10
-        """
-        
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        df = report['completed']
         
         if df.empty:
             return Paragraph("No completed moves in this period.", self.styles['CustomNormal'])
         
         data = [['Order #', 'Origin', 'Destination', 'Driver', 'Delivered', 'Payment', 'Amount']]
         
-        for _, row in df.iterrows():
+        for row in df.to_dict('records'):
             payment_status = row['payment_status'] if row['payment_status'] else 'Pending'
             if payment_status == 'paid':
                 payment_icon = '✓'
@@ -431,21 +432,11 @@ class PDFReportGenerator:
         
         return table
 
-    def _create_financial_summary(self):
+    def _create_financial_summary(self, report):
         """Create financial summary section"""
-        conn = sqlite3.connect('trailer_tracker_streamlined.db')
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT SUM(amount) FROM moves WHERE status = 'completed' AND payment_status = 'paid'")
-        total_paid = cursor.fetchone()[0] or 0
-        
-        cursor.execute("SELECT SUM(amount) FROM moves WHERE status = 'completed' AND payment_status = 'pending'")
-        total_pending = cursor.fetchone()[0] or 0
-        
-        cursor.execute("SELECT SUM(amount) FROM moves WHERE status IN ('in_progress', 'pending')")
-        total_projected = cursor.fetchone()[0] or 0
-        
-        conn.close()
+        total_paid = report['financials']['paid']
+        total_pending = report['financials']['pending']
+        total_projected = report['financials']['projected']
         
         financial_data = [
             ['Category', 'Amount', 'Status'],
@@ -519,33 +510,43 @@ def show_pdf_report_interface():
         include_photos = st.checkbox("Include PODs", value=False)
     
     if st.button("🎯 Generate PDF Report", type="primary", use_container_width=True):
-        with st.spinner("Generating professional PDF report..."):
-            generator = PDFReportGenerator()
-            
-            if report_type == "Client Update Report":
-                pdf_buffer = generator.generate_client_update_report(
-                    client_name,
-                    date_range[0] if len(date_range) > 0 else None,
-                    date_range[1] if len(date_range) > 1 else None
-                )
-                
-                st.success("✅ PDF Report Generated Successfully!")
-                
-                st.download_button(
-                    label="📥 Download PDF Report",
-                    data=pdf_buffer,
-                    file_name=f"SW_Trucking_Report_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf",
-                    mime="application/pdf",
-                    use_container_width=True
-                )
-                
-                with st.expander("📊 Report Preview"):
-                    st.info("Report Details:")
-                    st.write(f"- Client: {client_name}")
-                    st.write(f"- Period: {date_range[0]} to {date_range[1]}")
-                    st.write(f"- Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}")
-                    st.write(f"- Pages: Approximately 3-5 pages")
-                    st.write(f"- Sections: Executive Summary, Status Overview, Active/Pending/Completed Moves, Metrics, Financials")
+        if report_type == "Client Update Report":
+            # Rendered by report_jobs workers; the page only polls
+            st.session_state['client_report_job'] = report_jobs.submit_report(
+                'client_update',
+                client_name=client_name,
+                start_date=date_range[0] if len(date_range) > 0 else None,
+                end_date=date_range[1] if len(date_range) > 1 else None
+            )
+            st.session_state['client_report_request'] = (client_name, tuple(date_range))
+    
+    job_id = st.session_state.get('client_report_job')
+    if job_id:
+        requested_client, requested_range = st.session_state['client_report_request']
+        finished = report_jobs.show_report_job(
+            job_id,
+            file_name=f"SW_Trucking_Report_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf",
+            label="📥 Download PDF Report",
+            key="client_report_download"
+        )
+        
+        if finished:
+            with st.expander("📊 Report Preview"):
+                st.info("Report Details:")
+                st.write(f"- Client: {requested_client}")
+                if len(requested_range) > 1:
+                    st.write(f"- Period: {requested_range[0]} to {requested_range[1]}")
+                st.write(f"- Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}")
+                st.write(f"- Pages: Approximately 3-5 pages")
+                st.write(f"- Sections: Executive Summary, Status Overview, Active/Pending/Completed Moves, Metrics, Financials")
+
+def render_client_update_report(client_name, start_date=None, end_date=None, customer_name=None):
+    """PDF bytes for a client update report (runs in a report_jobs worker)"""
+    return PDFReportGenerator().generate_client_update_report(
+        client_name, start_date, end_date, customer_name
+    ).getvalue()
+
+report_jobs.register_report('client_update', render_client_update_report, tables=['moves'])
 
 def generate_status_report_for_profile(username, role):
     """Generate PDF status report based on user role"""
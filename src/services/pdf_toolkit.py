@@ -0,0 +1,180 @@
+"""
+Shared ReportLab rendering toolkit
+Letterheads are drawn once per document into a Form XObject and stamped on
+each page with doForm, so a page carries one short reference instead of the
+full header/footer drawing (and the logo is embedded once). Logos are read
+and decoded once per process. STYLES is a read-only registry of every
+paragraph style the generators use, built once at import.
+"""
+
+import os
+import threading
+from datetime import datetime
+from types import MappingProxyType
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+
+LOGO_PATH = 'swt_logo_white.png'
+
+NAVY = colors.HexColor('#003366')
+CRIMSON = colors.HexColor('#DC143C')
+
+_logo_lock = threading.Lock()
+# path -> decoded ImageReader, or None when missing/unreadable
+_logos = {}
+
+
+def logo(path=LOGO_PATH):
+    """Decoded logo image for drawImage, or None; cached per process
+
+    A logo added after the first lookup is picked up on restart.
+    """
+    with _logo_lock:
+        if path in _logos:
+            return _logos[path]
+
+    reader = None
+    if os.path.exists(path):
+        try:
+            reader = ImageReader(path)
+            reader.getRGBData()  # decode now rather than on first use
+        except Exception as e:
+            print(f"Logo {path} unreadable: {e}")
+            reader = None
+
+    with _logo_lock:
+        _logos[path] = reader
+    return reader
+
+
+def draw_logo(canvas, x, y, width, height, path=LOGO_PATH):
+    image = logo(path)
+    if image is not None:
+        canvas.drawImage(image, x, y, width=width, height=height, preserveAspectRatio=True)
+
+
+class Letterhead:
+    """onFirstPage/onLaterPages callback backed by a per-document Form XObject
+
+    draw_static(canvas, doc) draws everything that is identical on every page
+    of one document (logo, company block, rules, generated-at stamp). It runs
+    once per document; later pages reuse the form. draw_page(canvas, doc)
+    draws what changes per page, such as the page number.
+    """
+
+    def __init__(self, name, draw_static, draw_page=None):
+        self.name = name
+        self.draw_static = draw_static
+        self.draw_page = draw_page
+
+    def __call__(self, canvas, doc):
+        width, height = doc.pagesize
+        form = f"{self.name}_{int(width)}x{int(height)}"
+        if not canvas.hasForm(form):
+            canvas.beginForm(form)
+            canvas.saveState()
+            self.draw_static(canvas, doc)
+            canvas.restoreState()
+            canvas.endForm()
+        canvas.doForm(form)
+
+        if self.draw_page:
+            canvas.saveState()
+            self.draw_page(canvas, doc)
+            canvas.restoreState()
+
+
+def company_letterhead(company, logo_path=LOGO_PATH):
+    """The Smith & Williams letterhead (header block, rules, footer) for a COMPANY dict"""
+
+    def draw_static(canvas, doc):
+        width, height = doc.pagesize
+
+        # Logo
+        draw_logo(canvas, 0.75*inch, height - 1.2*inch, 1.2*inch, 0.6*inch, logo_path)
+
+        # Company Name
+        canvas.setFont('Helvetica-Bold', 16)
+        canvas.setFillColor(NAVY)
+        canvas.drawString(2.2*inch, height - 0.85*inch, company['name'])
+
+        # Address
+        canvas.setFont('Helvetica', 10)
+        canvas.setFillColor(colors.black)
+        canvas.drawString(2.2*inch, height - 1*inch, company['address'])
+        canvas.drawString(2.2*inch, height - 1.15*inch, f"{company['dot']} | {company['mc']}")
+
+        # Contact
+        canvas.drawRightString(width - inch, height - 0.85*inch, f"Phone: {company['phone']}")
+        canvas.drawRightString(width - inch, height - 1*inch, company['email'])
+        canvas.drawRightString(width - inch, height - 1.15*inch, company['website'])
+
+        # Header Line
+        canvas.setStrokeColor(CRIMSON)
+        canvas.setLineWidth(2)
+        canvas.line(inch, height - 1.4*inch, width - inch, height - 1.4*inch)
+
+        # Footer
+        canvas.setStrokeColor(NAVY)
+        canvas.line(inch, 0.8*inch, width - inch, 0.8*inch)
+
+        canvas.setFont('Helvetica', 8)
+        canvas.drawString(inch, 0.6*inch, f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}")
+        canvas.drawCentredString(width/2, 0.4*inch, f"© {company['name']}")
+
+    def draw_page(canvas, doc):
+        canvas.setFont('Helvetica', 8)
+        canvas.drawRightString(doc.pagesize[0] - inch, 0.6*inch, f"Page {doc.page}")
+
+    return Letterhead('company_letterhead', draw_static, draw_page)
+
+
+def _build_styles():
+    sample = getSampleStyleSheet()
+    styles = {name: sample[name] for name in sample.byName}
+
+    custom = [
+        # Receipts, status and inventory reports
+        ParagraphStyle('ReportTitle', fontSize=24, textColor=NAVY, alignment=TA_CENTER, spaceAfter=30),
+        ParagraphStyle('Info', fontSize=11, leftIndent=20),
+        ParagraphStyle('Section', fontSize=14, textColor=colors.HexColor('#28a745'),
+                       fontName='Helvetica-Bold', spaceAfter=10),
+
+        # PDFReportGenerator
+        ParagraphStyle('CustomTitle', parent=sample['Title'], fontSize=24,
+                       textColor=colors.HexColor('#1e3a8a'), spaceAfter=30,
+                       alignment=TA_CENTER, fontName='Helvetica-Bold'),
+        ParagraphStyle('CustomSubtitle', parent=sample['Heading2'], fontSize=16,
+                       textColor=colors.HexColor('#3b82f6'), spaceBefore=20, spaceAfter=12,
+                       alignment=TA_LEFT, fontName='Helvetica-Bold'),
+        ParagraphStyle('SectionHeader', parent=sample['Heading3'], fontSize=14,
+                       textColor=colors.HexColor('#1e40af'), spaceBefore=15, spaceAfter=10,
+                       leftIndent=0, fontName='Helvetica-Bold'),
+        ParagraphStyle('CustomNormal', parent=sample['Normal'], fontSize=10,
+                       textColor=colors.black, alignment=TA_JUSTIFY, spaceAfter=8),
+        ParagraphStyle('Footer', parent=sample['Normal'], fontSize=8,
+                       textColor=colors.grey, alignment=TA_CENTER),
+
+        # Client status report
+        ParagraphStyle('StatusTitle', parent=sample['Title'], fontSize=22,
+                       textColor=colors.HexColor('#1e3a8a'), spaceAfter=30,
+                       alignment=TA_CENTER, fontName='Helvetica-Bold'),
+        ParagraphStyle('StatusHeading', parent=sample['Heading2'], fontSize=14,
+                       textColor=colors.HexColor('#1e3a8a'), spaceBefore=20, spaceAfter=12,
+                       fontName='Helvetica-Bold'),
+        ParagraphStyle('StatusSubHeading', parent=sample['Heading3'], fontSize=12,
+                       textColor=colors.HexColor('#2563eb'), spaceBefore=15, spaceAfter=10,
+                       fontName='Helvetica-Bold'),
+    ]
+    for style in custom:
+        styles[style.name] = style
+    return MappingProxyType(styles)
+
+
+# Shared by every generator in the process. Read-only: derive a new
+# ParagraphStyle(name, parent=STYLES[...]) instead of changing an entry.
+STYLES = _build_styles()
@@ -0,0 +1,200 @@
+"""
+Driver photo ingestion pipeline
+Uploaded photos are downscaled, EXIF-stripped and thumbnailed in a process pool,
+stored in the blob store and batch-inserted in one transaction - all off the
+Streamlit request, which only hands over the bytes and polls job progress.
+"""
+
+import io
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from PIL import Image, ImageOps
+
+from blob_store import store, register_blob, ensure_blob_tables, ensure_blob_column
+
+# Longest edge kept for stored photos, and for thumbnails
+MAX_DIMENSION = 2048
+THUMBNAIL_DIMENSION = 320
+JPEG_QUALITY = 85
+THUMBNAIL_QUALITY = 70
+
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# job_id -> PhotoIngestJob, for progress polling
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def process_photo(data, max_dimension=MAX_DIMENSION, thumbnail_dimension=THUMBNAIL_DIMENSION):
+    """Decode, orient, downscale and re-encode one photo (runs in a worker process)
+
+    EXIF is applied to the pixels (rotation) and then dropped, so GPS and
+    device metadata never reach storage.
+    Returns: dict with 'photo' and 'thumbnail' JPEG bytes plus final width/height
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        photo = io.BytesIO()
+        img.save(photo, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+        width, height = img.size
+
+        img.thumbnail((thumbnail_dimension, thumbnail_dimension), Image.LANCZOS)
+        thumbnail = io.BytesIO()
+        img.save(thumbnail, format='JPEG', quality=THUMBNAIL_QUALITY)
+
+    return {
+        'photo': photo.getvalue(),
+        'thumbnail': thumbnail.getvalue(),
+        'width': width,
+        'height': height,
+    }
+
+
+def get_executor():
+    """Shared worker pool; falls back to threads where processes aren't allowed"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                try:
+                    _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+                except (OSError, NotImplementedError) as e:
+                    print(f"Process pool unavailable, using threads: {e}")
+                    _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+
+def ensure_photo_columns(conn):
+    """Columns added to driver_photos for processed photos"""
+    ensure_blob_tables(conn)
+    for column in ('blob_sha256', 'thumbnail_sha256', 'original_sha256'):
+        ensure_blob_column(conn, 'driver_photos', column)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(driver_photos)").fetchall()]
+    for column in ('width', 'height'):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE driver_photos ADD COLUMN {column} INTEGER")
+
+
+class PhotoIngestJob:
+    """Progress of one batch of uploaded photos"""
+
+    def __init__(self, move_id, photo_type, total):
+        self.job_id = uuid.uuid4().hex
+        self.move_id = move_id
+        self.photo_type = photo_type
+        self.total = total
+        self.processed = 0
+        self.saved = 0
+        self.errors = []
+        self.status = 'processing'
+        self.created_at = datetime.now()
+
+    @property
+    def done(self):
+        return self.status in ('completed', 'failed')
+
+    @property
+    def progress(self):
+        return self.processed / self.total if self.total else 1.0
+
+
+def _run_job(job, photos, driver_name, transaction, keep_originals):
+    """Background thread: fan photos out to workers, then insert them in one transaction"""
+    try:
+        executor = get_executor()
+        futures = {executor.submit(process_photo, data): index for index, data in enumerate(photos)}
+        results = [None] * len(photos)
+
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                job.errors.append(f"Photo {index + 1}: {e}")
+            job.processed += 1
+
+        job.status = 'saving'
+
+        # Write files first so the write transaction only covers metadata
+        stored = []
+        for index, result in enumerate(results):
+            if result is None:
+                continue
+            stored.append((
+                store.put(result['photo']),
+                store.put(result['thumbnail']),
+                store.put(photos[index]) if keep_originals else None,
+                result
+            ))
+
+        rows = []
+        with transaction() as conn:
+            ensure_photo_columns(conn)
+            for photo, thumbnail, original, result in stored:
+                register_blob(conn, *photo, 'image/jpeg')
+                register_blob(conn, *thumbnail, 'image/jpeg')
+                if original:
+                    register_blob(conn, *original)
+                rows.append((
+                    job.move_id, job.photo_type, photo[0], thumbnail[0],
+                    original[0] if original else None,
+                    result['width'], result['height'], driver_name
+                ))
+
+            conn.executemany("""
+                INSERT INTO driver_photos
+                (move_id, photo_type, blob_sha256, thumbnail_sha256, original_sha256,
+                 width, height, driver_name)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+        job.saved = len(rows)
+        job.status = 'completed'
+    except Exception as e:
+        job.errors.append(str(e))
+        job.status = 'failed'
+
+
+def start_photo_ingest(move_id, photo_type, photos, driver_name, transaction, keep_originals=False):
+    """Queue uploaded photos for processing and return immediately
+
+    photos: uploaded file objects or raw bytes (read here, on the request thread)
+    transaction: context manager factory yielding a connection, e.g. db.transaction
+    Returns: the PhotoIngestJob to poll with get_job()
+    """
+    payloads = [p if isinstance(p, bytes) else p.getvalue() for p in photos]
+    job = PhotoIngestJob(move_id, photo_type, len(payloads))
+
+    with _jobs_lock:
+        _jobs[job.job_id] = job
+
+    threading.Thread(
+        target=_run_job,
+        args=(job, payloads, driver_name, transaction, keep_originals),
+        daemon=True
+    ).start()
+
+    return job
+
+
+def get_job(job_id):
+    """Look up a job started by start_photo_ingest"""
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def forget_job(job_id):
+    """Drop a finished job from the registry"""
+    with _jobs_lock:
+        _jobs.pop(job_id, None)
@@ -0,0 +1,172 @@
+"""
+Document preview cache
+Small thumbnails of stored images and first-page renders of PDFs, generated
+once per blob and kept on disk under a size cap (least recently used files are
+evicted first). List screens show these previews; full documents are only
+read from the blob store when a user opens or downloads one.
+"""
+
+import io
+import os
+import threading
+
+from blob_store import BLOB_ROOT, store
+
+try:
+    from PIL import Image, features
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+try:
+    import fitz  # PyMuPDF, for first-page PDF renders
+    PDF_RENDER_AVAILABLE = True
+except ImportError:
+    PDF_RENDER_AVAILABLE = False
+
+PREVIEW_ROOT = os.environ.get('SWT_PREVIEW_ROOT', os.path.join(BLOB_ROOT, 'previews'))
+
+# Total size of cached previews before the oldest are evicted
+MAX_CACHE_BYTES = int(os.environ.get('SWT_PREVIEW_CACHE_MB', '200')) * 1024 * 1024
+
+PREVIEW_DIMENSION = 320
+PREVIEW_QUALITY = 70
+
+
+class PreviewCache:
+    """On-disk LRU of previews keyed by blob sha256 and size"""
+
+    def __init__(self, root=PREVIEW_ROOT, max_bytes=MAX_CACHE_BYTES, blob_store=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.blob_store = blob_store or store
+        self.format = 'WEBP' if PIL_AVAILABLE and features.check('webp') else 'JPEG'
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        # Blobs that could not be rendered (unsupported type, corrupt file)
+        self._unrenderable = set()
+
+    def path_for(self, digest, size=PREVIEW_DIMENSION):
+        extension = 'webp' if self.format == 'WEBP' else 'jpg'
+        return os.path.join(self.root, digest[:2], f"{digest}_{size}.{extension}")
+
+    def get(self, digest, size=PREVIEW_DIMENSION):
+        """Preview bytes for a stored blob, rendering it on first request
+
+        Returns None when no preview can be made (no digest, unsupported
+        file type, or the imaging libraries aren't installed).
+        """
+        if not digest or not PIL_AVAILABLE or (digest, size) in self._unrenderable:
+            return None
+
+        path = self.path_for(digest, size)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # Mark as recently used
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            pass
+
+        try:
+            data = self._render(digest, size)
+        except Exception as e:
+            print(f"Preview failed for {digest}: {e}")
+            data = None
+
+        if data is None:
+            self._unrenderable.add((digest, size))
+            return None
+
+        self._write(path, data)
+        return data
+
+    def _render(self, digest, size):
+        if not self.blob_store.exists(digest):
+            return None
+
+        with self.blob_store.open(digest) as f:
+            is_pdf = f.read(5) == b'%PDF-'
+
+        if is_pdf:
+            if not PDF_RENDER_AVAILABLE:
+                return None
+            with fitz.open(self.blob_store.path_for(digest)) as pdf:
+                if pdf.page_count == 0:
+                    return None
+                page = pdf.load_page(0)
+                zoom = size / max(page.rect.width, page.rect.height)
+                pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+                img = Image.frombytes('RGB', (pixmap.width, pixmap.height), pixmap.samples)
+        else:
+            img = Image.open(self.blob_store.path_for(digest))
+            # Let JPEG decode at reduced scale instead of full resolution
+            img.draft('RGB', (size, size))
+
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail((size, size))
+
+        output = io.BytesIO()
+        img.save(output, format=self.format, quality=PREVIEW_QUALITY)
+        return output.getvalue()
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._files())
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        """(path, size, last used) for every cached preview"""
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict(self):
+        """Delete least recently used previews until under 90% of the cap"""
+        files = sorted(self._files(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._total_bytes = total
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._files():
+                os.remove(path)
+            self._total_bytes = 0
+            self._unrenderable.clear()
+
+
+# Shared cache for the app
+previews = PreviewCache()
+
+
+def get_preview(digest, size=PREVIEW_DIMENSION):
+    """Preview bytes for a blob digest, or None"""
+    return previews.get(digest, size)
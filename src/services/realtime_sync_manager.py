@@ -11,7 +11,27 @@ from datetime import datetime, timedelta
 import database as db
 from typing import Dict, List, Any, Callable
 import threading
-import time
+import event_broker
+import change_feed
+
+# Databases whose sync tables were already created by this process
+_initialized_databases = set()
+
+# Entity types in change events: tracked changes use singular names,
+# trigger-fed ones the table name
+TRAILER_ENTITIES = {'trailer', 'trailers', 'trailer_inventory'}
+MOVE_ENTITIES = {'move', 'moves'}
+DRIVER_ENTITIES = {'driver', 'drivers'}
+
+# Entity types each page shows; other pages only rerun for notifications
+PAGE_ENTITIES = {
+    'dashboard': TRAILER_ENTITIES | MOVE_ENTITIES,
+    'trailers': TRAILER_ENTITIES,
+    'moves': MOVE_ENTITIES,
+    'driver_portal': MOVE_ENTITIES,
+    'drivers': DRIVER_ENTITIES,
+    'coordinator': DRIVER_ENTITIES,
+}
 
 class RealtimeSyncManager:
     """Manages real-time synchronization across all modules"""
@@ -22,32 +42,16 @@ class RealtimeSyncManager:
         self.last_check = datetime.now()
         
     def initialize_sync_tables(self):
-        """Create tables for tracking changes and notifications"""
+        """Create tables for tracking changes and notifications (once per process)"""
+        if db.DB_FILE in _initialized_databases:
+            return
+        
         conn = db.get_connection()
         cursor = conn.cursor()
         
         try:
-            # Create change tracking table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS data_changes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    entity_type TEXT NOT NULL,
-                    entity_id TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    old_value TEXT,
-                    new_value TEXT,
-                    changed_by TEXT,
-                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    processed BOOLEAN DEFAULT 0,
-                    UNIQUE(entity_type, entity_id, action, changed_at)
-                )
-            """)
-            
-            # Create index for faster queries
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_data_changes_unprocessed 
-                ON data_changes(processed, changed_at DESC)
-            """)
+            # Append-only change log, shared with the API change feed
+            change_feed.ensure_change_log(conn)
             
             # Create real-time notifications table
             cursor.execute("""
@@ -65,6 +69,7 @@ class RealtimeSyncManager:
             """)
             
             conn.commit()
+            _initialized_databases.add(db.DB_FILE)
         except Exception as e:
             print(f"Sync table initialization error: {e}")
         finally:
@@ -77,8 +82,10 @@ class RealtimeSyncManager:
         cursor = conn.cursor()
         
         try:
+            changed_by = user or st.session_state.get('user', 'system')
+            changed_at = datetime.now()
             cursor.execute("""
-                INSERT OR REPLACE INTO data_changes 
+                INSERT INTO data_changes 
                 (entity_type, entity_id, action, old_value, new_value, changed_by, changed_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (
@@ -87,10 +94,17 @@ class RealtimeSyncManager:
                 action,
                 json.dumps(old_value) if old_value else None,
                 json.dumps(new_value) if new_value else None,
-                user or st.session_state.get('user', 'system'),
-                datetime.now()
+                changed_by,
+                changed_at
             ))
             
+            # Push to subscribers once the change is committed
+            event = event_broker.change_event(
+                cursor.lastrowid, entity_type, entity_id, action,
+                new_value, changed_by, changed_at
+            )
+            conn.after_commit(lambda: event_broker.broker.publish(event))
+            
             conn.commit()
             
             # Trigger immediate notification for critical changes
@@ -118,6 +132,15 @@ class RealtimeSyncManager:
             elif action == 'completion':
                 target_roles = ['Coordinator', 'Admin', 'Accounting']
             
+            payload = {
+                'entity_type': entity_type,
+                'entity_id': entity_id,
+                'action': action,
+                'data': data,
+                'timestamp': datetime.now().isoformat()
+            }
+            priority = 2 if action == 'cancellation' else 1
+            
             for role in target_roles:
                 cursor.execute("""
                     INSERT INTO realtime_notifications 
@@ -126,16 +149,14 @@ class RealtimeSyncManager:
                 """, (
                     role,
                     f"{entity_type}_{action}",
-                    2 if action == 'cancellation' else 1,
-                    json.dumps({
-                        'entity_type': entity_type,
-                        'entity_id': entity_id,
-                        'action': action,
-                        'data': data,
-                        'timestamp': datetime.now().isoformat()
-                    }),
+                    priority,
+                    json.dumps(payload),
                     datetime.now() + timedelta(hours=24)
                 ))
+                event = event_broker.notification_event(
+                    cursor.lastrowid, role, None, f"{entity_type}_{action}", priority, payload
+                )
+                conn.after_commit(lambda event=event: event_broker.broker.publish(event))
             
             conn.commit()
         except Exception as e:
@@ -143,49 +164,45 @@ class RealtimeSyncManager:
         finally:
             conn.close()
     
-    def check_for_updates(self, last_check: datetime = None) -> Dict[str, List[Dict]]:
-        """Check for any data updates since last check"""
-        if not last_check:
-            last_check = self.last_check
+    def check_for_updates(self, since: int = None, consumer: str = None,
+                          limit: int = 100) -> Dict[str, List[Dict]]:
+        """Check for data updates after this consumer's cursor
         
+        Nothing is marked processed: every consumer keeps its own position in
+        data_changes, so one session polling never hides changes from another.
+        The cursor is `since` if given, else the saved offset of the named
+        consumer, else this Streamlit session's. New consumers start at the
+        current end of the log.
+        """
         conn = db.get_connection()
-        cursor = conn.cursor()
         updates = {}
         
         try:
-            # Get unprocessed changes
-            cursor.execute("""
-                SELECT entity_type, entity_id, action, new_value, changed_by, changed_at
-                FROM data_changes
-                WHERE changed_at > ? AND processed = 0
-                ORDER BY changed_at DESC
-                LIMIT 100
-            """, (last_check,))
+            if since is None:
+                if consumer:
+                    since = change_feed.get_consumer_offset(conn, consumer)
+                else:
+                    since = st.session_state.get('sync_cursor')
+            if since is None:
+                since = change_feed.current_cursor(conn)
             
-            changes = cursor.fetchall()
-            
-            for change in changes:
-                entity_type = change[0]
-                if entity_type not in updates:
-                    updates[entity_type] = []
-                
-                updates[entity_type].append({
-                    'entity_id': change[1],
-                    'action': change[2],
-                    'new_value': json.loads(change[3]) if change[3] else None,
-                    'changed_by': change[4],
-                    'changed_at': change[5]
+            cursor = since
+            for change_id, entity_type, entity_id, action, new_value, changed_by, changed_at in \
+                    change_feed.read_log(conn, since, limit):
+                updates.setdefault(entity_type, []).append({
+                    'entity_id': entity_id,
+                    'action': action,
+                    'new_value': json.loads(new_value) if new_value else None,
+                    'changed_by': changed_by,
+                    'changed_at': changed_at
                 })
+                cursor = change_id
             
-            # Mark as processed
-            if changes:
-                cursor.execute("""
-                    UPDATE data_changes
-                    SET processed = 1
-                    WHERE changed_at > ? AND processed = 0
-                """, (last_check,))
+            if consumer:
+                change_feed.save_consumer_offset(conn, consumer, cursor)
                 conn.commit()
-            
+            else:
+                st.session_state.sync_cursor = cursor
             self.last_check = datetime.now()
             
         except Exception as e:
@@ -411,8 +428,6 @@ class DataChangeTracker:
 
 def show_realtime_notifications():
     """Display real-time notifications in the UI"""
-    sync_manager = RealtimeSyncManager()
-    
     # Get notifications for current user
     role = st.session_state.get('user_role')
     username = st.session_state.get('user')
@@ -445,25 +460,70 @@ def show_realtime_notifications():
                         st.rerun()
 
 
-def auto_refresh_check():
-    """Check for updates and refresh if needed"""
-    if 'last_update_check' not in st.session_state:
-        st.session_state.last_update_check = datetime.now()
+def get_event_subscription():
+    """This session's broker subscription, re-created if the login changes"""
+    role = st.session_state.get('user_role')
+    username = st.session_state.get('user')
+    subscription = st.session_state.get('event_subscription')
+    
+    if subscription is None or subscription.role != role or subscription.user != username:
+        if subscription is not None:
+            subscription.close()
+        subscription = event_broker.broker.subscribe(role=role, user=username)
+        st.session_state.event_subscription = subscription
+    
+    return subscription
+
+
+def is_relevant_event(event: Dict, entity_types, entity_ids=None) -> bool:
+    """Whether an event concerns what the page shows
     
-    # Check every 10 seconds
-    if datetime.now() - st.session_state.last_update_check > timedelta(seconds=10):
-        sync_manager = RealtimeSyncManager()
-        updates = sync_manager.check_for_updates(st.session_state.last_update_check)
+    Notifications are already addressed to this session's role/user by the
+    broker. Change events carry no target, so they count only for the page's
+    entity types (and, when entity_ids is given, those ids).
+    """
+    if event['kind'] != 'change':
+        return True
+    if event.get('entity_type') not in entity_types:
+        return False
+    return entity_ids is None or event.get('entity_id') in entity_ids
+
+
+def auto_refresh_check(interval: int = 2, entity_types=None, entity_ids=None):
+    """Rerun the page only when a relevant change or notification arrives
+    
+    Events are pushed into this session's in-memory queue by the broker,
+    so the periodic check costs no database query; a full rerun happens
+    only when something the page shows was delivered. entity_types defaults
+    to PAGE_ENTITIES for the current page; entity_ids narrows changes to
+    the rows on screen.
+    """
+    # One relay per process picks up writes made by other processes (the API)
+    event_broker.start_relay(db.get_connection)
+    subscription = get_event_subscription()
+    
+    if entity_types is None:
+        entity_types = PAGE_ENTITIES.get(st.session_state.get('current_page', 'dashboard'), set())
+    if entity_ids is not None:
+        entity_ids = {str(entity_id) for entity_id in entity_ids}
+    
+    def check_events():
+        events = [event for event in subscription.drain()
+                  if is_relevant_event(event, entity_types, entity_ids)]
+        if not events:
+            return
         
-        if updates:
-            # Store updates in session state
-            st.session_state.pending_updates = updates
-            st.session_state.last_update_check = datetime.now()
-            
-            # Show update notification
-            st.info(f"📊 {len(updates)} data updates available. Refreshing...")
-            time.sleep(1)
-            st.rerun()
+        updates = st.session_state.get('pending_updates', {})
+        for event in events:
+            updates.setdefault(event.get('entity_type') or event['kind'], []).append(event)
+        st.session_state.pending_updates = updates
+        st.rerun()
+    
+    if hasattr(st, 'fragment'):
+        st.fragment(run_every=interval)(check_events)()
+    else:
+        # Older Streamlit: check on each natural rerun
+        check_events()
 
 
 def apply_updates_to_page():
@@ -474,13 +534,15 @@ def apply_updates_to_page():
         # Apply updates based on current page context
         current_page = st.session_state.get('current_page', 'dashboard')
         
-        if 'trailer' in updates and current_page in ['trailers', 'dashboard']:
+        shown = PAGE_ENTITIES.get(current_page, set()) & set(updates)
+        
+        if TRAILER_ENTITIES & shown:
             st.info("🚛 Trailer data updated")
         
-        if 'move' in updates and current_page in ['moves', 'dashboard', 'driver_portal']:
+        if MOVE_ENTITIES & shown:
             st.info("📦 Move assignments updated")
         
-        if 'driver' in updates and current_page in ['drivers', 'coordinator']:
+        if DRIVER_ENTITIES & shown:
             st.info("👥 Driver status updated")
         
         # Clear pending updates
@@ -0,0 +1,374 @@
+"""
+Report generation jobs
+Reports are rendered in a worker pool, off the Streamlit script thread. Each
+request is a report_jobs row (queued -> running -> completed / failed) that the
+page polls, and finished output is kept in the blob store. The process running
+a job keeps its heartbeat fresh; a job whose heartbeat stops (its process
+exited) is marked failed by whichever process looks at it next.
+
+A job's cache key is (report type, parameters, versions of the tables the
+report reads, today's date - reports print it). Asking again for a report
+whose key matches a finished or in-flight job returns that job immediately
+instead of rendering again.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import date, datetime, timedelta
+
+import streamlit as st
+
+import data_cache
+from blob_store import store, save_blob, release_blob, ensure_blob_tables
+
+DB_PATH = 'trailer_tracker_streamlined.db'
+
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+FINISHED_STATUSES = ('completed', 'failed')
+
+# This process, as recorded on the jobs it runs
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+# Seconds between heartbeats of a queued/running job, and how long one may
+# go silent before the job counts as interrupted
+HEARTBEAT_SECONDS = 10
+STALE_SECONDS = 60
+
+# How often a page re-reads an unfinished job
+REPORT_JOB_POLL_SECONDS = 2
+
+# Finished jobs are kept this long (superseded ones go sooner)
+KEEP_DAYS = 30
+
+_executor = None
+_executor_lock = threading.Lock()
+# Jobs marked running never exceed the pool size
+_slots = threading.BoundedSemaphore(MAX_WORKERS)
+
+# report type -> ReportType
+_report_types = {}
+
+# Databases whose report_jobs schema this process has set up
+_initialized = set()
+_initialized_lock = threading.Lock()
+
+
+class ReportType:
+    """A registered report: render(**params) -> bytes, plus the tables it reads"""
+
+    def __init__(self, name, render, tables=(), content_type='application/pdf'):
+        self.name = name
+        self.render = render
+        self.tables = tuple(sorted(tables))
+        self.content_type = content_type
+
+
+def register_report(name, render, tables=(), content_type='application/pdf'):
+    """Make a report available to submit_report
+
+    render must be a module-level function (it is sent to a worker process).
+    It may return bytes, str or a BytesIO. Reports built only from their
+    parameters (no database reads) pass no tables.
+    """
+    _report_types[name] = ReportType(name, render, tables, content_type)
+
+
+def get_executor():
+    """Shared worker pool; falls back to threads where processes aren't allowed"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                try:
+                    _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+                except (OSError, NotImplementedError) as e:
+                    print(f"Process pool unavailable, using threads: {e}")
+                    _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+
+def ensure_report_jobs(conn, db_path=DB_PATH):
+    """Create report_jobs once per process per database, then prune old output"""
+    if db_path in _initialized:
+        return
+
+    ensure_blob_tables(conn)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS report_jobs (
+            job_id TEXT PRIMARY KEY,
+            report_type TEXT NOT NULL,
+            params TEXT,
+            cache_key TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            error TEXT,
+            blob_sha256 TEXT,
+            content_type TEXT,
+            size INTEGER,
+            render_seconds REAL,
+            owner TEXT,
+            heartbeat REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    """)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(report_jobs)").fetchall()]
+    for column, column_type in (('owner', 'TEXT'), ('heartbeat', 'REAL')):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE report_jobs ADD COLUMN {column} {column_type}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_report_jobs_cache_key ON report_jobs(cache_key, status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_report_jobs_status ON report_jobs(status)")
+    conn.commit()
+
+    with _initialized_lock:
+        first = db_path not in _initialized
+        _initialized.add(db_path)
+    if first:
+        prune_report_jobs(conn)
+
+
+def fail_stale_jobs(conn):
+    """Fail unfinished jobs whose owning process stopped sending heartbeats"""
+    cursor = conn.execute("""
+        UPDATE report_jobs
+        SET status = 'failed', error = 'Interrupted: the process running it stopped', finished_at = ?
+        WHERE status IN ('queued', 'running') AND COALESCE(heartbeat, 0) < ?
+    """, (datetime.now(), time.time() - STALE_SECONDS))
+    conn.commit()
+    return cursor.rowcount
+
+
+def canonical_params(value):
+    """JSON-ready form of report parameters; DataFrames are reduced to a content hash"""
+    if hasattr(value, 'to_json') and hasattr(value, 'columns'):
+        content = value.to_json(orient='split', date_format='iso', default_handler=str)
+        return {'dataframe': hashlib.sha256(content.encode()).hexdigest(), 'rows': len(value)}
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(k): canonical_params(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical_params(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def cache_key(report_type, params, versions):
+    """Key for (report type, canonical params, table versions, today's date)"""
+    payload = json.dumps([report_type, params, list(versions), date.today().isoformat()], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _connect(db_path):
+    return sqlite3.connect(db_path, timeout=30)
+
+
+def submit_report(report_type, db_path=DB_PATH, **params):
+    """Queue a report and return its job id without waiting for it
+
+    A completed job with the same cache key (and its output still stored), or
+    an identical job already queued or running, is returned instead.
+    """
+    spec = _report_types[report_type]
+    canonical = canonical_params(params)
+
+    conn = _connect(db_path)
+    try:
+        ensure_report_jobs(conn, db_path)
+        fail_stale_jobs(conn)
+        versions = ()
+        if spec.tables:
+            versions = data_cache.cache.tracked_versions(conn, spec.tables)
+            if versions is None:
+                # Untracked tables: no way to tell the data changed, never reuse
+                versions = (uuid.uuid4().hex,)
+        key = cache_key(report_type, canonical, versions)
+
+        existing = conn.execute("""
+            SELECT job_id, status, blob_sha256 FROM report_jobs
+            WHERE cache_key = ? AND status IN ('queued', 'running', 'completed')
+            ORDER BY created_at DESC
+            LIMIT 1
+        """, (key,)).fetchone()
+        if existing and (existing[1] != 'completed' or store.exists(existing[2])):
+            return existing[0]
+
+        job_id = uuid.uuid4().hex
+        conn.execute("""
+            INSERT INTO report_jobs (job_id, report_type, params, cache_key, content_type, owner, heartbeat, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (job_id, report_type, json.dumps(canonical, sort_keys=True), key, spec.content_type,
+              OWNER, time.time(), datetime.now()))
+        conn.commit()
+    finally:
+        conn.close()
+
+    threading.Thread(target=_run_job, args=(job_id, spec, params, db_path), daemon=True).start()
+    return job_id
+
+
+def _heartbeat(conn, job_id):
+    conn.execute("UPDATE report_jobs SET heartbeat = ? WHERE job_id = ?", (time.time(), job_id))
+    conn.commit()
+
+
+def _run_job(job_id, spec, params, db_path):
+    """Background thread: wait for a worker slot, render, store the output"""
+    conn = _connect(db_path)
+    try:
+        while not _slots.acquire(timeout=HEARTBEAT_SECONDS):
+            _heartbeat(conn, job_id)
+        try:
+            conn.execute("""
+                UPDATE report_jobs SET status = 'running', started_at = ?, heartbeat = ?
+                WHERE job_id = ?
+            """, (datetime.now(), time.time(), job_id))
+            conn.commit()
+
+            started = time.perf_counter()
+            try:
+                future = get_executor().submit(spec.render, **params)
+                while True:
+                    try:
+                        output = future.result(timeout=HEARTBEAT_SECONDS)
+                        break
+                    except FutureTimeout:
+                        _heartbeat(conn, job_id)
+                if hasattr(output, 'getvalue'):
+                    output = output.getvalue()
+                if isinstance(output, str):
+                    output = output.encode('utf-8')
+                if not output:
+                    raise ValueError("Report produced no output")
+            except Exception as e:
+                print(f"Report job {job_id} ({spec.name}) failed: {e}")
+                conn.execute("""
+                    UPDATE report_jobs SET status = 'failed', error = ?, finished_at = ?
+                    WHERE job_id = ?
+                """, (str(e), datetime.now(), job_id))
+                conn.commit()
+                return
+
+            digest, size = save_blob(conn, output, spec.content_type)
+            conn.execute("""
+                UPDATE report_jobs
+                SET status = 'completed', blob_sha256 = ?, size = ?, render_seconds = ?, finished_at = ?
+                WHERE job_id = ?
+            """, (digest, size, time.perf_counter() - started, datetime.now(), job_id))
+            conn.commit()
+        finally:
+            _slots.release()
+    finally:
+        conn.close()
+
+
+def get_job(job_id, db_path=DB_PATH):
+    """report_jobs row as a dict, or None"""
+    conn = _connect(db_path)
+    try:
+        ensure_report_jobs(conn, db_path)
+        cursor = conn.execute("SELECT * FROM report_jobs WHERE job_id = ?", (job_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        job = dict(zip([column[0] for column in cursor.description], row))
+        if job['status'] not in FINISHED_STATUSES and (job['heartbeat'] or 0) < time.time() - STALE_SECONDS:
+            fail_stale_jobs(conn)
+            return get_job(job_id, db_path)
+        return job
+    finally:
+        conn.close()
+
+
+def get_job_output(job, db_path=DB_PATH):
+    """Rendered bytes for a completed job (dict or job id), else None"""
+    if not isinstance(job, dict):
+        job = get_job(job, db_path)
+    if not job or job['status'] != 'completed' or not store.exists(job['blob_sha256']):
+        return None
+    return store.read(job['blob_sha256'])
+
+
+def prune_report_jobs(conn, days=KEEP_DAYS):
+    """Delete finished jobs and release their stored output
+
+    Removes jobs older than days, and completed output superseded by a newer
+    completed job for the same report and parameters (the data changed since).
+    The files themselves go with blob_store.sweep_orphan_blobs.
+    """
+    rows = conn.execute("""
+        SELECT job_id, blob_sha256 FROM report_jobs AS job
+        WHERE status IN ('completed', 'failed')
+        AND (created_at < ? OR EXISTS (
+            SELECT 1 FROM report_jobs AS newer
+            WHERE newer.report_type = job.report_type AND newer.params IS job.params
+            AND newer.status = 'completed' AND newer.created_at > job.created_at
+        ))
+    """, (datetime.now() - timedelta(days=days),)).fetchall()
+    for job_id, digest in rows:
+        release_blob(conn, digest)
+        conn.execute("DELETE FROM report_jobs WHERE job_id = ?", (job_id,))
+    conn.commit()
+    return len(rows)
+
+
+def show_report_job(job_id, file_name, label="📥 Download Report", key=None, db_path=DB_PATH):
+    """Job status, with a download button once it has completed
+
+    An unfinished job is re-read every REPORT_JOB_POLL_SECONDS in a fragment;
+    when it finishes the page reruns once to show the result.
+    Returns True when the job has finished (completed or failed).
+    """
+    key = key or f"report_job_{job_id}"
+    job = get_job(job_id, db_path)
+    if job is None:
+        st.warning("Report job not found")
+        return True
+
+    if job['status'] in FINISHED_STATUSES:
+        _render_finished_job(job, file_name, label, key, db_path)
+        return True
+
+    if hasattr(st, 'fragment'):
+        st.fragment(run_every=REPORT_JOB_POLL_SECONDS)(_poll_report_job)(job_id, db_path)
+    else:
+        # Older Streamlit: refresh on demand
+        _render_pending_job(job)
+        if st.button("🔄 Check status", key=f"{key}_check"):
+            st.rerun()
+    return False
+
+
+def _render_pending_job(job):
+    st.info("⏳ Report queued..." if job['status'] == 'queued' else "⏳ Rendering report...")
+
+
+def _poll_report_job(job_id, db_path):
+    job = get_job(job_id, db_path)
+    if job is None or job['status'] in FINISHED_STATUSES:
+        # A full rerun shows the result outside the fragment, ending the polling
+        st.rerun()
+    _render_pending_job(job)
+
+
+def _render_finished_job(job, file_name, label, key, db_path):
+    if job['status'] == 'failed':
+        st.error(f"Report failed: {job['error']}")
+        return
+    output = get_job_output(job, db_path)
+    if output is None:
+        st.warning("Report output is no longer available - generate it again")
+        return
+    st.download_button(label=label, data=output, file_name=file_name,
+                       mime=job['content_type'], key=key, use_container_width=True)
+    if job['render_seconds'] is not None:
+        st.caption(f"Rendered in {job['render_seconds']:.1f}s")
@@ -7,6 +7,7 @@ Prepares location data for Google Maps API integration
 import sqlite3
 from datetime import datetime
 import json
+import distance_estimator
 
 class RouteLearningSystem:
     def __init__(self):
@@ -181,6 +182,24 @@ class RouteLearningSystem:
                 'confidence': 1.0  # High confidence for established routes
             }
         
+        # Estimate unknown routes from coordinates (round trip, like payout miles)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            one_way = distance_estimator.estimator.model(conn, self.db_path).miles(origin, dest)
+        except sqlite3.Error as e:
+            print(f"Route estimate unavailable: {e}")
+            one_way = None
+        finally:
+            conn.close()
+        
+        if one_way:
+            miles = one_way * 2
+            return {
+                'miles': miles,
+                'payout': round(miles * 2.10, 2),
+                'confidence': 0.3  # Straight-line estimate, not a learned route
+            }
+        
         # Default for unknown routes
         return {
             'miles': 450.0,
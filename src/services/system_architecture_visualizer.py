@@ -11,6 +11,7 @@ import json
 import os
 import graphviz
 from company_config import get_company_info, get_report_header
+import report_jobs
 
 # System Components Definition
 SYSTEM_COMPONENTS = {
@@ -549,22 +550,29 @@ def show_system_architecture():
         )
         
         if st.button("Generate Documentation", type="primary"):
-            with st.spinner("Generating professional documentation..."):
-                doc_content = generate_documentation(doc_type)
-                
-                # Display preview
-                st.markdown("### Preview")
-                st.markdown(doc_content[:500] + "...")
-                
-                # Generate PDF
-                if st.button("Export as PDF with Letterhead"):
-                    pdf_bytes = generate_pdf_documentation(doc_content, doc_type)
-                    st.download_button(
-                        "📥 Download PDF",
-                        pdf_bytes,
-                        f"SWT_{doc_type.replace(' ', '_')}.pdf",
-                        "application/pdf"
-                    )
+            st.session_state['architecture_doc'] = (doc_type, generate_documentation(doc_type))
+            st.session_state.pop('architecture_doc_job', None)
+        
+        if st.session_state.get('architecture_doc'):
+            generated_type, doc_content = st.session_state['architecture_doc']
+            
+            # Display preview
+            st.markdown("### Preview")
+            st.markdown(doc_content[:500] + "...")
+            
+            # PDF is rendered by report_jobs workers; the page only polls
+            if st.button("Export as PDF with Letterhead"):
+                st.session_state['architecture_doc_job'] = report_jobs.submit_report(
+                    'architecture_docs', content=doc_content, doc_type=generated_type
+                )
+            
+            if st.session_state.get('architecture_doc_job'):
+                report_jobs.show_report_job(
+                    st.session_state['architecture_doc_job'],
+                    file_name=f"SWT_{generated_type.replace(' ', '_')}.pdf",
+                    label="📥 Download PDF",
+                    key="architecture_doc_download"
+                )
 
 def generate_css_export():
     """Generate complete CSS theme export"""
@@ -1132,6 +1140,9 @@ def generate_pdf_documentation(content, doc_type):
         # Fallback to simple text export
         return content.encode('utf-8')
 
+# Rendered from the content passed in, so no table versions in its cache key
+report_jobs.register_report('architecture_docs', generate_pdf_documentation)
+
 # Main function to display the architecture visualizer
 if __name__ == "__main__":
     show_system_architecture()
\ No newline at end of file
@@ -387,7 +387,7 @@ class EnhancedTrailerSwapManager:
                 SELECT move_id, new_trailer, old_trailer, driver_name,
                        pickup_location, move_date, status, created_at
                 FROM moves
-                WHERE date(created_at) >= date('now', '-' || ? || ' days')
+                WHERE created_at >= date('now', '-' || ? || ' days')
                 ORDER BY created_at DESC
             """
             df = pd.read_sql_query(query, conn, params=(days,))
@@ -2,138 +2,92 @@
 Mileage calculation using Google Maps API or fallback
 """
 
-import os
 import database as db
+import distance_matrix
+import location_index
 
 def calculate_mileage_google(from_address, to_address, api_key=None):
     """Calculate mileage using Google Maps API"""
+    service = distance_matrix.get_service(db.DB_FILE, api_key)
+    if not service.enabled:
+        return None, "Google Maps API key not configured"
+    
     try:
-        import googlemaps
-        
-        if not api_key:
-            api_key = os.environ.get('GOOGLE_MAPS_API_KEY')
-        
-        if not api_key:
-            return None, "Google Maps API key not configured"
-        
-        gmaps = googlemaps.Client(key=api_key)
-        
-        # Get distance matrix
-        result = gmaps.distance_matrix(
-            origins=[from_address],
-            destinations=[to_address],
-            units="imperial"
-        )
-        
-        if result['status'] == 'OK':
-            element = result['rows'][0]['elements'][0]
-            if element['status'] == 'OK':
-                distance_meters = element['distance']['value']
-                distance_miles = distance_meters * 0.000621371  # Convert meters to miles
-                return round(distance_miles, 1), None
-            else:
-                return None, f"Route not found: {element.get('status', 'Unknown error')}"
-        else:
-            return None, f"API error: {result.get('status', 'Unknown error')}"
-            
-    except ImportError:
-        return None, "googlemaps library not installed"
-    except Exception as e:
+        element = service.request([from_address], [to_address]).get((0, 0))
+    except distance_matrix.DistanceMatrixError as e:
         return None, str(e)
+    
+    if element and element['status'] == 'OK':
+        return element['miles'], None
+    return None, f"Route not found: {element['status'] if element else 'Unknown error'}"
 
 def calculate_mileage_with_cache(from_location, to_location, from_address=None, to_address=None):
-    """Calculate mileage with caching support"""
+    """Calculate mileage with caching support
     
-    # Check cache first
-    cached = get_cached_mileage(from_location, to_location)
-    if cached:
-        return cached, "cached"
+    Served from mileage_cache; missing routes are fetched from Google and
+    cached, routes past the cache TTL are refreshed in the background.
+    """
+    # Cached miles need no address; expired ones still need one to refresh
+    if not (from_address and to_address):
+        cached = get_cached_mileage(from_location, to_location)
+        if cached:
+            return cached, "cached"
+        return None, "Full addresses required for calculation"
     
-    # If we have full addresses, try Google Maps
-    if from_address and to_address:
-        miles, error = calculate_mileage_google(from_address, to_address)
-        if miles:
-            # Cache the result
-            cache_mileage(from_location, to_location, miles)
-            return miles, "calculated"
-        else:
-            return None, error
+    service = distance_matrix.get_service(db.DB_FILE)
+    cell = service.distance((from_location, from_address), (to_location, to_address))
+    if cell:
+        return cell['miles'], cell['source']
+    if not service.enabled:
+        return None, "Google Maps API key not configured"
+    return None, "Route not found"
+
+def calculate_mileages(from_location, from_address, destinations):
+    """One-way miles from one location to many: {to_location: miles}
     
-    # No addresses available
-    return None, "Full addresses required for calculation"
+    destinations: iterable of (to_location, to_address). Served as one
+    origin x destination matrix (memory, then one mileage_cache query, then
+    batched Google requests for whatever is missing).
+    """
+    destinations = [(name, address) for name, address in destinations if name and address]
+    if not (from_location and from_address and destinations):
+        return {}
+    
+    service = distance_matrix.get_service(db.DB_FILE)
+    cells = service.matrix([(from_location, from_address)], destinations)
+    return {to_location: cell['miles'] for (_, to_location), cell in cells.items()}
 
 def get_cached_mileage(from_location, to_location):
-    """Get cached mileage from database"""
+    """Get cached mileage (in-memory LRU in front of mileage_cache)"""
     try:
-        import sqlite3
-        conn = sqlite3.connect('trailer_tracker_streamlined.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT miles FROM mileage_cache 
-        WHERE from_location = ? AND to_location = ?
-        ''', (from_location, to_location))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            return result[0]
-        return None
-    except:
+        cell = distance_matrix.get_service(db.DB_FILE).cached_cell(from_location, to_location)
+        return cell['miles'] if cell else None
+    except Exception:
         return None
 
 def cache_mileage(from_location, to_location, miles, source="calculated"):
     """Cache mileage in database"""
     try:
-        import sqlite3
-        conn = sqlite3.connect('trailer_tracker_streamlined.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        conn = db.get_connection()
+        conn.execute('''
         INSERT OR REPLACE INTO mileage_cache (from_location, to_location, miles, source)
         VALUES (?, ?, ?, ?)
         ''', (from_location, to_location, miles, source))
-        
         conn.commit()
         conn.close()
+        distance_matrix.get_service(db.DB_FILE).forget(from_location, to_location)
         return True
-    except:
+    except Exception:
         return False
 
 def get_location_full_address(location_name):
-    """Get full address for a location from database"""
-    locations_df = db.get_all_locations()
-    if locations_df.empty:
-        return None
-    
-    location = locations_df[locations_df['location_title'] == location_name]
-    if location.empty:
-        return None
-    
-    loc = location.iloc[0]
-    
-    # Check for full_address field first
-    if 'full_address' in loc and loc['full_address']:
-        return loc['full_address']
-    
-    # Build from components
-    if 'street_address' in loc and loc['street_address']:
-        address_parts = []
-        if loc.get('street_address'):
-            address_parts.append(loc['street_address'])
-        if loc.get('city'):
-            address_parts.append(loc['city'])
-        if loc.get('state'):
-            address_parts.append(loc['state'])
-        if loc.get('zip_code'):
-            address_parts.append(str(loc['zip_code']))
-        
-        if address_parts:
-            return ', '.join(address_parts) + ', USA'
-    
-    # Fall back to location_address
-    if 'location_address' in loc and loc['location_address']:
-        return loc['location_address']
-    
-    return None
\ No newline at end of file
+    """Get full address for a location (served from the in-memory location index)"""
+    return get_locations().address(location_name)
+
+def get_locations():
+    """Current location index snapshot; reuse it for lookups in a loop"""
+    conn = db.get_connection()
+    try:
+        return location_index.index.snapshot(conn, db.DB_FILE)
+    finally:
+        conn.close()